@@ -0,0 +1,12 @@
+"""
+EXCEPTIONS.PY - Excepciones de API propias de Catalyst
+"""
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class InsufficientStock(APIException):
+    """Stock insuficiente para aplicar una salida de inventario"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Stock insuficiente para realizar esta salida'
+    default_code = 'insufficient_stock'
@@ -0,0 +1,107 @@
+"""
+Compara el listado compilado (CompiledListMixin) con el serializador de DRF
+sobre páginas grandes: mide filas por segundo de cada camino (consulta +
+serialización) y verifica que ambos entreguen el mismo JSON.
+
+Uso:
+    python manage.py benchmark_list_serialization --user admin
+    python manage.py benchmark_list_serialization --user admin --endpoint inventory-movements --rows 10000 --repeat 5
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.catalyst_app.models import User
+from apps.catalyst_app.serializers.compiled import compile_serializer
+from apps.catalyst_app.views.inventory_views import InventoryViewSet
+from apps.catalyst_app.views.movement_views import InventoryMovementViewSet
+from apps.catalyst_app.views.product_views import ProductViewSet
+from apps.catalyst_app.views.sales_views import SaleViewSet
+
+
+ENDPOINTS = {
+    'products': ProductViewSet,
+    'inventory': InventoryViewSet,
+    'sales': SaleViewSet,
+    'inventory-movements': InventoryMovementViewSet,
+}
+
+
+def _best_time(function, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Mide el listado compilado (.values()) contra el ModelSerializer de DRF'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Usuario con el que se arma el listado (define la empresa)'
+        )
+        parser.add_argument(
+            '--endpoint',
+            choices=sorted(ENDPOINTS),
+            action='append',
+            help='Listado a medir (repetible; por defecto todos)'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Filas por página'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Repeticiones por camino (se informa la mejor)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuario no encontrado: {options['user']}")
+
+        for endpoint in options['endpoint'] or sorted(ENDPOINTS):
+            request = Request(APIRequestFactory().get(f'/api/{endpoint}/'))
+            request.user = user
+            view = ENDPOINTS[endpoint](action='list', request=request, format_kwarg=None, args=(), kwargs={})
+            queryset = view.filter_queryset(view.get_queryset())[:options['rows']]
+
+            compiled = compile_serializer(view.get_serializer())
+            if compiled is None:
+                self.stdout.write(self.style.WARNING(f'{endpoint}: el serializador no se puede compilar'))
+                continue
+
+            drf_time, drf_data = _best_time(
+                lambda: view.get_serializer(queryset.all(), many=True).data, options['repeat']
+            )
+            compiled_time, compiled_data = _best_time(
+                lambda: compiled.to_representation(compiled.values(queryset.all())), options['repeat']
+            )
+
+            rows = len(compiled_data)
+            if not rows:
+                self.stdout.write(self.style.WARNING(f'{endpoint}: sin filas'))
+                continue
+            same = json.dumps(drf_data, default=str) == json.dumps(compiled_data, default=str)
+            self.stdout.write(
+                f'{endpoint}: {rows} filas | '
+                f'DRF {drf_time * 1000:.0f} ms ({rows / drf_time:,.0f} filas/s) | '
+                f'compilado {compiled_time * 1000:.0f} ms ({rows / compiled_time:,.0f} filas/s) | '
+                f'x{drf_time / compiled_time:.1f}'
+            )
+            if not same:
+                self.stdout.write(self.style.ERROR(f'{endpoint}: el JSON compilado difiere del de DRF'))
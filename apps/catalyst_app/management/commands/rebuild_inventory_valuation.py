@@ -0,0 +1,39 @@
+"""
+Reconstruye la valorización del inventario desde el historial de movimientos.
+Ejecutarlo al activar la valorización o al cambiar INVENTORY_VALUATION_METHOD.
+
+Uso:
+    python manage.py rebuild_inventory_valuation
+    python manage.py rebuild_inventory_valuation --company 3 --chunk-size 200
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.catalyst_app.services.valuation_services import rebuild, REBUILD_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye InventoryValuation e InventoryCostLayer desde InventoryMovement'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID de la empresa a reconstruir (por defecto todas)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=REBUILD_CHUNK_SIZE,
+            help='Inventarios por lote (una transacción por lote)'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild(
+            company_id=options.get('company'),
+            chunk_size=options['chunk_size'],
+            on_progress=lambda done: self.stdout.write(f'  {done} inventarios')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Valorización reconstruida ({settings.INVENTORY_VALUATION_METHOD}): {total} inventarios'
+        ))
@@ -0,0 +1,28 @@
+"""
+Reconstruye los acumulados diarios de ventas desde el historial.
+
+Uso:
+    python manage.py rebuild_sales_rollups
+    python manage.py rebuild_sales_rollups --company 3
+"""
+from django.core.management.base import BaseCommand
+
+from apps.catalyst_app.services.rollup_services import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye SalesDailyRollup y ProductSalesDailyRollup desde ventas y órdenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID de la empresa a reconstruir (por defecto todas)'
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_rollups(company_id=options.get('company'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Acumulados reconstruidos: {result['sales']} filas de ventas, "
+            f"{result['products']} filas de productos"
+        ))
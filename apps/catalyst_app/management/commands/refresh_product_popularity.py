@@ -0,0 +1,33 @@
+"""
+Recalcula el ranking de productos (ventanas de 7/30/365 días).
+Conviene programarlo una vez al día y después de rebuild_sales_rollups.
+
+Uso:
+    python manage.py refresh_product_popularity
+    python manage.py refresh_product_popularity --company 3
+"""
+from django.core.management.base import BaseCommand
+
+from apps.catalyst_app.models import Company
+from apps.catalyst_app.services.popularity_services import refresh_company
+
+
+class Command(BaseCommand):
+    help = 'Recalcula ProductPopularity desde los acumulados diarios por producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID de la empresa a recalcular (por defecto todas)'
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.all()
+        if options.get('company'):
+            companies = companies.filter(pk=options['company'])
+
+        total = 0
+        for company_id in companies.values_list('id', flat=True):
+            total += refresh_company(company_id)
+        self.stdout.write(self.style.SUCCESS(f'Ranking recalculado: {total} filas'))
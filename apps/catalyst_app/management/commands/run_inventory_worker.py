@@ -0,0 +1,59 @@
+"""
+Worker que procesa los trabajos de sincronización de inventario encolados
+desde POST /api/inventory/sync_inventory/.
+
+Uso:
+    python manage.py run_inventory_worker
+    python manage.py run_inventory_worker --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.catalyst_app.services.inventory_services import (
+    claim_next_job, run_sync_job, PROVISION_BATCH_SIZE
+)
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de sincronización de inventario (InventorySyncJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesa los trabajos pendientes y termina'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando la cola está vacía (por defecto 2)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PROVISION_BATCH_SIZE,
+            help='Productos por lote'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f'Procesando sync de inventario #{job.pk} (empresa {job.company_id})')
+            result = run_sync_job(job, batch_size=options['batch_size'])
+            if result is None:
+                self.stdout.write(self.style.ERROR(f'Trabajo #{job.pk} falló'))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Trabajo #{job.pk} completado: {result['created']} inventarios creados, "
+                    f"{result['scanned']} combinaciones revisadas"
+                ))
@@ -0,0 +1,32 @@
+"""
+Guarda la foto diaria del stock de cada inventario (base del stock a una fecha).
+Programarlo una vez al día (o por semana) cerca del cierre, por ejemplo con cron.
+
+Uso:
+    python manage.py take_inventory_snapshots
+    python manage.py take_inventory_snapshots --company 3
+"""
+from django.core.management.base import BaseCommand
+
+from apps.catalyst_app.services.snapshot_services import take_snapshots, SNAPSHOT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Guarda el stock actual de cada inventario como InventorySnapshot del día'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID de la empresa (por defecto todas)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SNAPSHOT_BATCH_SIZE,
+            help='Inventarios por lote'
+        )
+
+    def handle(self, *args, **options):
+        written = take_snapshots(options.get('company'), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Snapshots guardados: {written}'))
@@ -0,0 +1,207 @@
+"""
+MIDDLEWARE.PY - Instrumentación y presupuesto de consultas por request
+Registra por request la cantidad de consultas SQL, el tiempo en base de datos,
+las consultas repetidas y el tiempo de serialización. Con DEBUG los expone
+como headers, siempre los acumula en histogramas por nombre de URL y compara
+la cantidad de consultas contra el presupuesto declarado para la vista.
+
+Solo se miden las consultas de la conexión del hilo del request (las tareas
+de fanout_services corren en otros hilos con sus propias conexiones).
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+# Límites superiores de los buckets de los histogramas
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DURATION_MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000)
+
+_current = ContextVar('query_budget_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Se lanza (en tests) cuando una vista supera su presupuesto de consultas"""
+
+
+class RequestMetrics:
+    """Métricas de base de datos y serialización de un request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._seen = {}
+
+    @property
+    def duplicates(self):
+        """Consultas con el mismo SQL que otra anterior (típico de un N+1)"""
+        return sum(count - 1 for count in self._seen.values())
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self._seen[sql] = self._seen.get(sql, 0) + 1
+
+
+@contextmanager
+def timed_serialization():
+    """Suma al request actual el tiempo del bloque como tiempo de serialización"""
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.serializer_time += time.perf_counter() - start
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'sum': round(self.total, 3),
+            'max': round(self.max, 3),
+        }
+
+
+class _RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.queries = _Histogram(QUERY_COUNT_BUCKETS)
+        self.duplicates = _Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time_ms = _Histogram(DURATION_MS_BUCKETS)
+        self.serializer_time_ms = _Histogram(DURATION_MS_BUCKETS)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'over_budget': self.over_budget,
+            'queries': self.queries.as_dict(),
+            'duplicates': self.duplicates.as_dict(),
+            'db_time_ms': self.db_time_ms.as_dict(),
+            'serializer_time_ms': self.serializer_time_ms.as_dict(),
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def query_stats():
+    """Histogramas acumulados por nombre de URL en este proceso"""
+    with _stats_lock:
+        return {route: stats.as_dict() for route, stats in sorted(_stats.items())}
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match.view_name or match._func_path
+
+
+def _view_budget(request):
+    """
+    Presupuesto declarado para la vista resuelta: el atributo query_budgets
+    del ViewSet ({acción: máximo}) o settings.QUERY_BUDGETS por nombre de URL.
+    Retorna (etiqueta, máximo) o (None, None).
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+
+    view_class = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    budgets = getattr(view_class, 'query_budgets', None) or {}
+    if action and action in budgets:
+        return f'{view_class.__name__}.{action}', budgets[action]
+
+    budget = settings.QUERY_BUDGETS.get(match.view_name)
+    if budget is not None:
+        return match.view_name, budget
+    return None, None
+
+
+class QueryBudgetMiddleware:
+    """
+    Mide las consultas de cada request y aplica el presupuesto de la vista.
+    Con QUERY_BUDGET_MODE='raise' (tests) lanza QueryBudgetExceeded; con
+    'warn' (producción) registra una advertencia; con 'off' solo mide.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        route = _route_name(request)
+        label, budget = _view_budget(request)
+        over_budget = budget is not None and metrics.queries > budget
+
+        if route:
+            with _stats_lock:
+                stats = _stats.setdefault(route, _RouteStats())
+                stats.requests += 1
+                stats.over_budget += int(over_budget)
+                stats.queries.observe(metrics.queries)
+                stats.duplicates.observe(metrics.duplicates)
+                stats.db_time_ms.observe(metrics.db_time * 1000)
+                stats.serializer_time_ms.observe(metrics.serializer_time * 1000)
+
+        if settings.DEBUG:
+            response['X-DB-Query-Count'] = str(metrics.queries)
+            response['X-DB-Time-Ms'] = f'{metrics.db_time * 1000:.1f}'
+            response['X-DB-Duplicate-Queries'] = str(metrics.duplicates)
+            response['X-Serializer-Time-Ms'] = f'{metrics.serializer_time * 1000:.1f}'
+            if budget is not None:
+                response['X-Query-Budget'] = str(budget)
+
+        if over_budget and settings.QUERY_BUDGET_MODE != 'off':
+            message = (
+                f'{label} ejecutó {metrics.queries} consultas (presupuesto {budget}, '
+                f'{metrics.duplicates} repetidas) en {request.method} {request.path}'
+            )
+            if settings.QUERY_BUDGET_MODE == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0002_user_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('channel', models.CharField(choices=[('pos', 'Punto de Venta'), ('ecommerce', 'E-commerce')], default='pos', max_length=20)),
+                ('quantity', models.IntegerField(default=0, help_text='Unidades vendidas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Ingresos (suma de subtotales)', max_digits=14)),
+                ('line_count', models.IntegerField(default=0, help_text='Cantidad de líneas de venta/orden')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_sales_rollups', to='catalyst_app.branch')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_sales_rollups', to='catalyst_app.company')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='catalyst_app.product')),
+                ('seller', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='product_sales_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['company', 'channel', 'day'], name='catalyst_ap_company_8babc5_idx'), models.Index(fields=['seller', 'day'], name='catalyst_ap_seller__5e5fe5_idx'), models.Index(fields=['product', 'day'], name='catalyst_ap_product_951862_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'branch', 'seller', 'product', 'day', 'channel'), name='product_sales_rollup_unique_key', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Día de la venta')),
+                ('payment_method', models.CharField(blank=True, default='', help_text='Método de pago (vacío para órdenes e-commerce)', max_length=20)),
+                ('channel', models.CharField(choices=[('pos', 'Punto de Venta'), ('ecommerce', 'E-commerce')], default='pos', max_length=20)),
+                ('status', models.CharField(blank=True, default='', help_text='Estado de la orden (vacío para ventas POS)', max_length=20)),
+                ('sales_count', models.IntegerField(default=0, help_text='Cantidad de ventas/órdenes')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, help_text='Monto total acumulado', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('branch', models.ForeignKey(blank=True, help_text='Sucursal (vacío para órdenes e-commerce)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='catalyst_app.branch')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='catalyst_app.company')),
+                ('seller', models.ForeignKey(blank=True, db_constraint=False, help_text='Vendedor (vacío para órdenes e-commerce)', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='sales_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['company', 'channel', 'day'], name='catalyst_ap_company_fd4463_idx'), models.Index(fields=['seller', 'day'], name='catalyst_ap_seller__fad869_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'branch', 'seller', 'day', 'payment_method', 'channel', 'status'), name='sales_rollup_unique_key', nulls_distinct=False)],
+            },
+        ),
+    ]
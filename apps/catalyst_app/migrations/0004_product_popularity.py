@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0003_sales_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('pos', 'Punto de Venta'), ('ecommerce', 'E-commerce')], default='pos', max_length=20)),
+                ('units_7d', models.IntegerField(default=0, help_text='Unidades vendidas últimos 7 días')),
+                ('units_30d', models.IntegerField(default=0, help_text='Unidades vendidas últimos 30 días')),
+                ('units_365d', models.IntegerField(default=0, help_text='Unidades vendidas últimos 365 días')),
+                ('orders_7d', models.IntegerField(default=0, help_text='Ventas/órdenes últimos 7 días')),
+                ('orders_30d', models.IntegerField(default=0, help_text='Ventas/órdenes últimos 30 días')),
+                ('orders_365d', models.IntegerField(default=0, help_text='Ventas/órdenes últimos 365 días')),
+                ('as_of', models.DateField(help_text='Día al que corresponden las ventanas')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_popularity', to='catalyst_app.company')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity', to='catalyst_app.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'channel', '-units_7d'], name='popularity_units_7d_idx'), models.Index(fields=['company', 'channel', '-units_30d'], name='popularity_units_30d_idx'), models.Index(fields=['company', 'channel', '-units_365d'], name='popularity_units_365d_idx')],
+                'unique_together': {('product', 'channel')},
+            },
+        ),
+    ]
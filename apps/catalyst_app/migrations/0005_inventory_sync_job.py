@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0004_product_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En Proceso'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('pairs_total', models.IntegerField(default=0, help_text='Combinaciones (sucursal, producto) a revisar al iniciar')),
+                ('pairs_scanned', models.IntegerField(default=0, help_text='Combinaciones (sucursal, producto) revisadas')),
+                ('inventories_created', models.IntegerField(default=0, help_text='Inventarios creados')),
+                ('error', models.TextField(blank=True, default='', help_text='Detalle del error si el trabajo falló')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Último avance informado por el worker', null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_sync_jobs', to='catalyst_app.company')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_sync_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='catalyst_ap_status_50f9db_idx'), models.Index(fields=['company', 'status'], name='catalyst_ap_company_9d5e98_idx')],
+            },
+        ),
+    ]
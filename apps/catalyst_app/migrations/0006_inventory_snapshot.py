@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0005_inventory_sync_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(help_text='Día (local) al que corresponde la foto')),
+                ('stock', models.IntegerField(help_text='Stock al momento de la foto')),
+                ('taken_at', models.DateTimeField(help_text='Momento exacto en que se leyó el stock')),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='catalyst_app.inventory')),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['inventory', '-taken_at'], name='inv_snapshot_taken_idx'), models.Index(fields=['snapshot_date'], name='catalyst_ap_snapsho_b9dabf_idx')],
+                'unique_together': {('inventory', 'snapshot_date')},
+            },
+        ),
+    ]
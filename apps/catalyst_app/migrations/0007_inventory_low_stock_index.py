@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0006_inventory_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('stock__lte', models.F('reorder_point'))), fields=['branch', 'stock'], name='inventory_low_stock_idx'),
+        ),
+    ]
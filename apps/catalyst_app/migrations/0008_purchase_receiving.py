@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:12
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0007_inventory_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseitem',
+            name='quantity_received',
+            field=models.IntegerField(default=0, help_text='Cantidad ya recibida en el inventario de la sucursal', validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.CreateModel(
+            name='PurchaseReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(blank=True, help_text='Clave enviada por el cliente para reintentos seguros', max_length=64, null=True)),
+                ('lines', models.IntegerField(default=0, help_text='Items recibidos')),
+                ('units', models.IntegerField(default=0, help_text='Unidades recibidas')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('purchase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='catalyst_app.purchase')),
+                ('received_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('purchase', 'idempotency_key'), name='unique_purchase_receipt_key')],
+            },
+        ),
+    ]
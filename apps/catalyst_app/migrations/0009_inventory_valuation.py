@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0008_purchase_receiving'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorymovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Costo unitario de la entrada (por defecto el costo promedio o Product.cost)', max_digits=14, null=True),
+        ),
+        migrations.CreateModel(
+            name='InventoryValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0, help_text='Unidades valorizadas')),
+                ('total_cost', models.DecimalField(decimal_places=4, default=0, help_text='Costo total del stock', max_digits=16)),
+                ('average_cost', models.DecimalField(decimal_places=4, default=0, help_text='Costo unitario promedio', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('inventory', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='valuation', to='catalyst_app.inventory')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryCostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(help_text='Unidades de la entrada')),
+                ('quantity_remaining', models.IntegerField(help_text='Unidades aún no consumidas')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('received_at', models.DateTimeField()),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='catalyst_app.inventory')),
+                ('movement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cost_layers', to='catalyst_app.inventorymovement')),
+            ],
+            options={
+                'ordering': ['received_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('quantity_remaining__gt', 0)), fields=['inventory', 'received_at'], name='cost_layer_open_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalyst_app', '0009_inventory_valuation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsalesdailyrollup',
+            name='sales_count',
+            field=models.IntegerField(default=0, help_text='Cantidad de ventas/órdenes distintas que incluyen el producto'),
+        ),
+    ]
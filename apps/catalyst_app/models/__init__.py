@@ -1,9 +1,13 @@
 from .users import User, Company, Subscription
 from .products import Product
 from .branch import Branch, Inventory, InventoryMovement
-from .suppliers import Supplier, Purchase, PurchaseItem
+from .suppliers import Supplier, Purchase, PurchaseItem, PurchaseReceipt
 from .sales import Sale, SaleItem, Payment
 from .orders import Order, OrderItem, ShoppingCart, CartItem
+from .stats import SalesDailyRollup, ProductSalesDailyRollup, ProductPopularity
+from .inventory import (
+    InventorySyncJob, InventorySnapshot, InventoryValuation, InventoryCostLayer
+)
 
 __all__ = [
     'User',
@@ -16,6 +20,7 @@ __all__ = [
     'Supplier',
     'Purchase',
     'PurchaseItem',
+    'PurchaseReceipt',
     'Sale',
     'SaleItem',
     'Payment',
@@ -23,4 +28,11 @@ __all__ = [
     'OrderItem',
     'ShoppingCart',
     'CartItem',
+    'SalesDailyRollup',
+    'ProductSalesDailyRollup',
+    'ProductPopularity',
+    'InventorySyncJob',
+    'InventorySnapshot',
+    'InventoryValuation',
+    'InventoryCostLayer',
 ]
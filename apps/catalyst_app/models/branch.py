@@ -62,6 +62,11 @@ class Branch(models.Model):
         return f"{self.name} - {self.company.name}"
 
 
+# Inventarios en o bajo el punto de reorden. Las consultas deben usar esta misma
+# condición para que la base de datos aproveche el índice parcial
+LOW_STOCK = models.Q(stock__lte=models.F('reorder_point'))
+
+
 class Inventory(models.Model):
     """
     Relación many-to-many entre Sucursal y Producto.
@@ -105,16 +110,40 @@ class Inventory(models.Model):
         indexes = [
             models.Index(fields=['branch', 'product']),
             models.Index(fields=['stock']),
+            # Índice parcial: solo las filas en o bajo el punto de reorden
+            models.Index(
+                fields=['branch', 'stock'],
+                condition=LOW_STOCK,
+                name='inventory_low_stock_idx'
+            ),
         ]
     
     def __str__(self):
         return f"{self.product.name} - {self.branch.name} ({self.stock} unidades)"
     
     def needs_reorder(self):
-        """Verifica si el stock está por debajo del punto de reorden"""
+        """
+        Verifica si el stock está por debajo del punto de reorden.
+        Para listar inventarios usar el filtro LOW_STOCK (índice parcial).
+        """
         return self.stock <= self.reorder_point
 
 
+# Signo con que cada tipo de movimiento afecta el stock
+# (los ajustes se interpretan como cambio positivo, igual que antes)
+MOVEMENT_SIGNS = {
+    'entrada': 1,
+    'devolucion': 1,
+    'ajuste': 1,
+    'salida': -1,
+}
+
+
+def movement_delta(movement_type, quantity):
+    """Cambio de stock que produce un movimiento"""
+    return MOVEMENT_SIGNS[movement_type] * quantity
+
+
 class InventoryMovement(models.Model):
     """
     Registra todos los movimientos de inventario (entradas y salidas).
@@ -143,6 +172,14 @@ class InventoryMovement(models.Model):
         help_text='Cantidad movida'
     )
     
+    unit_cost = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        blank=True,
+        null=True,
+        help_text='Costo unitario de la entrada (por defecto el costo promedio o Product.cost)'
+    )
+    
     reference = models.CharField(
         max_length=100,
         blank=True,
@@ -0,0 +1,187 @@
+from django.db import models
+from django.utils import timezone
+
+
+class InventorySyncJob(models.Model):
+    """
+    Trabajo en segundo plano que crea los inventarios faltantes de una empresa.
+    Lo procesa el comando run_inventory_worker (cola respaldada por la base de datos).
+    """
+    STATUS_CHOICES = (
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En Proceso'),
+        ('completado', 'Completado'),
+        ('fallido', 'Fallido'),
+    )
+    
+    company = models.ForeignKey(
+        'Company',
+        on_delete=models.CASCADE,
+        related_name='inventory_sync_jobs'
+    )
+    
+    requested_by = models.ForeignKey(
+        'User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='inventory_sync_jobs'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pendiente'
+    )
+    
+    pairs_total = models.IntegerField(
+        default=0,
+        help_text='Combinaciones (sucursal, producto) a revisar al iniciar'
+    )
+    
+    pairs_scanned = models.IntegerField(
+        default=0,
+        help_text='Combinaciones (sucursal, producto) revisadas'
+    )
+    
+    inventories_created = models.IntegerField(
+        default=0,
+        help_text='Inventarios creados'
+    )
+    
+    error = models.TextField(
+        blank=True,
+        default='',
+        help_text='Detalle del error si el trabajo falló'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Último avance informado por el worker'
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['company', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Sync inventario #{self.id} - {self.get_status_display()}"
+    
+    def elapsed_seconds(self):
+        """Segundos transcurridos desde que el worker tomó el trabajo"""
+        if not self.started_at:
+            return 0
+        end = self.finished_at or timezone.now()
+        return round((end - self.started_at).total_seconds(), 2)
+
+
+class InventorySnapshot(models.Model):
+    """
+    Foto del stock de un inventario en un momento dado. La genera el comando
+    take_inventory_snapshots (diario o semanal) y sirve de punto de partida
+    para calcular el stock a una fecha sin recorrer todos los movimientos.
+    """
+    inventory = models.ForeignKey(
+        'Inventory',
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    
+    snapshot_date = models.DateField(help_text='Día (local) al que corresponde la foto')
+    
+    stock = models.IntegerField(help_text='Stock al momento de la foto')
+    
+    taken_at = models.DateTimeField(help_text='Momento exacto en que se leyó el stock')
+    
+    class Meta:
+        ordering = ['-taken_at']
+        unique_together = ('inventory', 'snapshot_date')
+        indexes = [
+            models.Index(fields=['inventory', '-taken_at'], name='inv_snapshot_taken_idx'),
+            models.Index(fields=['snapshot_date']),
+        ]
+    
+    def __str__(self):
+        return f"Snapshot inventario #{self.inventory_id} {self.snapshot_date} ({self.stock})"
+
+
+class InventoryValuation(models.Model):
+    """
+    Saldo valorizado de un inventario (cantidad y costo total). Se actualiza
+    con cada movimiento (ver valuation_services) y se reconstruye desde el
+    historial con el comando rebuild_inventory_valuation.
+    """
+    inventory = models.OneToOneField(
+        'Inventory',
+        on_delete=models.CASCADE,
+        related_name='valuation'
+    )
+    
+    quantity = models.IntegerField(default=0, help_text='Unidades valorizadas')
+    
+    total_cost = models.DecimalField(
+        max_digits=16,
+        decimal_places=4,
+        default=0,
+        help_text='Costo total del stock'
+    )
+    
+    average_cost = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=0,
+        help_text='Costo unitario promedio'
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Valuación inventario #{self.inventory_id} ({self.quantity} u. / ${self.total_cost})"
+
+
+class InventoryCostLayer(models.Model):
+    """
+    Capa de costo FIFO: unidades de una entrada con su costo unitario.
+    Las salidas consumen las capas más antiguas primero.
+    """
+    inventory = models.ForeignKey(
+        'Inventory',
+        on_delete=models.CASCADE,
+        related_name='cost_layers'
+    )
+    
+    movement = models.ForeignKey(
+        'InventoryMovement',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cost_layers'
+    )
+    
+    quantity = models.IntegerField(help_text='Unidades de la entrada')
+    
+    quantity_remaining = models.IntegerField(help_text='Unidades aún no consumidas')
+    
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+    
+    received_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['received_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['inventory', 'received_at'],
+                condition=models.Q(quantity_remaining__gt=0),
+                name='cost_layer_open_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Capa inventario #{self.inventory_id}: {self.quantity_remaining}/{self.quantity} a ${self.unit_cost}"
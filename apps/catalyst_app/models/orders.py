@@ -207,6 +207,17 @@ class OrderItem(models.Model):
         return f"{self.product.name} x {self.quantity}"
 
 
+# Totales del carro para annotate(**CART_TOTALS): se calculan en la misma
+# consulta de los carros en lugar de recorrer sus items y productos
+CART_TOTALS = {
+    'items_total': models.Sum(
+        models.F('items__quantity') * models.F('items__product__price'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2)
+    ),
+    'items_quantity': models.Sum('items__quantity'),
+}
+
+
 class ShoppingCart(models.Model):
     """
     Carro de compras para usuarios autenticados o sesiones.
@@ -249,8 +260,14 @@ class ShoppingCart(models.Model):
         return f"Carro (sesión: {self.session_key})"
     
     def get_total(self):
-        """Calcula el total del carro"""
-        return sum(item.subtotal for item in self.items.all())
+        """
+        Calcula el total del carro. Usa la anotación CART_TOTALS si existe;
+        si no, lo suma en una sola consulta.
+        """
+        if hasattr(self, 'items_total'):
+            return self.items_total or 0
+        total = ShoppingCart.objects.filter(pk=self.pk).aggregate(total=CART_TOTALS['items_total'])['total']
+        return total or 0
     
     def get_item_count(self):
         """Retorna el número de items únicos en el carro"""
@@ -0,0 +1,227 @@
+from django.db import models
+
+
+ROLLUP_CHANNEL_CHOICES = (
+    ('pos', 'Punto de Venta'),
+    ('ecommerce', 'E-commerce'),
+)
+
+
+class SalesDailyRollup(models.Model):
+    """
+    Acumulado diario de ventas POS y órdenes e-commerce.
+    Se mantiene incrementalmente al escribir Sale/Order (ver signals).
+    """
+    company = models.ForeignKey(
+        'Company',
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+
+    branch = models.ForeignKey(
+        'catalyst_app.Branch',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sales_rollups',
+        help_text='Sucursal (vacío para órdenes e-commerce)'
+    )
+
+    seller = models.ForeignKey(
+        'User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='sales_rollups',
+        help_text='Vendedor (vacío para órdenes e-commerce)'
+    )
+
+    day = models.DateField(
+        help_text='Día de la venta'
+    )
+
+    payment_method = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text='Método de pago (vacío para órdenes e-commerce)'
+    )
+
+    channel = models.CharField(
+        max_length=20,
+        choices=ROLLUP_CHANNEL_CHOICES,
+        default='pos'
+    )
+
+    status = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text='Estado de la orden (vacío para ventas POS)'
+    )
+
+    sales_count = models.IntegerField(
+        default=0,
+        help_text='Cantidad de ventas/órdenes'
+    )
+
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text='Monto total acumulado'
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'branch', 'seller', 'day', 'payment_method', 'channel', 'status'],
+                nulls_distinct=False,
+                name='sales_rollup_unique_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'channel', 'day']),
+            models.Index(fields=['seller', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id} {self.day} ({self.sales_count} ventas)"
+
+
+class ProductSalesDailyRollup(models.Model):
+    """
+    Acumulado diario por producto de items vendidos (POS y e-commerce).
+    """
+    company = models.ForeignKey(
+        'Company',
+        on_delete=models.CASCADE,
+        related_name='product_sales_rollups'
+    )
+
+    branch = models.ForeignKey(
+        'catalyst_app.Branch',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='product_sales_rollups'
+    )
+
+    seller = models.ForeignKey(
+        'User',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='product_sales_rollups'
+    )
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+
+    day = models.DateField()
+
+    channel = models.CharField(
+        max_length=20,
+        choices=ROLLUP_CHANNEL_CHOICES,
+        default='pos'
+    )
+
+    quantity = models.IntegerField(
+        default=0,
+        help_text='Unidades vendidas'
+    )
+
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text='Ingresos (suma de subtotales)'
+    )
+
+    line_count = models.IntegerField(
+        default=0,
+        help_text='Cantidad de líneas de venta/orden'
+    )
+
+    sales_count = models.IntegerField(
+        default=0,
+        help_text='Cantidad de ventas/órdenes distintas que incluyen el producto'
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'branch', 'seller', 'product', 'day', 'channel'],
+                nulls_distinct=False,
+                name='product_sales_rollup_unique_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'channel', 'day']),
+            models.Index(fields=['seller', 'day']),
+            models.Index(fields=['product', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.day} ({self.quantity} unidades)"
+
+
+class ProductPopularity(models.Model):
+    """
+    Ranking precalculado de productos por ventanas móviles (7/30/365 días).
+    Se incrementa al crear items de venta/orden y se recalcula desde
+    ProductSalesDailyRollup una vez por día (ver popularity_services).
+    """
+    company = models.ForeignKey(
+        'Company',
+        on_delete=models.CASCADE,
+        related_name='product_popularity'
+    )
+
+    product = models.ForeignKey(
+        'Product',
+        on_delete=models.CASCADE,
+        related_name='popularity'
+    )
+
+    channel = models.CharField(
+        max_length=20,
+        choices=ROLLUP_CHANNEL_CHOICES,
+        default='pos'
+    )
+
+    units_7d = models.IntegerField(default=0, help_text='Unidades vendidas últimos 7 días')
+    units_30d = models.IntegerField(default=0, help_text='Unidades vendidas últimos 30 días')
+    units_365d = models.IntegerField(default=0, help_text='Unidades vendidas últimos 365 días')
+
+    orders_7d = models.IntegerField(default=0, help_text='Ventas/órdenes últimos 7 días')
+    orders_30d = models.IntegerField(default=0, help_text='Ventas/órdenes últimos 30 días')
+    orders_365d = models.IntegerField(default=0, help_text='Ventas/órdenes últimos 365 días')
+
+    as_of = models.DateField(
+        help_text='Día al que corresponden las ventanas'
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('product', 'channel')
+        indexes = [
+            models.Index(fields=['company', 'channel', '-units_7d'], name='popularity_units_7d_idx'),
+            models.Index(fields=['company', 'channel', '-units_30d'], name='popularity_units_30d_idx'),
+            models.Index(fields=['company', 'channel', '-units_365d'], name='popularity_units_365d_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ({self.channel}) {self.units_30d} unidades/30d"
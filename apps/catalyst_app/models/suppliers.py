@@ -188,6 +188,12 @@ class PurchaseItem(models.Model):
         help_text='Subtotal del item (cantidad x precio)'
     )
     
+    quantity_received = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        help_text='Cantidad ya recibida en el inventario de la sucursal'
+    )
+    
     class Meta:
         ordering = ['product__name']
         indexes = [
@@ -196,3 +202,52 @@ class PurchaseItem(models.Model):
     
     def __str__(self):
         return f"{self.product.name} - {self.quantity} unidades"
+    
+    def quantity_pending(self):
+        """Cantidad que aún falta recibir"""
+        return max(self.quantity - self.quantity_received, 0)
+
+
+class PurchaseReceipt(models.Model):
+    """
+    Recepción (total o parcial) de una compra en el inventario de la sucursal.
+    La clave de idempotencia evita aplicar dos veces la misma recepción
+    cuando el cliente reintenta el request.
+    """
+    purchase = models.ForeignKey(
+        Purchase,
+        on_delete=models.CASCADE,
+        related_name='receipts'
+    )
+    
+    idempotency_key = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text='Clave enviada por el cliente para reintentos seguros'
+    )
+    
+    received_by = models.ForeignKey(
+        'User',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='purchase_receipts'
+    )
+    
+    lines = models.IntegerField(default=0, help_text='Items recibidos')
+    
+    units = models.IntegerField(default=0, help_text='Unidades recibidas')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['purchase', 'idempotency_key'],
+                name='unique_purchase_receipt_key'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Recepción #{self.id} - Compra #{self.purchase_id}"
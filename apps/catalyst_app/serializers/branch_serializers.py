@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from apps.catalyst_app.models import Order, OrderItem, ShoppingCart, CartItem
+from apps.catalyst_app.serializers.mixins import DynamicFieldsMixin
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para items del carrito"""
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_price = serializers.DecimalField(source='product.price', read_only=True, max_digits=10, decimal_places=2)
@@ -13,23 +14,29 @@ class CartItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'added_at', 'updated_at']
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para carrito de compras"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     items = CartItemSerializer(many=True, read_only=True)
     total_items = serializers.SerializerMethodField(read_only=True)
+    total = serializers.DecimalField(source='get_total', read_only=True, max_digits=12, decimal_places=2)
     
     class Meta:
         model = ShoppingCart
-        fields = ['id', 'user', 'user_name', 'items', 'total_items', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'user_name', 'items', 'total_items', 'total', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_total_items(self, obj):
-        """Cantidad total de items en el carrito"""
+        """
+        Cantidad total de items en el carrito. ShoppingCartViewSet la anota en la
+        consulta (CART_TOTALS); sin anotación se suma sobre los items.
+        """
+        if hasattr(obj, 'items_quantity'):
+            return obj.items_quantity or 0
         return sum(item.quantity for item in obj.items.all())
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para items de orden"""
     product_name = serializers.CharField(source='product.name', read_only=True)
     
@@ -39,8 +46,9 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'subtotal']
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    """Serializador para órdenes"""
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador para órdenes (items con ?expand=items)"""
+    expandable_fields = {'items': (OrderItemSerializer, {'many': True})}
     user_name = serializers.CharField(source='user.get_full_name', read_only=True, allow_null=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     payment_status_display = serializers.CharField(source='get_payment_status_display', read_only=True)
@@ -60,9 +68,9 @@ class OrderSerializer(serializers.ModelSerializer):
         return obj.total
 
 
-class OrderDetailSerializer(serializers.ModelSerializer):
-    """Serializador detallado de orden con items"""
-    items = OrderItemSerializer(many=True, read_only=True)
+class OrderDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador detallado de orden (items con ?expand=items)"""
+    expandable_fields = {'items': (OrderItemSerializer, {'many': True})}
     user = serializers.StringRelatedField(read_only=True, allow_null=True)
     company = serializers.StringRelatedField(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
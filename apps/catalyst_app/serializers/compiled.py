@@ -0,0 +1,160 @@
+"""
+COMPILED.PY - Serialización compilada de solo lectura para listados grandes
+Convierte un serializador (ya recortado por ?fields= / ?expand=) en la lista de
+columnas de un .values() y una función fila -> dict con la misma forma JSON que
+to_representation, sin instanciar modelos ni recorrer atributos campo a campo.
+
+Se compilan los campos de columna (también con source='a.b' sobre FK), los ids
+de relaciones y get_<campo>_display. Los campos calculados se declaran en el
+serializador con compiled_sources; si queda algún campo que no se puede
+compilar (anidados, métodos) compile_serializer retorna None y se usa el
+serializador normal.
+
+Ejemplo:
+    compiled_sources = {
+        'stock': 'total_stock',
+        'user_name': (('user__first_name', 'user__last_name'), full_name),
+    }
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField, ManyRelatedField
+
+
+# Una entrada por serializador y combinación de campos (?fields=)
+COMPILED_CACHE_SIZE = 512
+
+_compiled = {}
+
+_MISSING = object()
+
+
+def full_name(first_name, last_name):
+    """Mismo resultado que User.get_full_name() a partir de sus columnas"""
+    return f'{first_name} {last_name}'.strip()
+
+
+class CompiledSerializer:
+    """Columnas para .values() y conversión de esas filas a dicts"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.columns = sorted({
+            column for _, columns, relations, _, _ in entries for column in columns + relations
+        })
+
+    def values(self, queryset):
+        """Queryset de filas planas con las columnas que necesitan los campos"""
+        return queryset.select_related(None).prefetch_related(None).values(*self.columns)
+
+    def to_representation(self, rows):
+        entries = self.entries
+        data = []
+        for row in rows:
+            item = {}
+            for name, columns, relations, convert, missing in entries:
+                # Relación nula en el camino de source='a.b' (ver Field.get_attribute)
+                if relations and any(row[relation] is None for relation in relations):
+                    if missing is not _MISSING:
+                        item[name] = missing
+                    continue
+                item[name] = convert(*[row[column] for column in columns])
+            data.append(item)
+        return data
+
+
+def _relations(model, attrs):
+    """
+    Recorre los FK de source (a.b.c -> a, a__b) y retorna (modelo final, FK).
+    None si algún paso no es una relación directa.
+    """
+    path, relations = [], []
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not (field.many_to_one or field.one_to_one) or not field.concrete:
+            return None
+        path.append(attr)
+        relations.append('__'.join(path))
+        model = field.related_model
+    return model, relations
+
+
+def _value_converter(field):
+    """Formato de salida del campo para un valor no nulo"""
+    if isinstance(field, serializers.SerializerMethodField):
+        # El valor ya viene calculado (compiled_sources)
+        return lambda value: value
+    to_representation = field.to_representation
+
+    def convert(value):
+        return None if value is None else to_representation(value)
+    return convert
+
+
+def _compile_field(model, name, field, compiled_sources):
+    """(nombre, columnas, FK del camino, conversión, valor si falta la relación) o None"""
+    if field.default is not empty:
+        return None
+    missing = None if field.allow_null else _MISSING
+
+    walk = _relations(model, field.source_attrs[:-1]) if field.source_attrs else (model, [])
+    related_model, relations = walk if walk is not None else (None, [])
+
+    if name in compiled_sources:
+        source = compiled_sources[name]
+        if isinstance(source, str):
+            return name, [source], relations, _value_converter(field), missing
+        columns, function = source
+        convert = _value_converter(field)
+        return name, list(columns), relations, lambda *values: convert(function(*values)), missing
+
+    if walk is None or not field.source_attrs:
+        return None
+    if isinstance(field, (serializers.BaseSerializer, ManyRelatedField)):
+        return None
+    if isinstance(field, RelatedField) and not (
+        isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None
+    ):
+        return None
+
+    prefix = field.source_attrs[:-1]
+    attr = field.source_attrs[-1]
+    display = re.fullmatch(r'get_(\w+)_display', attr)
+    try:
+        model_field = related_model._meta.get_field(display.group(1) if display else attr)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    column = '__'.join(prefix + [model_field.name])
+
+    if isinstance(field, PrimaryKeyRelatedField):
+        return name, [column], relations, lambda value: value, missing
+    if display:
+        choices = dict(model_field.flatchoices)
+        convert = _value_converter(field)
+        return name, [column], relations, lambda value: convert(choices.get(value, value)), missing
+    return name, [column], relations, _value_converter(field), missing
+
+
+def compile_serializer(serializer):
+    """
+    Compila los campos legibles del serializador. Retorna CompiledSerializer o
+    None si algún campo no se puede compilar. Se cachea por clase y campos.
+    """
+    fields = [field for field in serializer.fields.values() if not field.write_only]
+    key = (type(serializer), tuple(field.field_name for field in fields))
+    if key not in _compiled:
+        if len(_compiled) >= COMPILED_CACHE_SIZE:
+            _compiled.clear()
+        model = serializer.Meta.model
+        compiled_sources = getattr(serializer, 'compiled_sources', {})
+        entries = [_compile_field(model, field.field_name, field, compiled_sources) for field in fields]
+        _compiled[key] = None if None in entries else CompiledSerializer(entries)
+    return _compiled[key]
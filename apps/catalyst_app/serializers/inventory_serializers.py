@@ -1,22 +1,71 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.db import models
-from apps.catalyst_app.models import Branch, Inventory, InventoryMovement
+from apps.catalyst_app.models import Branch, Inventory, InventoryMovement, InventorySyncJob
+from apps.catalyst_app.serializers.compiled import full_name
+from apps.catalyst_app.serializers.mixins import DynamicFieldsMixin
 
 
-class InventoryMovementSerializer(serializers.ModelSerializer):
+class InventoryMovementSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para movimientos de inventario"""
+    compiled_sources = {'user_name': (('user__first_name', 'user__last_name'), full_name)}
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     product_name = serializers.CharField(source='inventory.product.name', read_only=True)
     branch_name = serializers.CharField(source='inventory.branch.name', read_only=True)
     
     class Meta:
         model = InventoryMovement
-        fields = ['id', 'inventory', 'movement_type', 'quantity', 'reference', 'notes', 
+        fields = ['id', 'inventory', 'movement_type', 'quantity', 'unit_cost', 'reference', 'notes', 
                   'user', 'user_name', 'product_name', 'branch_name', 'created_at']
         read_only_fields = ['id', 'user', 'user_name', 'product_name', 'branch_name', 'created_at']
 
 
-class InventorySerializer(serializers.ModelSerializer):
+class InventoryMovementItemSerializer(serializers.Serializer):
+    """Movimiento dentro de una carga masiva (el inventario se valida por lote)"""
+    inventory = serializers.IntegerField(min_value=1)
+    movement_type = serializers.ChoiceField(choices=InventoryMovement.MOVEMENT_TYPE_CHOICES)
+    quantity = serializers.IntegerField(min_value=1)
+    unit_cost = serializers.DecimalField(
+        max_digits=14, decimal_places=4, min_value=0, required=False, allow_null=True
+    )
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class InventoryMovementBulkSerializer(serializers.Serializer):
+    """Carga masiva de movimientos de inventario"""
+    movements = InventoryMovementItemSerializer(
+        many=True, allow_empty=False, max_length=settings.BULK_MOVEMENTS_MAX_ITEMS
+    )
+    partial = serializers.BooleanField(
+        default=False,
+        help_text='Si es verdadero se aplican los movimientos válidos y se informan los rechazados'
+    )
+
+
+class InventoryTransferLineSerializer(serializers.Serializer):
+    """Línea de una transferencia entre sucursales"""
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class InventoryTransferSerializer(serializers.Serializer):
+    """Transferencia de stock de una sucursal a otra"""
+    source_branch = serializers.IntegerField(min_value=1)
+    destination_branch = serializers.IntegerField(min_value=1)
+    lines = InventoryTransferLineSerializer(
+        many=True, allow_empty=False, max_length=settings.BULK_MOVEMENTS_MAX_ITEMS
+    )
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    notes = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if data['source_branch'] == data['destination_branch']:
+            raise serializers.ValidationError('La sucursal de origen y destino deben ser distintas')
+        return data
+
+
+class InventorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para inventario"""
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_code = serializers.CharField(source='product.sku', read_only=True)
@@ -29,7 +78,7 @@ class InventorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class BranchSerializer(serializers.ModelSerializer):
+class BranchSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para sucursales"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     manager_name = serializers.CharField(source='manager.get_full_name', read_only=True, allow_null=True)
@@ -42,16 +91,53 @@ class BranchSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'company', 'created_at', 'updated_at', 'manager_name']
     
     def get_inventory_count(self, obj):
-        """Retorna cantidad de items en inventario"""
+        """
+        Retorna cantidad de items en inventario. BranchViewSet la anota en la
+        consulta (inventory_total); sin anotación se cuenta aparte.
+        """
+        if hasattr(obj, 'inventory_total'):
+            return obj.inventory_total
         return obj.inventory.count()
 
 
-class BranchDetailSerializer(serializers.ModelSerializer):
-    """Serializador detallado de sucursal con inventarios"""
+class BranchDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializador detallado de sucursal. El inventario se consulta paginado en
+    /branches/<id>/inventory/ (inventory_url) en lugar de anidarse completo.
+    """
     company = serializers.StringRelatedField(read_only=True)
-    inventory = InventorySerializer(read_only=True, many=True)
     manager = serializers.StringRelatedField(read_only=True)
+    inventory_count = serializers.SerializerMethodField(read_only=True)
+    inventory_url = serializers.HyperlinkedIdentityField(
+        view_name='catalyst_app:branch-inventory', read_only=True
+    )
     
     class Meta:
         model = Branch
         fields = '__all__'
+    
+    def get_inventory_count(self, obj):
+        """Cantidad de items en inventario (anotada por BranchViewSet)"""
+        if hasattr(obj, 'inventory_total'):
+            return obj.inventory_total
+        return obj.inventory.count()
+
+
+class InventorySyncJobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador para el avance de una sincronización de inventario"""
+    elapsed_seconds = serializers.FloatField(read_only=True)
+    progress = serializers.SerializerMethodField(read_only=True)
+    
+    class Meta:
+        model = InventorySyncJob
+        fields = ['id', 'status', 'pairs_total', 'pairs_scanned', 'inventories_created',
+                  'progress', 'elapsed_seconds', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+    
+    def get_progress(self, obj) -> float:
+        """Porcentaje de combinaciones revisadas"""
+        if obj.status == 'completado':
+            return 100.0
+        if not obj.pairs_total:
+            return 0.0
+        return round(min(obj.pairs_scanned / obj.pairs_total, 1) * 100, 1)
@@ -0,0 +1,43 @@
+"""
+MIXINS.PY - Mixins compartidos por los serializadores
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_names(request, param):
+    """Nombres separados por coma de un parámetro de la URL (?fields=a,b)"""
+    value = request.query_params.get(param) if request is not None else None
+    if not value:
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class DynamicFieldsMixin:
+    """
+    Respuestas a medida en las lecturas (GET) de la API:
+    - ?fields=id,total limita la respuesta a esos campos.
+    - ?expand=items,supplier anida las relaciones de expandable_fields, que
+      por defecto no se incluyen (o se muestran solo como id).
+    Solo aplica al serializador principal de la vista, no a los anidados.
+
+    Ejemplo:
+        expandable_fields = {'items': (SaleItemSerializer, {'many': True})}
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        expand = [name for name in requested_names(request, 'expand') if name in self.expandable_fields]
+        for name in expand:
+            serializer_class, options = self.expandable_fields[name]
+            self.fields[name] = serializer_class(read_only=True, **options)
+
+        fields = requested_names(request, 'fields')
+        if fields:
+            keep = set(fields) | set(expand)
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
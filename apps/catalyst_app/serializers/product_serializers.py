@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from django.db import models
 from apps.catalyst_app.models import Product
+from apps.catalyst_app.serializers.mixins import DynamicFieldsMixin
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para productos"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     margin = serializers.SerializerMethodField(read_only=True)
@@ -19,8 +20,9 @@ class ProductSerializer(serializers.ModelSerializer):
         return obj.get_margin()
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador simplificado para listado de productos"""
+    compiled_sources = {'stock': 'total_stock'}
     stock = serializers.SerializerMethodField(read_only=True)
     
     class Meta:
@@ -29,11 +31,16 @@ class ProductListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def get_stock(self, obj):
-        """Suma el stock total de todos los inventarios del producto"""
+        """
+        Stock total del producto. El listado lo anota en la consulta principal
+        (total_stock, ver ProductViewSet); sin anotación se suma aparte.
+        """
+        if hasattr(obj, 'total_stock'):
+            return obj.total_stock
         return obj.inventory.aggregate(total=models.Sum('stock'))['total'] or 0
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador detallado con información de empresa"""
     company = serializers.StringRelatedField(read_only=True)
     margin = serializers.SerializerMethodField(read_only=True)
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from apps.catalyst_app.models import Sale, SaleItem
+from apps.catalyst_app.serializers.compiled import full_name
+from apps.catalyst_app.serializers.mixins import DynamicFieldsMixin
 
 
-class SaleItemSerializer(serializers.ModelSerializer):
+class SaleItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para items de venta"""
     product_name = serializers.CharField(source='product.name', read_only=True)
     
@@ -12,8 +14,10 @@ class SaleItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'subtotal']
 
 
-class SaleSerializer(serializers.ModelSerializer):
-    """Serializador para ventas"""
+class SaleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador para ventas (items con ?expand=items)"""
+    expandable_fields = {'items': (SaleItemSerializer, {'many': True})}
+    compiled_sources = {'seller_name': (('seller__first_name', 'seller__last_name'), full_name)}
     seller_name = serializers.CharField(source='seller.get_full_name', read_only=True)
     branch_name = serializers.CharField(source='branch.name', read_only=True)
     payment_method_display = serializers.CharField(source='get_payment_method_display', read_only=True)
@@ -26,9 +30,9 @@ class SaleSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class SaleDetailSerializer(serializers.ModelSerializer):
-    """Serializador detallado de venta con items"""
-    items = SaleItemSerializer(many=True, read_only=True)
+class SaleDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador detallado de venta (items con ?expand=items)"""
+    expandable_fields = {'items': (SaleItemSerializer, {'many': True})}
     seller = serializers.StringRelatedField(read_only=True)
     branch = serializers.StringRelatedField(read_only=True)
     payment_method_display = serializers.CharField(source='get_payment_method_display', read_only=True)
@@ -36,3 +40,33 @@ class SaleDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sale
         fields = '__all__'
+
+
+class CheckoutSaleSerializer(SaleDetailSerializer):
+    """Venta registrada por el checkout POS (siempre con sus items)"""
+    items = SaleItemSerializer(many=True, read_only=True)
+
+
+class CheckoutItemSerializer(serializers.Serializer):
+    """Línea del carro del POS (el precio se toma del producto)"""
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CheckoutPaymentSerializer(serializers.Serializer):
+    """Pago del checkout POS"""
+    payment_method = serializers.ChoiceField(choices=Sale.PAYMENT_METHOD_CHOICES)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Venta POS completa: carro, pagos y datos del comprobante"""
+    branch = serializers.IntegerField(min_value=1)
+    items = CheckoutItemSerializer(many=True, allow_empty=False, max_length=500)
+    payments = CheckoutPaymentSerializer(many=True, allow_empty=False, max_length=10)
+    discount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, default=0)
+    receipt_number = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    customer_name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    customer_rut = serializers.CharField(max_length=12, required=False, allow_blank=True)
+    notes = serializers.CharField(required=False, allow_blank=True)
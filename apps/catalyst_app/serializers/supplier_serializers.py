@@ -1,8 +1,9 @@
 from rest_framework import serializers
-from apps.catalyst_app.models import Supplier, Purchase, PurchaseItem
+from apps.catalyst_app.models import Supplier, Purchase, PurchaseItem, PurchaseReceipt
+from apps.catalyst_app.serializers.mixins import DynamicFieldsMixin
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para proveedores"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     
@@ -13,18 +14,23 @@ class SupplierSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'company', 'created_at', 'updated_at']
 
 
-class PurchaseItemSerializer(serializers.ModelSerializer):
+class PurchaseItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para items de compra"""
     product_name = serializers.CharField(source='product.name', read_only=True)
     
     class Meta:
         model = PurchaseItem
-        fields = ['id', 'purchase', 'product', 'product_name', 'quantity', 'unit_price', 'subtotal']
-        read_only_fields = ['id', 'subtotal']
+        fields = ['id', 'purchase', 'product', 'product_name', 'quantity', 'unit_price', 'subtotal',
+                  'quantity_received']
+        read_only_fields = ['id', 'subtotal', 'quantity_received']
 
 
-class PurchaseSerializer(serializers.ModelSerializer):
-    """Serializador para compras"""
+class PurchaseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador para compras (?expand=items,supplier)"""
+    expandable_fields = {
+        'items': (PurchaseItemSerializer, {'many': True}),
+        'supplier': (SupplierSerializer, {}),
+    }
     supplier_name = serializers.CharField(source='supplier.name', read_only=True)
     branch_name = serializers.CharField(source='branch.name', read_only=True, allow_null=True)
     payment_status_display = serializers.CharField(source='get_payment_status_display', read_only=True)
@@ -37,12 +43,43 @@ class PurchaseSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class PurchaseDetailSerializer(serializers.ModelSerializer):
-    """Serializador detallado de compra con items"""
-    items = PurchaseItemSerializer(many=True, read_only=True)
-    supplier = SupplierSerializer(read_only=True)
+class PurchaseDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador detallado de compra (?expand=items,supplier)"""
+    expandable_fields = {
+        'items': (PurchaseItemSerializer, {'many': True}),
+        'supplier': (SupplierSerializer, {}),
+    }
     payment_status_display = serializers.CharField(source='get_payment_status_display', read_only=True)
     
     class Meta:
         model = Purchase
         fields = '__all__'
+
+
+class PurchaseReceiptSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador para recepciones de compra"""
+    received_by_name = serializers.CharField(source='received_by.get_full_name', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = PurchaseReceipt
+        fields = ['id', 'purchase', 'idempotency_key', 'received_by', 'received_by_name',
+                  'lines', 'units', 'created_at']
+        read_only_fields = fields
+
+
+class PurchaseReceiveLineSerializer(serializers.Serializer):
+    """Cantidad a recibir de un item de la compra"""
+    item = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class PurchaseReceiveSerializer(serializers.Serializer):
+    """Recepción de una compra: sin items se recibe todo lo pendiente"""
+    items = PurchaseReceiveLineSerializer(many=True, required=False, allow_empty=False, max_length=5000)
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_blank=True)
+    
+    def validate_items(self, value):
+        quantities = {}
+        for line in value:
+            quantities[line['item']] = quantities.get(line['item'], 0) + line['quantity']
+        return quantities
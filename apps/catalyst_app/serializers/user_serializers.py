@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from apps.catalyst_app.models import User, Company, Subscription
+from apps.catalyst_app.serializers.mixins import DynamicFieldsMixin
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para la empresa"""
     
     class Meta:
@@ -11,7 +12,7 @@ class CompanySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para suscripción/plan"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     plan_display = serializers.CharField(source='get_plan_name_display', read_only=True)
@@ -23,8 +24,9 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class UserSerializer(serializers.ModelSerializer):
-    """Serializador básico para usuario"""
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador básico para usuario (empresa completa con ?expand=company)"""
+    expandable_fields = {'company': (CompanySerializer, {})}
     company_name = serializers.CharField(source='company.name', read_only=True)
     role_display = serializers.CharField(source='get_role_display', read_only=True)
     
@@ -35,7 +37,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class UserCreateSerializer(serializers.ModelSerializer):
+class UserCreateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializador para crear usuarios con password"""
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True, min_length=8)
@@ -59,9 +61,9 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
-    """Serializador detallado para usuario con información adicional"""
-    company = CompanySerializer(read_only=True)
+class UserDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializador detallado para usuario (empresa completa con ?expand=company)"""
+    expandable_fields = {'company': (CompanySerializer, {})}
     role_display = serializers.CharField(source='get_role_display', read_only=True)
     
     class Meta:
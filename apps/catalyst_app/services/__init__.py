@@ -0,0 +1 @@
+"""Services module for catalyst_app"""
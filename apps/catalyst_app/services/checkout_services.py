@@ -0,0 +1,152 @@
+"""
+CHECKOUT_SERVICES.PY - Venta POS completa en una sola transacción
+Registra la venta, sus items y pagos con bulk_create y descuenta el stock de
+la sucursal con las salidas de inventario correspondientes (referencia = nº de
+comprobante). Si algo falla no queda nada escrito.
+"""
+import uuid
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.catalyst_app.models import Branch, Product, Inventory, Sale, SaleItem, Payment
+from apps.catalyst_app.services import rollup_services, popularity_services
+from apps.catalyst_app.services.inventory_services import apply_movements_bulk
+
+
+# IVA chileno 19% (mismo criterio que Sale.calculate_totals)
+TAX_RATE = Decimal('0.19')
+
+CENTS = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _receipt_number(branch_id):
+    return f'POS-{branch_id}-{timezone.localtime():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6].upper()}'
+
+
+def _sale_payment_method(payments):
+    """Método de la venta: el de los pagos si es uno solo, 'otro' si es mixto"""
+    methods = {payment['payment_method'] for payment in payments}
+    return methods.pop() if len(methods) == 1 else 'otro'
+
+
+def checkout(user, branch_id, items, payments, discount=Decimal('0'), receipt_number=None,
+             customer_name=None, customer_rut=None, notes=None):
+    """
+    Registra una venta POS completa. items: [{product, quantity}] (precio del
+    producto); payments: [{payment_method, amount, reference}]. Los pagos deben
+    cubrir el total; el exceso solo se acepta en efectivo y se retorna como vuelto.
+
+    Lanza ValidationError si la sucursal, los montos o el comprobante no son
+    válidos. Retorna (venta, vuelto, errores [{'index', 'error'}] por item);
+    con errores (producto inexistente o sin stock) no se registra nada.
+    """
+    company_id = user.company_id
+    if not Branch.objects.filter(pk=branch_id, company_id=company_id).exists():
+        raise ValidationError({'branch': 'Sucursal no encontrada'})
+
+    products = Product.objects.filter(
+        company_id=company_id, is_active=True, pk__in={item['product'] for item in items}
+    ).in_bulk()
+    errors = [
+        {'index': index, 'error': 'Producto no encontrado'}
+        for index, item in enumerate(items) if item['product'] not in products
+    ]
+    if errors:
+        return None, None, errors
+
+    # Totales en Decimal
+    lines = [
+        (item['product'], item['quantity'], products[item['product']].price,
+         _money(products[item['product']].price * item['quantity']))
+        for item in items
+    ]
+    subtotal = sum((line[3] for line in lines), Decimal('0'))
+    tax = _money(subtotal * TAX_RATE)
+    discount = _money(discount)
+    if discount > subtotal + tax:
+        raise ValidationError({'discount': 'El descuento no puede superar el total'})
+    total = subtotal + tax - discount
+
+    paid = sum((_money(payment['amount']) for payment in payments), Decimal('0'))
+    if paid < total:
+        raise ValidationError({'payments': f'Los pagos ({paid}) no cubren el total ({total})'})
+    change = paid - total
+    cash = [payment for payment in payments if payment['payment_method'] == 'efectivo']
+    if change and sum((_money(payment['amount']) for payment in cash), Decimal('0')) < change:
+        raise ValidationError({'payments': 'Solo los pagos en efectivo pueden exceder el total'})
+
+    receipt_number = receipt_number or _receipt_number(branch_id)
+
+    try:
+        with transaction.atomic():
+            inventory_ids = dict(
+                Inventory.objects.filter(
+                    branch_id=branch_id, product_id__in=products
+                ).values_list('product_id', 'pk')
+            )
+            _, errors = apply_movements_bulk(company_id, user, [
+                {
+                    'inventory': inventory_ids.get(product_id, 0),
+                    'movement_type': 'salida',
+                    'quantity': quantity,
+                    'reference': receipt_number,
+                    'notes': 'Venta POS',
+                }
+                for product_id, quantity, _, _ in lines
+            ])
+            if errors:
+                # apply_movements_bulk no escribe nada cuando hay errores
+                return None, None, errors
+
+            sale = Sale.objects.create(
+                branch_id=branch_id,
+                seller=user,
+                receipt_number=receipt_number,
+                customer_name=customer_name or None,
+                customer_rut=customer_rut or None,
+                subtotal=subtotal,
+                tax=tax,
+                discount=discount,
+                total=total,
+                payment_method=_sale_payment_method(payments),
+                reference=payments[0].get('reference') or None,
+                notes=notes or None,
+            )
+            SaleItem.objects.bulk_create([
+                SaleItem(sale=sale, product_id=product_id, quantity=quantity,
+                         unit_price=unit_price, subtotal=line_total)
+                for product_id, quantity, unit_price, line_total in lines
+            ])
+
+            # El vuelto se descuenta de los pagos en efectivo
+            pending_change = change
+            payment_rows = []
+            for payment in payments:
+                amount = _money(payment['amount'])
+                if pending_change and payment['payment_method'] == 'efectivo':
+                    returned = min(amount, pending_change)
+                    amount -= returned
+                    pending_change -= returned
+                payment_rows.append(Payment(
+                    sale=sale, amount=amount, payment_method=payment['payment_method'],
+                    reference=payment.get('reference') or None
+                ))
+            Payment.objects.bulk_create(payment_rows)
+
+            # bulk_create no dispara signals: actualizar acumulados y ranking
+            state = rollup_services.sale_state(sale)
+            rollup_services.apply_items_bulk(state, [(line[0], line[1], line[3]) for line in lines])
+            popularity_services.record_items(state, [(line[0], line[1]) for line in lines])
+    except IntegrityError:
+        if Sale.objects.filter(receipt_number=receipt_number).exists():
+            raise ValidationError({'receipt_number': 'Ya existe una venta con este comprobante'})
+        raise
+
+    return sale, change, []
@@ -0,0 +1,237 @@
+"""
+DASHBOARD_SERVICES.PY - Métricas del dashboard admin cacheadas por empresa
+Las métricas se guardan en el cache de Django junto con la versión de datos
+de la empresa. Los signals de escritura incrementan la versión y descartan la
+entrada, de modo que un dashboard sin cambios cuesta una sola lectura de cache.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from django.utils import timezone
+from datetime import timedelta
+
+from apps.catalyst_app.models import (
+    User, Product, Branch, Inventory, Order, OrderItem, Sale,
+    SalesDailyRollup
+)
+from apps.catalyst_app.services import popularity_services
+from apps.catalyst_app.services.fanout_services import run_parallel
+
+
+# Se incrementa cuando cambia la forma de las métricas cacheadas
+METRICS_SCHEMA_VERSION = 2
+
+ORDER_STATUS_LABELS = {
+    'pendiente': 'Pendientes',
+    'confirmada': 'Confirmadas',
+    'preparando': 'Preparando',
+    'enviada': 'Enviadas',
+    'entregada': 'Entregadas',
+    'cancelada': 'Canceladas'
+}
+
+
+def _version_key(company_id):
+    return f'catalyst:tenant:{company_id}:data-version'
+
+
+def _metrics_key(company_id):
+    return f'catalyst:dashboard:admin:v{METRICS_SCHEMA_VERSION}:{company_id}'
+
+
+def tenant_version(company_id):
+    """
+    Versión actual de los datos de la empresa. Si el cache la perdió se
+    reinicia con un valor basado en el tiempo para no repetir versiones.
+    """
+    key = _version_key(company_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(company_id):
+    key = _version_key(company_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    cache.delete(_metrics_key(company_id))
+
+
+def bump_tenant_version(company_id):
+    """
+    Invalida las métricas cacheadas de la empresa. Se aplica al confirmar la
+    transacción para que ningún lector cachee datos aún no confirmados.
+    """
+    if company_id is None:
+        return
+    transaction.on_commit(lambda: _bump(company_id))
+
+
+def summary_etag(company_id, version):
+    """
+    ETag fuerte del resumen del dashboard para una versión de datos.
+    Incluye el día porque las ventas del día cambian al pasar la medianoche.
+    """
+    return f'"dashboard-{company_id}-v{METRICS_SCHEMA_VERSION}-{version}-{timezone.localdate():%Y%m%d}"'
+
+
+def company_id_for(instance):
+    """Empresa dueña de una instancia que afecta las métricas del dashboard"""
+    if isinstance(instance, (Inventory, Sale)):
+        if type(instance)._meta.get_field('branch').is_cached(instance):
+            return instance.branch.company_id
+        return Branch.objects.filter(pk=instance.branch_id).values_list('company_id', flat=True).first()
+    if isinstance(instance, OrderItem):
+        if OrderItem._meta.get_field('order').is_cached(instance):
+            return instance.order.company_id
+        return Order.objects.filter(pk=instance.order_id).values_list('company_id', flat=True).first()
+    return getattr(instance, 'company_id', None)
+
+
+def compute_admin_metrics(company):
+    """
+    Calcula las métricas del dashboard admin desde la base de datos.
+    Las consultas son independientes y se ejecutan en paralelo (ver fanout_services).
+    """
+    # Acumulados diarios de órdenes e-commerce
+    order_rollups = SalesDailyRollup.objects.filter(company=company, channel='ecommerce')
+    today = timezone.localdate()
+    seven_days_ago = today - timedelta(days=7)
+
+    results = run_parallel({
+        # Totales y activos en una sola consulta por tabla
+        'products': lambda: Product.objects.filter(company=company).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True))
+        ),
+        'users': lambda: User.objects.filter(company=company).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True))
+        ),
+        'branch_count': Branch.objects.filter(company=company).count,
+        # Contar órdenes y total de ventas en una sola consulta
+        'order_totals': lambda: order_rollups.aggregate(
+            order_count=Sum('sales_count'),
+            pending_orders=Sum('sales_count', filter=Q(status__in=['pendiente', 'preparando'])),
+            new_orders=Sum('sales_count', filter=Q(status='pendiente')),
+            sales_total=Sum('total_amount', filter=Q(status='entregada'))
+        ),
+        # Ventas POS del día
+        'today_pos': lambda: SalesDailyRollup.objects.filter(
+            company=company,
+            channel='pos',
+            day=today
+        ).aggregate(total=Sum('total_amount')),
+        # Total inventario
+        'inventory': lambda: Inventory.objects.filter(
+            branch__company=company
+        ).aggregate(total=Sum('stock')),
+        # Gráfico de ventas (últimos 7 días)
+        'sales_by_date': order_rollups.filter(
+            status='entregada',
+            day__gte=seven_days_ago
+        ).values('day').annotate(
+            amount=Sum('total_amount')
+        ).filter(amount__gt=0).order_by('day'),
+        # Top 5 productos (ranking precalculado de órdenes e-commerce del último año)
+        'products_top': lambda: popularity_services.top_products(
+            company.id, window=365, channel='ecommerce', limit=5, by='orders'
+        ),
+        # Estado de órdenes
+        'orders_status': order_rollups.values('status').annotate(
+            count=Sum('sales_count')
+        ).filter(count__gt=0).order_by('status'),
+        # Ingresos por sucursal (simplificado - top 5 sucursales por ID)
+        'top_branches': Branch.objects.filter(
+            company=company,
+            is_active=True
+        ).order_by('-created_at').values_list('name', flat=True)[:5],
+    })
+
+    order_totals = results['order_totals']
+    return {
+        'product_count': results['products']['total'],
+        'active_product_count': results['products']['active'],
+        'user_count': results['users']['total'],
+        'active_user_count': results['users']['active'],
+        'branch_count': results['branch_count'],
+        'order_count': order_totals['order_count'] or 0,
+        # Pendientes + en preparación
+        'pending_orders': order_totals['pending_orders'] or 0,
+        # Solo estado 'pendiente'
+        'new_orders': order_totals['new_orders'] or 0,
+        # E-commerce entregado (histórico)
+        'total_sales': order_totals['sales_total'] or 0,
+        'today_pos_sales': results['today_pos']['total'] or 0,
+        'total_inventory': results['inventory']['total'] or 0,
+        'sales_data': [
+            {'date': item['day'].strftime('%a'), 'amount': float(item['amount'] or 0)}
+            for item in results['sales_by_date']
+        ],
+        'products_data': [
+            {'name': prod['product__name'], 'sales': prod['orders']}
+            for prod in results['products_top']
+        ],
+        'orders_data': [
+            {'status': ORDER_STATUS_LABELS.get(row['status'], row['status']), 'count': row['count']}
+            for row in results['orders_status']
+        ],
+        'branches_data': [
+            {'name': name, 'revenue': 0.0}  # Simulado: sin órdenes asociadas directamente
+            for name in results['top_branches']
+        ],
+    }
+
+
+def empty_admin_metrics():
+    """Métricas en cero para usuarios sin empresa asignada"""
+    return {
+        'product_count': 0,
+        'active_product_count': 0,
+        'user_count': 0,
+        'active_user_count': 0,
+        'branch_count': 0,
+        'order_count': 0,
+        'pending_orders': 0,
+        'new_orders': 0,
+        'total_sales': 0,
+        'today_pos_sales': 0,
+        'total_inventory': 0,
+        'sales_data': [],
+        'products_data': [],
+        'orders_data': [],
+        'branches_data': [],
+    }
+
+
+def get_admin_metrics(company):
+    """
+    Retorna (versión, métricas) del dashboard admin de la empresa.
+    Con la entrada vigente en cache cuesta una sola lectura.
+    Sin empresa (p. ej. super_admin sin asignar) retorna métricas en cero sin cachear.
+    """
+    if company is None:
+        return None, empty_admin_metrics()
+
+    key = _metrics_key(company.id)
+    today = timezone.localdate()
+    entry = cache.get(key)
+    # Las ventas del día se recalculan al cambiar de día
+    if entry is not None and entry.get('day') == today:
+        return entry['version'], entry['metrics']
+
+    version = tenant_version(company.id)
+    metrics = compute_admin_metrics(company)
+    cache.set(key, {'version': version, 'day': today, 'metrics': metrics}, settings.DASHBOARD_CACHE_TIMEOUT)
+
+    # Si hubo escrituras mientras se calculaba, no dejar la entrada cacheada
+    if tenant_version(company.id) != version:
+        cache.delete(key)
+    return version, metrics
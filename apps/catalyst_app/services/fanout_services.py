@@ -0,0 +1,60 @@
+"""
+FANOUT_SERVICES.PY - Ejecución concurrente de consultas independientes
+Cada llamada a run_parallel usa su propio pool acotado por
+settings.QUERY_FANOUT_MAX_WORKERS, de modo que un dashboard lento no ocupa los
+hilos de otros requests. Cada hilo abre su conexión a la base de datos y la
+cierra al terminar su tarea. La latencia total pasa a ser aproximadamente la de
+la consulta más lenta.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models.query import QuerySet
+from django.utils import timezone, translation
+
+
+_worker = threading.local()
+
+
+def _evaluate(task):
+    if isinstance(task, QuerySet):
+        return list(task)
+    return task()
+
+
+def _run_in_thread(task, tzinfo, language):
+    """Ejecuta la tarea con la zona horaria e idioma del request y cierra las conexiones del hilo"""
+    _worker.active = True
+    timezone.activate(tzinfo)
+    translation.activate(language)
+    try:
+        return _evaluate(task)
+    finally:
+        _worker.active = False
+        connections.close_all()
+
+
+def run_parallel(tasks):
+    """
+    Ejecuta tareas independientes y retorna {nombre: resultado}.
+
+    tasks: dict nombre -> QuerySet (se evalúa con list()) o función sin argumentos.
+
+    Se ejecutan en serie con QUERY_FANOUT_MAX_WORKERS <= 1, dentro de una
+    transacción (otras conexiones no verían los cambios aún no confirmados) o
+    si se llama desde una tarea concurrente (para no multiplicar hilos y conexiones).
+    """
+    workers = min(settings.QUERY_FANOUT_MAX_WORKERS, len(tasks))
+    if workers <= 1 or connection.in_atomic_block or getattr(_worker, 'active', False):
+        return {name: _evaluate(task) for name, task in tasks.items()}
+
+    tzinfo = timezone.get_current_timezone()
+    language = translation.get_language()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query-fanout') as executor:
+        futures = {
+            name: executor.submit(_run_in_thread, task, tzinfo, language)
+            for name, task in tasks.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,371 @@
+"""
+INVENTORY_SERVICES.PY - Aprovisionamiento de registros de inventario
+Crea los registros faltantes de (sucursal, producto) por lotes: por cada lote
+de productos se leen los pares existentes con una consulta y se insertan los
+faltantes con un bulk_create, en lugar de un get_or_create por par.
+Las sincronizaciones completas se encolan como InventorySyncJob y las procesa
+el comando run_inventory_worker. Los movimientos de stock se aplican con
+UPDATE condicionales (F-expressions) para no perder actualizaciones concurrentes.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Case, When, Value, IntegerField
+from django.utils import timezone
+
+from apps.catalyst_app.models import (
+    Company, Branch, Product, Inventory, InventoryMovement, InventorySyncJob
+)
+from apps.catalyst_app.models.branch import movement_delta
+from apps.catalyst_app.exceptions import InsufficientStock
+from apps.catalyst_app.services import valuation_services
+from apps.catalyst_app.services.dashboard_services import bump_tenant_version
+
+logger = logging.getLogger(__name__)
+
+
+PROVISION_BATCH_SIZE = 1000
+
+DEFAULT_STOCK = 0
+DEFAULT_REORDER_POINT = 10
+
+
+def _product_id_batches(company_id, product_ids, batch_size):
+    """Lotes de IDs de producto; sin product_ids recorre la empresa por keyset"""
+    if product_ids is not None:
+        product_ids = sorted(product_ids)
+        for start in range(0, len(product_ids), batch_size):
+            yield product_ids[start:start + batch_size]
+        return
+
+    last_id = 0
+    while True:
+        batch = list(
+            Product.objects.filter(company_id=company_id, id__gt=last_id)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def provision_inventory(company_id, product_ids=None, branch_ids=None,
+                        batch_size=PROVISION_BATCH_SIZE, on_progress=None):
+    """
+    Crea los inventarios faltantes para las combinaciones (sucursal, producto)
+    de la empresa. product_ids/branch_ids limitan el alcance (por defecto todos).
+    on_progress(scanned, created) se llama después de cada lote.
+
+    Es seguro ejecutarlo en paralelo con otras altas: los conflictos con la
+    restricción única (branch, product) se ignoran.
+
+    Retorna {'scanned': pares revisados, 'created': inventarios creados}.
+    """
+    if branch_ids is None:
+        branch_ids = list(Branch.objects.filter(company_id=company_id).values_list('id', flat=True))
+    else:
+        branch_ids = list(branch_ids)
+
+    scanned = created = 0
+    if not branch_ids:
+        return {'scanned': scanned, 'created': created}
+
+    for batch in _product_id_batches(company_id, product_ids, batch_size):
+        existing = set(
+            Inventory.objects.filter(product_id__in=batch, branch_id__in=branch_ids)
+            .values_list('branch_id', 'product_id')
+        )
+        missing = [
+            Inventory(
+                branch_id=branch_id,
+                product_id=product_id,
+                stock=DEFAULT_STOCK,
+                reorder_point=DEFAULT_REORDER_POINT
+            )
+            for product_id in batch
+            for branch_id in branch_ids
+            if (branch_id, product_id) not in existing
+        ]
+        if missing:
+            Inventory.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+
+        scanned += len(batch) * len(branch_ids)
+        created += len(missing)
+        if on_progress:
+            on_progress(scanned, created)
+
+    if created:
+        logger.info(f'Inventory provisioned for company {company_id}: {created} created, {scanned} pairs scanned')
+        # bulk_create no dispara signals: invalidar el dashboard explícitamente
+        bump_tenant_version(company_id)
+
+    return {'scanned': scanned, 'created': created}
+
+
+# --- Trabajos de sincronización en segundo plano ------------------------------
+
+ACTIVE_JOB_STATUSES = ('pendiente', 'en_proceso')
+
+# Un trabajo en proceso sin avances durante este tiempo se considera abandonado
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+
+def enqueue_sync_job(company, user=None):
+    """
+    Encola la sincronización de inventario de la empresa.
+    Si ya hay un trabajo activo lo retorna en lugar de crear otro.
+    Retorna (job, created).
+    """
+    with transaction.atomic():
+        Company.objects.select_for_update().filter(pk=company.pk).first()
+        job = InventorySyncJob.objects.filter(
+            company=company, status__in=ACTIVE_JOB_STATUSES
+        ).order_by('created_at').first()
+        if job:
+            return job, False
+        return InventorySyncJob.objects.create(company=company, requested_by=user), True
+
+
+def claim_next_job():
+    """
+    Toma el siguiente trabajo pendiente (o uno abandonado) y lo marca en proceso.
+    Con PostgreSQL varios workers pueden correr a la vez gracias a SKIP LOCKED.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = InventorySyncJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status='pendiente') |
+            Q(status='en_proceso', heartbeat_at__lt=now - STALE_JOB_AFTER)
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = 'en_proceso'
+        job.started_at = now
+        job.heartbeat_at = now
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def run_sync_job(job, batch_size=PROVISION_BATCH_SIZE):
+    """Ejecuta un trabajo tomado por el worker informando el avance por lote"""
+    jobs = InventorySyncJob.objects.filter(pk=job.pk)
+    branch_count = Branch.objects.filter(company_id=job.company_id).count()
+    product_count = Product.objects.filter(company_id=job.company_id).count()
+    jobs.update(pairs_total=branch_count * product_count)
+
+    def on_progress(scanned, created):
+        jobs.update(pairs_scanned=scanned, inventories_created=created, heartbeat_at=timezone.now())
+
+    try:
+        result = provision_inventory(job.company_id, batch_size=batch_size, on_progress=on_progress)
+    except Exception as e:
+        logger.exception(f'Inventory sync job {job.pk} failed')
+        jobs.update(status='fallido', error=str(e), finished_at=timezone.now())
+        return None
+
+    jobs.update(
+        status='completado',
+        pairs_scanned=result['scanned'],
+        inventories_created=result['created'],
+        finished_at=timezone.now()
+    )
+    return result
+
+
+# --- Movimientos de stock -----------------------------------------------------
+
+def apply_stock_delta(inventory_id, delta, company_id=None):
+    """
+    Aplica un cambio de stock con un único UPDATE condicional
+    (stock = stock + delta WHERE stock + delta >= 0), sin leer la fila antes.
+    Lanza InsufficientStock si el stock no alcanza.
+    """
+    rows = Inventory.objects.filter(pk=inventory_id)
+    if delta < 0:
+        rows = rows.filter(stock__gte=-delta)
+    if not rows.update(stock=F('stock') + delta, updated_at=timezone.now()):
+        raise InsufficientStock()
+    # update() no dispara signals: invalidar el dashboard explícitamente
+    if company_id is None:
+        company_id = Branch.objects.filter(inventory__pk=inventory_id).values_list('company_id', flat=True).first()
+    bump_tenant_version(company_id)
+
+
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def _update_stock_batch(deltas):
+    """Aplica {inventory_id: delta} con un único UPDATE ... CASE"""
+    ids = list(deltas)
+    Inventory.objects.filter(pk__in=ids).update(
+        stock=F('stock') + Case(
+            *[When(pk=inventory_id, then=Value(delta)) for inventory_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        updated_at=timezone.now()
+    )
+
+
+def apply_movements_bulk(company_id, user, items, partial=False):
+    """
+    Aplica un lote de movimientos ya validados (dicts con inventory, movement_type,
+    quantity, unit_cost, reference, notes) de inventarios de la empresa.
+
+    Las filas de inventario se bloquean en orden de id, se verifica el stock y
+    los cambios netos por inventario se aplican con un UPDATE por lote; los
+    movimientos se insertan con bulk_create.
+
+    Con partial=False es todo o nada: si algún movimiento deja stock negativo
+    no se aplica ninguno. Con partial=True se omiten solo esos movimientos.
+    Debe llamarse dentro de una transacción.
+
+    Retorna (movimientos creados, errores [{'index', 'error'}]).
+    """
+    inventory_ids = sorted({item['inventory'] for item in items})
+    stock = {}
+    for batch_start in range(0, len(inventory_ids), BULK_UPDATE_BATCH_SIZE):
+        batch = inventory_ids[batch_start:batch_start + BULK_UPDATE_BATCH_SIZE]
+        stock.update(
+            Inventory.objects.select_for_update().filter(
+                pk__in=batch, branch__company_id=company_id
+            ).order_by('pk').values_list('pk', 'stock')
+        )
+
+    errors = []
+    accepted = []
+    if partial:
+        # Se procesan en orden, descartando los que dejarían stock negativo
+        for index, item in enumerate(items):
+            if item['inventory'] not in stock:
+                errors.append({'index': index, 'error': 'Inventario no encontrado'})
+                continue
+            delta = movement_delta(item['movement_type'], item['quantity'])
+            if stock[item['inventory']] + delta < 0:
+                errors.append({'index': index, 'error': 'Stock insuficiente'})
+                continue
+            stock[item['inventory']] += delta
+            accepted.append(item)
+    else:
+        net = {}
+        for index, item in enumerate(items):
+            if item['inventory'] not in stock:
+                errors.append({'index': index, 'error': 'Inventario no encontrado'})
+                continue
+            net[item['inventory']] = net.get(item['inventory'], 0) + movement_delta(
+                item['movement_type'], item['quantity']
+            )
+        for index, item in enumerate(items):
+            inventory_id = item['inventory']
+            if inventory_id in net and stock[inventory_id] + net[inventory_id] < 0:
+                errors.append({'index': index, 'error': 'Stock insuficiente'})
+        if errors:
+            return [], sorted(errors, key=lambda error: error['index'])
+        accepted = items
+
+    deltas = {}
+    for item in accepted:
+        deltas[item['inventory']] = deltas.get(item['inventory'], 0) + movement_delta(
+            item['movement_type'], item['quantity']
+        )
+    changed = [(inventory_id, delta) for inventory_id, delta in deltas.items() if delta]
+    for batch_start in range(0, len(changed), BULK_UPDATE_BATCH_SIZE):
+        _update_stock_batch(dict(changed[batch_start:batch_start + BULK_UPDATE_BATCH_SIZE]))
+
+    movements = InventoryMovement.objects.bulk_create([
+        InventoryMovement(
+            inventory_id=item['inventory'],
+            movement_type=item['movement_type'],
+            quantity=item['quantity'],
+            unit_cost=item.get('unit_cost'),
+            reference=item.get('reference'),
+            notes=item.get('notes'),
+            user=user
+        )
+        for item in accepted
+    ], batch_size=PROVISION_BATCH_SIZE)
+
+    valuation_services.record_movements(movements)
+
+    if movements:
+        bump_tenant_version(company_id)
+    return movements, errors
+
+
+@transaction.atomic
+def transfer_stock(company_id, user, source_branch_id, destination_branch_id, lines,
+                   reference=None, notes=None):
+    """
+    Transfiere stock entre dos sucursales de la empresa en una transacción:
+    por cada línea ({product, quantity}) una salida en origen y una entrada
+    en destino. Las filas se bloquean en orden de id (ver apply_movements_bulk),
+    por lo que transferencias cruzadas simultáneas no producen deadlocks.
+    Los inventarios faltantes en destino se crean solo si las líneas son válidas.
+
+    Retorna (referencia, movimientos, errores [{'index', 'error'}] por línea);
+    con errores no se aplica nada (la transacción se revierte).
+    """
+    branches = dict(
+        Branch.objects.filter(
+            company_id=company_id, pk__in=[source_branch_id, destination_branch_id]
+        ).values_list('pk', 'name')
+    )
+    if set(branches) != {source_branch_id, destination_branch_id}:
+        return None, [], [{'index': None, 'error': 'Sucursal no encontrada'}]
+
+    product_ids = set(
+        Product.objects.filter(
+            company_id=company_id, pk__in={line['product'] for line in lines}
+        ).values_list('pk', flat=True)
+    )
+    source_products = set(
+        Inventory.objects.filter(
+            branch_id=source_branch_id, product_id__in=product_ids
+        ).values_list('product_id', flat=True)
+    )
+    errors = [
+        {'index': index, 'error': 'Producto no encontrado' if line['product'] not in product_ids
+         else 'Producto sin inventario en la sucursal de origen'}
+        for index, line in enumerate(lines)
+        if line['product'] not in source_products
+    ]
+    if errors:
+        return None, [], errors
+
+    provision_inventory(company_id, product_ids=product_ids, branch_ids=[destination_branch_id])
+    inventory_ids = {
+        (branch_id, product_id): inventory_id
+        for inventory_id, branch_id, product_id in Inventory.objects.filter(
+            branch_id__in=branches, product_id__in=product_ids
+        ).values_list('pk', 'branch_id', 'product_id')
+    }
+
+    reference = reference or f'TRF-{uuid.uuid4().hex[:12].upper()}'
+    notes = notes or f'Transferencia de {branches[source_branch_id]} a {branches[destination_branch_id]}'
+    # Las entradas en destino llevan el costo promedio del origen
+    source_costs = valuation_services.average_costs([inventory_ids[(source_branch_id, line['product'])] for line in lines])
+    # Primero todas las salidas (índice = línea) y luego todas las entradas
+    items = [
+        {
+            'inventory': inventory_ids[(source_branch_id, line['product'])],
+            'movement_type': 'salida', 'quantity': line['quantity'],
+            'reference': reference, 'notes': notes,
+        }
+        for line in lines
+    ] + [
+        {
+            'inventory': inventory_ids[(destination_branch_id, line['product'])],
+            'movement_type': 'entrada', 'quantity': line['quantity'],
+            'unit_cost': source_costs[inventory_ids[(source_branch_id, line['product'])]],
+            'reference': reference, 'notes': notes,
+        }
+        for line in lines
+    ]
+    movements, errors = apply_movements_bulk(company_id, user, items)
+    if errors:
+        # Descartar también los inventarios creados en destino
+        transaction.set_rollback(True)
+    return reference, movements, [error for error in errors if error['index'] < len(lines)]
@@ -0,0 +1,208 @@
+"""
+POPULARITY_SERVICES.PY - Ranking de productos por ventanas móviles
+Los contadores se incrementan al crear items de venta/orden. Como las ventanas
+se desplazan con los días, la primera lectura de cada día recalcula las filas
+de la empresa desde ProductSalesDailyRollup con una sola consulta agrupada.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Q
+from django.utils import timezone
+
+from apps.catalyst_app.models import ProductPopularity, ProductSalesDailyRollup
+from apps.catalyst_app.services import rollup_services
+
+
+WINDOWS = (7, 30, 365)
+
+DEFAULT_TOP_LIMIT = 5
+MAX_TOP_LIMIT = 100
+
+
+def _refreshed_key(company_id):
+    return f'catalyst:popularity:{company_id}:as-of'
+
+
+def _window_start(today, days):
+    return today - timedelta(days=days - 1)
+
+
+def _deltas(today, day, quantity, lines):
+    """Incrementos por ventana para una venta ocurrida en day"""
+    deltas = {}
+    for days in WINDOWS:
+        if _window_start(today, days) <= day <= today:
+            deltas[f'units_{days}d'] = quantity
+            deltas[f'orders_{days}d'] = lines
+    return deltas
+
+
+def record_items(parent_state, items):
+    """
+    Suma al ranking un lote de items recién creados.
+    parent_state: estado de acumulado de la venta/orden (ver rollup_services).
+    items: iterable de (product_id, quantity).
+    """
+    today = timezone.localdate()
+    grouped = {}
+    for product_id, quantity in items:
+        totals = grouped.setdefault(product_id, [0, 0])
+        totals[0] += quantity
+        totals[1] += 1
+
+    deltas = {}
+    for product_id, (quantity, lines) in grouped.items():
+        product_deltas = _deltas(today, parent_state['day'], quantity, lines)
+        if product_deltas:
+            deltas[product_id] = product_deltas
+    if not deltas:
+        return
+
+    channel = parent_state['channel']
+    missing = rollup_services.increment_rows(ProductPopularity, {'channel': channel}, 'product_id', deltas)
+    if missing:
+        # Sin fila todavía: se calculan desde los acumulados (ya incluyen los items)
+        _create_products(parent_state['company_id'], missing, channel)
+
+
+def _create_products(company_id, product_ids, channel):
+    """Crea las filas de ranking de varios productos con una consulta agrupada"""
+    today = timezone.localdate()
+    rows = {
+        row['product_id']: row
+        for row in ProductSalesDailyRollup.objects.filter(
+            company_id=company_id, product_id__in=product_ids, channel=channel,
+            day__gte=_window_start(today, max(WINDOWS)), day__lte=today
+        ).values('product_id').annotate(**_window_aggregates(today)).order_by()
+    }
+    empty = {name: None for name in _window_aggregates(today)}
+    try:
+        with transaction.atomic():
+            ProductPopularity.objects.bulk_create([
+                ProductPopularity(
+                    company_id=company_id, product_id=product_id, channel=channel,
+                    as_of=today, **_row_values(rows.get(product_id, empty))
+                )
+                for product_id in product_ids
+            ])
+    except IntegrityError:
+        # Creadas por otra transacción: recalcular cada una
+        for product_id in product_ids:
+            refresh_product(company_id, product_id, channel)
+
+
+def record_item_change(previous, current):
+    """
+    Actualiza el ranking ante el cambio de un item de venta/orden.
+    Cada estado es (estado del padre, product_id, quantity, subtotal) o None,
+    como en rollup_services.apply_item_change. Los acumulados diarios ya
+    reflejan el cambio cuando se llama.
+    """
+    if previous and current and previous == current:
+        return
+    if current and not previous:
+        parent, product_id, quantity, _ = current
+        record_items(parent, [(product_id, quantity)])
+        return
+    keys = {
+        (parent['company_id'], product_id, parent['channel'])
+        for parent, product_id, _, _ in filter(None, (previous, current))
+    }
+    for company_id, product_id, channel in keys:
+        refresh_product(company_id, product_id, channel)
+
+
+def _window_aggregates(today):
+    aggregates = {}
+    for days in WINDOWS:
+        window = Q(day__gte=_window_start(today, days))
+        aggregates[f'units_{days}d'] = Sum('quantity', filter=window)
+        aggregates[f'orders_{days}d'] = Sum('line_count', filter=window)
+    return aggregates
+
+
+def _row_values(row):
+    return {
+        f'{measure}_{days}d': row[f'{measure}_{days}d'] or 0
+        for days in WINDOWS for measure in ('units', 'orders')
+    }
+
+
+def refresh_product(company_id, product_id, channel):
+    """Recalcula las ventanas de un producto desde los acumulados diarios"""
+    today = timezone.localdate()
+    row = ProductSalesDailyRollup.objects.filter(
+        company_id=company_id, product_id=product_id, channel=channel,
+        day__gte=_window_start(today, max(WINDOWS)), day__lte=today
+    ).aggregate(**_window_aggregates(today))
+    ProductPopularity.objects.update_or_create(
+        product_id=product_id, channel=channel,
+        defaults=dict(_row_values(row), company_id=company_id, as_of=today)
+    )
+
+
+@transaction.atomic
+def refresh_company(company_id):
+    """
+    Recalcula el ranking completo de la empresa para el día actual.
+    Retorna la cantidad de filas escritas.
+    """
+    today = timezone.localdate()
+    rows = ProductSalesDailyRollup.objects.filter(
+        company_id=company_id,
+        day__gte=_window_start(today, max(WINDOWS)), day__lte=today
+    ).values('product_id', 'channel').annotate(**_window_aggregates(today)).order_by()
+
+    ProductPopularity.objects.filter(company_id=company_id).delete()
+    ProductPopularity.objects.bulk_create([
+        ProductPopularity(
+            company_id=company_id, product_id=row['product_id'], channel=row['channel'],
+            as_of=today, **_row_values(row)
+        )
+        for row in rows
+    ])
+    cache.set(_refreshed_key(company_id), today, 60 * 60 * 24)
+    return len(rows)
+
+
+def ensure_fresh(company_id):
+    """Recalcula el ranking si todavía no se hizo hoy"""
+    today = timezone.localdate()
+    if cache.get(_refreshed_key(company_id)) == today:
+        return
+    stale = ProductPopularity.objects.filter(company_id=company_id, as_of__lt=today).exists()
+    if stale or not ProductPopularity.objects.filter(company_id=company_id).exists():
+        refresh_company(company_id)
+    else:
+        cache.set(_refreshed_key(company_id), today, 60 * 60 * 24)
+
+
+def top_products(company_id, window=30, channel=None, limit=DEFAULT_TOP_LIMIT, by='units'):
+    """
+    Top N de productos por unidades u órdenes en la ventana indicada.
+    Con channel=None suma POS y e-commerce.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f'Ventana no soportada: {window}')
+    if by not in ('units', 'orders'):
+        raise ValueError(f'Medida no soportada: {by}')
+    ensure_fresh(company_id)
+
+    units_field = f'units_{window}d'
+    orders_field = f'orders_{window}d'
+    ranking = ProductPopularity.objects.filter(company_id=company_id)
+
+    if channel:
+        ranking = ranking.filter(channel=channel).values(
+            'product_id', 'product__name', 'product__sku'
+        ).annotate(units=F(units_field), orders=F(orders_field))
+    else:
+        ranking = ranking.values(
+            'product_id', 'product__name', 'product__sku'
+        ).annotate(units=Sum(units_field), orders=Sum(orders_field))
+
+    return list(
+        ranking.filter(**{f'{by}__gt': 0}).order_by(f'-{by}', 'product_id')[:limit]
+    )
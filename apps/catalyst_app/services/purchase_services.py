@@ -0,0 +1,99 @@
+"""
+PURCHASE_SERVICES.PY - Recepción de compras en el inventario
+Cada recepción (total o parcial) crea las entradas de inventario de todos los
+items con un bulk_create y aplica el stock con UPDATE por lote (ver
+apply_movements_bulk), en una sola transacción. Con clave de idempotencia un
+reintento retorna la recepción ya registrada sin volver a aplicarla.
+"""
+from django.db import transaction
+from django.db.models import Case, When, Value, F, IntegerField
+from django.utils import timezone
+
+from apps.catalyst_app.models import Inventory, PurchaseItem, PurchaseReceipt
+from apps.catalyst_app.services.inventory_services import apply_movements_bulk, provision_inventory
+
+
+@transaction.atomic
+def receive_purchase(purchase, user, quantities=None, idempotency_key=None):
+    """
+    Recibe en la sucursal de la compra las cantidades indicadas
+    ({purchase_item_id: cantidad}); sin quantities recibe todo lo pendiente.
+
+    Retorna (recepción o None si no había nada que recibir, repetida, errores
+    [{'item', 'error'}]). Con errores no se aplica nada.
+    """
+    # Bloquear los items serializa las recepciones simultáneas de la compra
+    items = {
+        item.pk: item
+        for item in PurchaseItem.objects.select_for_update().filter(purchase=purchase).order_by('pk')
+    }
+
+    if idempotency_key:
+        receipt = PurchaseReceipt.objects.filter(purchase=purchase, idempotency_key=idempotency_key).first()
+        if receipt is not None:
+            return receipt, True, []
+
+    if quantities is None:
+        quantities = {pk: item.quantity_pending() for pk, item in items.items()}
+
+    errors = []
+    for item_id, quantity in quantities.items():
+        if item_id not in items:
+            errors.append({'item': item_id, 'error': 'Item no pertenece a la compra'})
+        elif quantity > items[item_id].quantity_pending():
+            errors.append({
+                'item': item_id,
+                'error': f'Cantidad mayor a la pendiente ({items[item_id].quantity_pending()})'
+            })
+    if errors:
+        return None, False, errors
+
+    received = {item_id: quantity for item_id, quantity in quantities.items() if quantity > 0}
+    if not received:
+        return None, False, []
+
+    company_id = purchase.supplier.company_id
+    product_ids = {items[item_id].product_id for item_id in received}
+    provision_inventory(company_id, product_ids=product_ids, branch_ids=[purchase.branch_id])
+    inventory_ids = dict(
+        Inventory.objects.filter(
+            branch_id=purchase.branch_id, product_id__in=product_ids
+        ).values_list('product_id', 'pk')
+    )
+
+    receipt = PurchaseReceipt.objects.create(
+        purchase=purchase,
+        idempotency_key=idempotency_key or None,
+        received_by=user,
+        lines=len(received),
+        units=sum(received.values())
+    )
+    reference = f'Compra {purchase.invoice_number}'[:100]
+    apply_movements_bulk(company_id, user, [
+        {
+            'inventory': inventory_ids[items[item_id].product_id],
+            'movement_type': 'entrada',
+            'quantity': quantity,
+            'unit_cost': items[item_id].unit_price,
+            'reference': reference,
+            'notes': f'Recepción #{receipt.pk} de la compra #{purchase.pk}',
+        }
+        for item_id, quantity in received.items()
+    ])
+
+    PurchaseItem.objects.filter(pk__in=received).update(
+        quantity_received=F('quantity_received') + Case(
+            *[When(pk=item_id, then=Value(quantity)) for item_id, quantity in received.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    )
+
+    fully_received = all(
+        items[pk].quantity_received + received.get(pk, 0) >= items[pk].quantity for pk in items
+    )
+    if fully_received and not purchase.delivery_date:
+        purchase.delivery_date = timezone.localdate()
+        purchase.save(update_fields=['delivery_date', 'updated_at'])
+
+    return receipt, False, []
@@ -0,0 +1,435 @@
+"""
+ROLLUP_SERVICES.PY - Mantenimiento de los acumulados diarios de ventas
+Los acumulados se actualizan incrementalmente (deltas con F-expressions) desde
+los signals de Sale/SaleItem/Order/OrderItem y se pueden reconstruir desde el
+historial con el comando rebuild_sales_rollups.
+
+ProductSalesDailyRollup.sales_count (ventas/órdenes distintas con el producto)
+no se puede sumar por item: al cambiar o eliminar items sueltos se recuenta en
+SQL la clave afectada, lo que también es correcto en eliminaciones en cascada.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Count, OuterRef, Subquery, Case, When, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.catalyst_app.models import (
+    Branch, Sale, SaleItem, Order, OrderItem, SalesDailyRollup, ProductSalesDailyRollup
+)
+
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _increment(model, key, **deltas):
+    """
+    Suma deltas a la fila del acumulado identificada por key.
+    Crea la fila si no existe; ante una creación concurrente reintenta el UPDATE.
+    """
+    if not any(deltas.values()):
+        return
+
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    updates['updated_at'] = timezone.now()
+
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        model.objects.filter(**key).update(**updates)
+
+
+def increment_rows(model, key, field, deltas):
+    """
+    Suma deltas a varias filas que comparten key y se distinguen por field,
+    con una consulta de lectura y un UPDATE condicional en total.
+    deltas: {valor de field: {campo: delta}}. No crea filas: retorna los
+    valores de field que todavía no tienen fila.
+    """
+    existing = set(
+        model.objects.filter(**key, **{f'{field}__in': list(deltas)}).values_list(field, flat=True)
+    )
+    if existing:
+        updates = {}
+        for name in {name for values in deltas.values() for name in values}:
+            whens = [
+                When(**{field: value}, then=F(name) + Value(values[name]))
+                for value, values in deltas.items() if value in existing and values.get(name)
+            ]
+            if whens:
+                updates[name] = Case(*whens, default=F(name))
+        updates['updated_at'] = timezone.now()
+        model.objects.filter(**key, **{f'{field}__in': existing}).update(**updates)
+    return [value for value in deltas if value not in existing]
+
+
+# --- Estados de ventas/órdenes -------------------------------------------------
+
+def _branch_company_id(sale):
+    if Sale._meta.get_field('branch').is_cached(sale):
+        return sale.branch.company_id
+    return Branch.objects.values_list('company_id', flat=True).get(pk=sale.branch_id)
+
+
+def _sale_state(company_id, branch_id, seller_id, created_at, payment_method, total):
+    return {
+        'company_id': company_id,
+        'branch_id': branch_id,
+        'seller_id': seller_id,
+        'day': timezone.localdate(created_at),
+        'payment_method': payment_method,
+        'channel': 'pos',
+        'status': '',
+        'total': total,
+    }
+
+
+def _order_state(company_id, created_at, status, total):
+    return {
+        'company_id': company_id,
+        'branch_id': None,
+        'seller_id': None,
+        'day': timezone.localdate(created_at),
+        'payment_method': '',
+        'channel': 'ecommerce',
+        'status': status,
+        'total': total,
+    }
+
+
+def sale_state(sale):
+    """Estado de acumulado de una venta en memoria"""
+    return _sale_state(
+        _branch_company_id(sale), sale.branch_id, sale.seller_id,
+        sale.created_at, sale.payment_method, sale.total
+    )
+
+
+def load_sale_state(sale_id):
+    """Estado de acumulado de una venta según la base de datos"""
+    row = Sale.objects.filter(pk=sale_id).values(
+        'branch__company_id', 'branch_id', 'seller_id', 'created_at', 'payment_method', 'total'
+    ).first()
+    if row is None:
+        return None
+    return _sale_state(
+        row['branch__company_id'], row['branch_id'], row['seller_id'],
+        row['created_at'], row['payment_method'], row['total']
+    )
+
+
+def order_state(order):
+    """Estado de acumulado de una orden en memoria"""
+    return _order_state(order.company_id, order.created_at, order.status, order.total)
+
+
+def load_order_state(order_id):
+    """Estado de acumulado de una orden según la base de datos"""
+    row = Order.objects.filter(pk=order_id).values(
+        'company_id', 'created_at', 'status', 'total'
+    ).first()
+    if row is None:
+        return None
+    return _order_state(row['company_id'], row['created_at'], row['status'], row['total'])
+
+
+def _sales_key(state):
+    return {
+        field: state[field]
+        for field in ('company_id', 'branch_id', 'seller_id', 'day', 'payment_method', 'channel', 'status')
+    }
+
+
+def _product_key(state, product_id):
+    key = {
+        field: state[field]
+        for field in ('company_id', 'branch_id', 'seller_id', 'day', 'channel')
+    }
+    key['product_id'] = product_id
+    return key
+
+
+def _product_parent_key(state):
+    return _product_key(state, None) if state else None
+
+
+def _recount_sales(parent, product_id):
+    """
+    Recalcula con un UPDATE las ventas/órdenes distintas que incluyen el
+    producto en la clave del acumulado (idempotente).
+    """
+    if parent['channel'] == 'pos':
+        items = SaleItem.objects.filter(
+            sale__branch_id=parent['branch_id'],
+            sale__seller_id=parent['seller_id'],
+            sale__created_at__date=parent['day']
+        )
+        parent_field = 'sale'
+    else:
+        items = OrderItem.objects.filter(
+            order__company_id=parent['company_id'],
+            order__created_at__date=parent['day']
+        )
+        parent_field = 'order'
+    count = items.filter(product_id=OuterRef('product_id')).values('product_id').annotate(
+        count=Count(parent_field, distinct=True)
+    ).values('count')
+    ProductSalesDailyRollup.objects.filter(**_product_key(parent, product_id)).update(
+        sales_count=Coalesce(Subquery(count), 0)
+    )
+
+
+# --- Aplicación de cambios ---------------------------------------------------
+
+def apply_parent_change(previous, current):
+    """Aplica el cambio de una venta/orden (previous/current pueden ser None)"""
+    if previous and current and previous == current:
+        return
+    if previous:
+        _increment(SalesDailyRollup, _sales_key(previous), sales_count=-1, total_amount=-previous['total'])
+    if current:
+        _increment(SalesDailyRollup, _sales_key(current), sales_count=1, total_amount=current['total'])
+
+
+def apply_item_change(previous, current):
+    """
+    Aplica el cambio de un item. Cada estado es (estado del padre, product_id,
+    quantity, subtotal) o None.
+    """
+    if previous and current and previous == current:
+        return
+    if previous:
+        parent, product_id, quantity, subtotal = previous
+        _increment(
+            ProductSalesDailyRollup, _product_key(parent, product_id),
+            quantity=-quantity, revenue=-subtotal, line_count=-1
+        )
+    if current:
+        parent, product_id, quantity, subtotal = current
+        _increment(
+            ProductSalesDailyRollup, _product_key(parent, product_id),
+            quantity=quantity, revenue=subtotal, line_count=1
+        )
+        # El item ya está guardado: recontar ambas claves
+        for state in filter(None, (previous, current)):
+            _recount_sales(state[0], state[1])
+
+
+def recount_deleted_item(previous):
+    """
+    Recuenta las ventas/órdenes del producto de un item ya eliminado
+    (post_delete). previous: estado descontado por record_deleted.
+    """
+    if previous:
+        _recount_sales(previous[0], previous[1])
+
+
+def apply_items_bulk(parent, items):
+    """
+    Suma al acumulado por producto los items de una venta/orden nueva creados
+    con bulk_create (que no dispara signals). items: iterable de (product_id, quantity, subtotal).
+    """
+    deltas = {}
+    for product_id, quantity, subtotal in items:
+        totals = deltas.setdefault(
+            product_id, {'quantity': 0, 'revenue': 0, 'line_count': 0, 'sales_count': 1}
+        )
+        totals['quantity'] += quantity
+        totals['revenue'] += subtotal
+        totals['line_count'] += 1
+    if not deltas:
+        return
+
+    # Una cantidad fija de consultas por venta, sin importar cuántos productos tenga
+    key = _product_key(parent, None)
+    del key['product_id']
+    missing = increment_rows(ProductSalesDailyRollup, key, 'product_id', deltas)
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            ProductSalesDailyRollup.objects.bulk_create([
+                ProductSalesDailyRollup(**key, product_id=product_id, **deltas[product_id])
+                for product_id in missing
+            ])
+    except IntegrityError:
+        # Otra transacción creó alguna de las filas: ahora todas existen
+        increment_rows(ProductSalesDailyRollup, key, 'product_id', {
+            product_id: deltas[product_id] for product_id in missing
+        })
+
+
+def _move_items(item_model, parent_field, parent_id, previous, current):
+    """Mueve los items de una venta/orden cuando cambia su clave de acumulado"""
+    if _product_parent_key(previous) == _product_parent_key(current):
+        return
+    grouped = item_model.objects.filter(**{parent_field: parent_id}).values('product_id').annotate(
+        quantity=Sum('quantity'), revenue=Sum('subtotal'), lines=Count('id')
+    ).order_by()
+    for row in grouped:
+        if previous:
+            _increment(
+                ProductSalesDailyRollup, _product_key(previous, row['product_id']),
+                quantity=-row['quantity'], revenue=-row['revenue'], line_count=-row['lines'],
+                sales_count=-1
+            )
+        if current:
+            _increment(
+                ProductSalesDailyRollup, _product_key(current, row['product_id']),
+                quantity=row['quantity'], revenue=row['revenue'], line_count=row['lines'],
+                sales_count=1
+            )
+
+
+# --- Puntos de entrada desde signals -----------------------------------------
+
+def _item_state(parent_state, item):
+    return (parent_state, item.product_id, item.quantity, item.subtotal)
+
+
+def _load_item_state(item_model, item_id, load_parent):
+    parent_field = 'sale_id' if item_model is SaleItem else 'order_id'
+    row = item_model.objects.filter(pk=item_id).values(
+        parent_field, 'product_id', 'quantity', 'subtotal'
+    ).first()
+    if row is None:
+        return None
+    return (load_parent(row[parent_field]), row['product_id'], row['quantity'], row['subtotal'])
+
+
+def snapshot(instance):
+    """Estado previo (en base de datos) de una instancia antes de guardarla"""
+    if instance._state.adding or instance.pk is None:
+        return None
+    if isinstance(instance, Sale):
+        return load_sale_state(instance.pk)
+    if isinstance(instance, Order):
+        return load_order_state(instance.pk)
+    if isinstance(instance, SaleItem):
+        return _load_item_state(SaleItem, instance.pk, load_sale_state)
+    if isinstance(instance, OrderItem):
+        return _load_item_state(OrderItem, instance.pk, load_order_state)
+    return None
+
+
+def record_saved(instance, previous):
+    """
+    Aplica al acumulado el guardado de una venta, orden o item.
+    Retorna el estado actual de la instancia.
+    """
+    if isinstance(instance, Sale):
+        current = sale_state(instance)
+        apply_parent_change(previous, current)
+        if previous:
+            _move_items(SaleItem, 'sale_id', instance.pk, previous, current)
+    elif isinstance(instance, Order):
+        current = order_state(instance)
+        apply_parent_change(previous, current)
+        if previous:
+            _move_items(OrderItem, 'order_id', instance.pk, previous, current)
+    elif isinstance(instance, SaleItem):
+        current = _item_state(sale_state(instance.sale), instance)
+        apply_item_change(previous, current)
+    elif isinstance(instance, OrderItem):
+        current = _item_state(order_state(instance.order), instance)
+        apply_item_change(previous, current)
+    else:
+        current = None
+    return current
+
+
+def record_deleted(instance):
+    """
+    Descuenta del acumulado una venta, orden o item que se va a eliminar.
+    Retorna el estado descontado.
+    """
+    previous = snapshot(instance)
+    if isinstance(instance, (Sale, Order)):
+        apply_parent_change(previous, None)
+    elif isinstance(instance, (SaleItem, OrderItem)):
+        apply_item_change(previous, None)
+    return previous
+
+
+# --- Reconstrucción ----------------------------------------------------------
+
+def _bulk_insert(model, rows, build):
+    created = 0
+    batch = []
+    for row in rows:
+        batch.append(build(row))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+@transaction.atomic
+def rebuild_rollups(company_id=None):
+    """
+    Reconstruye los acumulados desde Sale/SaleItem/Order/OrderItem.
+    Si se indica company_id solo se reconstruye esa empresa.
+    Retorna la cantidad de filas creadas por tabla.
+    """
+    sales = Sale.objects.all()
+    orders = Order.objects.all()
+    sale_items = SaleItem.objects.all()
+    order_items = OrderItem.objects.all()
+    rollups = SalesDailyRollup.objects.all()
+    product_rollups = ProductSalesDailyRollup.objects.all()
+
+    if company_id is not None:
+        sales = sales.filter(branch__company_id=company_id)
+        orders = orders.filter(company_id=company_id)
+        sale_items = sale_items.filter(sale__branch__company_id=company_id)
+        order_items = order_items.filter(order__company_id=company_id)
+        rollups = rollups.filter(company_id=company_id)
+        product_rollups = product_rollups.filter(company_id=company_id)
+
+    rollups.delete()
+    product_rollups.delete()
+
+    sale_rows = sales.annotate(day=TruncDate('created_at')).values(
+        'branch__company_id', 'branch_id', 'seller_id', 'day', 'payment_method'
+    ).annotate(count=Count('id'), amount=Sum('total')).order_by()
+
+    order_rows = orders.annotate(day=TruncDate('created_at')).values(
+        'company_id', 'day', 'status'
+    ).annotate(count=Count('id'), amount=Sum('total')).order_by()
+
+    sale_item_rows = sale_items.annotate(day=TruncDate('sale__created_at')).values(
+        'sale__branch__company_id', 'sale__branch_id', 'sale__seller_id', 'product_id', 'day'
+    ).annotate(
+        qty=Sum('quantity'), amount=Sum('subtotal'), lines=Count('id'), sales=Count('sale', distinct=True)
+    ).order_by()
+
+    order_item_rows = order_items.annotate(day=TruncDate('order__created_at')).values(
+        'order__company_id', 'product_id', 'day'
+    ).annotate(
+        qty=Sum('quantity'), amount=Sum('subtotal'), lines=Count('id'), sales=Count('order', distinct=True)
+    ).order_by()
+
+    return {
+        'sales': _bulk_insert(SalesDailyRollup, sale_rows.iterator(), lambda r: SalesDailyRollup(
+            company_id=r['branch__company_id'], branch_id=r['branch_id'], seller_id=r['seller_id'],
+            day=r['day'], payment_method=r['payment_method'], channel='pos',
+            sales_count=r['count'], total_amount=r['amount'] or 0
+        )) + _bulk_insert(SalesDailyRollup, order_rows.iterator(), lambda r: SalesDailyRollup(
+            company_id=r['company_id'], day=r['day'], channel='ecommerce', status=r['status'],
+            sales_count=r['count'], total_amount=r['amount'] or 0
+        )),
+        'products': _bulk_insert(ProductSalesDailyRollup, sale_item_rows.iterator(), lambda r: ProductSalesDailyRollup(
+            company_id=r['sale__branch__company_id'], branch_id=r['sale__branch_id'],
+            seller_id=r['sale__seller_id'], product_id=r['product_id'], day=r['day'], channel='pos',
+            quantity=r['qty'], revenue=r['amount'] or 0, line_count=r['lines'], sales_count=r['sales']
+        )) + _bulk_insert(ProductSalesDailyRollup, order_item_rows.iterator(), lambda r: ProductSalesDailyRollup(
+            company_id=r['order__company_id'], product_id=r['product_id'], day=r['day'], channel='ecommerce',
+            quantity=r['qty'], revenue=r['amount'] or 0, line_count=r['lines'], sales_count=r['sales']
+        )),
+    }
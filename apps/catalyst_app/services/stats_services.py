@@ -0,0 +1,409 @@
+"""
+STATS_SERVICES.PY - Agregaciones reutilizables para estadísticas de ventas
+Cada función resuelve su cálculo con una sola consulta agrupada. Funcionan
+tanto sobre Sale (date_field='created_at') como sobre los acumulados diarios
+(date_field='day', value_field='total_amount', count_field='sales_count').
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import (
+    Sum, Count, Avg, F, Q, Case, When, Value, CharField, DateField, DateTimeField
+)
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+# Granularidades del endpoint de analítica (hour solo sobre campos DateTime)
+ANALYTICS_GRANULARITIES = ('hour',) + GRANULARITIES
+
+# Parámetros para agregar sobre SalesDailyRollup en lugar de Sale
+ROLLUP_MEASURES = {
+    'value_field': 'total_amount',
+    'date_field': 'day',
+    'count_field': 'sales_count',
+}
+
+
+def previous_month_range(today):
+    """
+    Retorna (inicio mes actual, inicio mes anterior, fin mes anterior)
+    """
+    first_day = today.replace(day=1)
+    prev_last = first_day - timedelta(days=1)
+    prev_first = prev_last.replace(day=1)
+    return first_day, prev_first, prev_last
+
+
+def _add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def bucket_start(day, granularity='day'):
+    """Normaliza una fecha (o fecha-hora para 'hour') al inicio de su bucket"""
+    if granularity == 'hour':
+        return day.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'quarter':
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    if granularity == 'year':
+        return date(day.year, 1, 1)
+    return day
+
+
+def next_bucket(day, granularity='day'):
+    """Retorna el inicio del bucket siguiente"""
+    if granularity == 'hour':
+        return day + timedelta(hours=1)
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return _add_months(day, 1)
+    if granularity == 'quarter':
+        return _add_months(day, 3)
+    if granularity == 'year':
+        return date(day.year + 1, 1, 1)
+    return day + timedelta(days=1)
+
+
+def iter_buckets(start, end, granularity='day'):
+    """Itera los inicios de bucket entre start y end (inclusive)"""
+    current = bucket_start(start, granularity)
+    while current <= end:
+        yield current
+        current = next_bucket(current, granularity)
+
+
+def bucket_count(start, end, granularity='day'):
+    """Cantidad de buckets entre las fechas start y end (inclusive)"""
+    if end < start:
+        return 0
+    if granularity == 'hour':
+        return ((end - start).days + 1) * 24
+    if granularity == 'week':
+        return (bucket_start(end, 'week') - bucket_start(start, 'week')).days // 7 + 1
+    if granularity in ('month', 'quarter', 'year'):
+        # Índice del bucket contado en meses desde el año 0
+        size = {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+        first = (start.year * 12 + start.month - 1) // size
+        last = (end.year * 12 + end.month - 1) // size
+        return last - first + 1
+    return (end - start).days + 1
+
+
+def _field(model, path):
+    """Resuelve un campo siguiendo relaciones (ej. 'sale__created_at')"""
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def _is_datetime(queryset, date_field):
+    return isinstance(_field(queryset.model, date_field), DateTimeField)
+
+
+def _date_lookup(queryset, date_field):
+    """Lookup que compara por fecha (agrega __date para DateTimeField)"""
+    if _is_datetime(queryset, date_field):
+        return f'{date_field}__date'
+    return date_field
+
+
+def _trunc(queryset, date_field, granularity):
+    if granularity == 'hour':
+        return Trunc(date_field, 'hour', output_field=DateTimeField())
+    if granularity != 'day':
+        return Trunc(date_field, granularity, output_field=DateField())
+    if _is_datetime(queryset, date_field):
+        return TruncDate(date_field)
+    return F(date_field)
+
+
+def _count(count_field):
+    return Sum(count_field) if count_field else Count('id')
+
+
+def sales_timeseries(queryset, start, end, granularity='day',
+                     value_field='total', date_field='created_at', count_field=None):
+    """
+    Serie temporal de montos y conteos entre start y end (fechas inclusive).
+    Ejecuta una única consulta agrupada y rellena con cero los buckets sin datos.
+
+    Retorna una lista de dicts: {'period': date, 'amount': Decimal, 'count': int}
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Granularidad no soportada: {granularity}')
+
+    lookup = _date_lookup(queryset, date_field)
+    rows = queryset.filter(**{
+        f'{lookup}__gte': bucket_start(start, granularity),
+        f'{lookup}__lte': end,
+    }).annotate(
+        period=_trunc(queryset, date_field, granularity)
+    ).values('period').annotate(
+        amount=Sum(value_field),
+        count=_count(count_field)
+    ).order_by('period')
+
+    by_period = {row['period']: row for row in rows}
+
+    series = []
+    for period in iter_buckets(start, end, granularity):
+        row = by_period.get(period)
+        series.append({
+            'period': period,
+            'amount': (row['amount'] or Decimal('0')) if row else Decimal('0'),
+            'count': row['count'] if row else 0,
+        })
+    return series
+
+
+def _period_aggregates(queryset, current_start, previous_start, previous_end,
+                       value_field, date_field, count_field):
+    lookup = _date_lookup(queryset, date_field)
+    current = Q(**{f'{lookup}__gte': current_start})
+    previous = Q(**{
+        f'{lookup}__gte': previous_start,
+        f'{lookup}__lte': previous_end,
+    })
+    aggregates = {
+        'current_total': Sum(value_field, filter=current),
+        'previous_total': Sum(value_field, filter=previous),
+    }
+    if count_field:
+        aggregates['current_count'] = Sum(count_field, filter=current)
+    else:
+        aggregates['current_count'] = Count('id', filter=current)
+        aggregates['current_avg'] = Avg(value_field, filter=current)
+    return current | previous, aggregates
+
+
+def _period_result(row):
+    current_total = row['current_total'] or 0
+    current_count = row['current_count'] or 0
+    if 'current_avg' in row:
+        current_avg = row['current_avg'] or 0
+    else:
+        current_avg = current_total / current_count if current_count else 0
+    return {
+        'current_total': current_total,
+        'current_count': current_count,
+        'current_avg': current_avg,
+        'previous_total': row['previous_total'] or 0,
+    }
+
+
+def period_comparison(queryset, current_start, previous_start, previous_end,
+                      value_field='total', date_field='created_at', count_field=None):
+    """
+    Compara el periodo actual (desde current_start) contra un periodo anterior
+    usando agregación condicional en una sola consulta.
+    """
+    window, aggregates = _period_aggregates(
+        queryset, current_start, previous_start, previous_end,
+        value_field, date_field, count_field
+    )
+    return _period_result(queryset.filter(window).aggregate(**aggregates))
+
+
+def percentage_change(current, previous):
+    """Cambio porcentual entre dos montos (0 si no hay base)"""
+    if previous > 0:
+        return ((current - previous) / previous) * 100
+    return 0
+
+
+def seller_performance(queryset, current_start, previous_start, previous_end,
+                       daily_since=None, today=None,
+                       value_field='total', date_field='created_at', count_field=None):
+    """
+    Desempeño agrupado por vendedor en una sola consulta con agregación
+    condicional: total, conteo y promedio del periodo actual, total del
+    periodo anterior y, opcionalmente, un total por día desde daily_since.
+
+    Retorna {seller_id: {...}} con las claves 'current_total', 'current_count',
+    'current_avg', 'previous_total' y 'daily' (lista alineada con los días).
+    """
+    window, aggregates = _period_aggregates(
+        queryset, current_start, previous_start, previous_end,
+        value_field, date_field, count_field
+    )
+
+    days = []
+    if daily_since is not None:
+        lookup = _date_lookup(queryset, date_field)
+        days = list(iter_buckets(daily_since, today or daily_since))
+        window |= Q(**{f'{lookup}__gte': daily_since})
+        for index, day in enumerate(days):
+            aggregates[f'day_{index}'] = Sum(value_field, filter=Q(**{lookup: day}))
+
+    rows = queryset.filter(window).values('seller_id').annotate(**aggregates).order_by()
+
+    performance = {}
+    for row in rows:
+        performance[row['seller_id']] = dict(
+            _period_result(row),
+            daily=[row[f'day_{index}'] or 0 for index in range(len(days))]
+        )
+    return performance
+
+
+def _local_bounds(start, end):
+    """Convierte fechas inclusive en [inicio, fin) como fechas-hora locales"""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _period_key(period, granularity):
+    if granularity == 'hour':
+        return timezone.localtime(period).replace(tzinfo=None)
+    return period
+
+
+def _buckets(start, end, granularity):
+    if granularity == 'hour':
+        return list(iter_buckets(
+            datetime.combine(start, time.min), datetime.combine(end, time.max), 'hour'
+        ))
+    return list(iter_buckets(start, end, granularity))
+
+
+def _segment_result(rows, buckets, group_fields, measures, group_limit, totals=None):
+    """
+    Arma totales y series de un segmento. Si se indican totals (calculados en
+    SQL sobre todos los grupos) se usan en lugar de sumar las filas recibidas.
+    """
+    zero = {name: 0 for name in measures}
+    summed = dict(zero)
+    groups = {}
+    for row in rows:
+        key = tuple(row[field] for field in group_fields)
+        group = groups.setdefault(key, {'totals': dict(zero), 'by_period': {}})
+        group['by_period'][row['period']] = row
+        for name in measures:
+            group['totals'][name] += row[name] or 0
+            summed[name] += row[name] or 0
+    if totals is None:
+        totals = summed
+    else:
+        totals = {name: totals.get(name) or 0 for name in measures}
+
+    def series(by_period):
+        return [
+            dict({'period': period}, **{
+                name: (by_period[period][name] or 0) if period in by_period else 0
+                for name in measures
+            })
+            for period in buckets
+        ]
+
+    result = {'totals': totals}
+    if not group_fields:
+        result['series'] = series(groups.get((), {'by_period': {}})['by_period'])
+        return result
+
+    ranked = sorted(groups.items(), key=lambda item: item[1]['totals']['amount'], reverse=True)
+    if group_limit:
+        ranked = ranked[:group_limit]
+    result['groups'] = [
+        {
+            'key': dict(zip(group_fields, key)),
+            'totals': group['totals'],
+            'series': series(group['by_period']),
+        }
+        for key, group in ranked
+    ]
+    return result
+
+
+def sales_breakdown(queryset, start, end, granularity='day', value_field='total',
+                    date_field='created_at', count_expr=None, extra_measures=None,
+                    group_fields=(), compare_start=None, compare_end=None, group_limit=None):
+    """
+    Serie temporal agrupada para un rango arbitrario de fechas (inclusive),
+    opcionalmente dividida por group_fields y comparada contra otro rango.
+
+    Ambos rangos se resuelven en una única consulta: se filtra por la unión
+    de los rangos y se agrupa por (segmento, bucket, grupos), donde el
+    segmento indica si la fila pertenece al rango actual o al de comparación.
+
+    Con group_limit los grupos con mayor monto del rango actual se eligen
+    antes en SQL (ORDER BY + LIMIT) y los buckets se leen solo para ellos;
+    los totales de cada segmento se agregan aparte sobre todos los grupos.
+
+    Retorna {'current': {...}, 'comparison': {...} | None}, cada uno con
+    'totals' y 'series' (sin agrupación) o 'groups' (con agrupación).
+    """
+    if granularity not in ANALYTICS_GRANULARITIES:
+        raise ValueError(f'Granularidad no soportada: {granularity}')
+    if granularity == 'hour' and not _is_datetime(queryset, date_field):
+        raise ValueError('La granularidad hour requiere un campo fecha-hora')
+
+    current_from, current_to = _local_bounds(start, end)
+    window = Q(**{f'{date_field}__gte': current_from, f'{date_field}__lt': current_to})
+    segment = Value('current', output_field=CharField())
+
+    comparing = compare_start is not None and compare_end is not None
+    if comparing:
+        previous_from, previous_to = _local_bounds(compare_start, compare_end)
+        window |= Q(**{f'{date_field}__gte': previous_from, f'{date_field}__lt': previous_to})
+        segment = Case(
+            When(**{f'{date_field}__gte': current_from, f'{date_field}__lt': current_to},
+                 then=Value('current')),
+            default=Value('comparison'),
+            output_field=CharField()
+        )
+
+    measures = {'amount': Sum(value_field), 'count': count_expr or Count('id')}
+    measures.update(extra_measures or {})
+
+    rows = queryset.filter(window)
+    limited = bool(group_fields and group_limit)
+    totals = {}
+    if limited:
+        top = queryset.filter(
+            **{f'{date_field}__gte': current_from, f'{date_field}__lt': current_to}
+        ).values(*group_fields).annotate(
+            amount=Sum(value_field)
+        ).order_by(F('amount').desc(nulls_last=True), *group_fields)[:group_limit]
+        keys = Q()
+        for row in top:
+            keys |= Q(**{field: row[field] for field in group_fields})
+        totals = {
+            row['segment']: row
+            for row in rows.annotate(segment=segment).values('segment').annotate(**measures).order_by()
+        }
+        rows = rows.filter(keys) if keys else rows.none()
+
+    rows = rows.annotate(
+        segment=segment,
+        period=_trunc(queryset, date_field, granularity)
+    ).values('segment', 'period', *group_fields).annotate(**measures).order_by()
+
+    by_segment = {'current': [], 'comparison': []}
+    for row in rows:
+        row['period'] = _period_key(row['period'], granularity)
+        by_segment[row['segment']].append(row)
+
+    current = _segment_result(
+        by_segment['current'], _buckets(start, end, granularity),
+        group_fields, measures, group_limit, totals.get('current', {}) if limited else None
+    )
+    comparison = None
+    if comparing:
+        # La comparación se limita a los mismos grupos que el rango actual
+        comparison = _segment_result(
+            by_segment['comparison'], _buckets(compare_start, compare_end, granularity),
+            group_fields, measures, None, totals.get('comparison', {}) if limited else None
+        )
+    return {'current': current, 'comparison': comparison}
@@ -0,0 +1,259 @@
+"""
+VALUATION_SERVICES.PY - Valorización del inventario al costo
+Mantiene por inventario un saldo valorizado (InventoryValuation) y, con el
+método FIFO, las capas de costo de cada entrada (InventoryCostLayer). Los
+saldos se actualizan al escribir los movimientos, por lo que los reportes
+leen valores precalculados; rebuild() los reconstruye desde el historial de
+movimientos recorriéndolo por lotes.
+
+Método según settings.INVENTORY_VALUATION_METHOD:
+- 'average': costo promedio ponderado (las salidas salen al promedio).
+- 'fifo': las salidas consumen las capas más antiguas primero.
+Las entradas sin unit_cost (devoluciones, ajustes) entran al costo promedio
+vigente o, sin saldo, a Product.cost.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.catalyst_app.models import (
+    Inventory, InventoryMovement, InventoryValuation, InventoryCostLayer
+)
+from apps.catalyst_app.models.branch import movement_delta
+
+
+REBUILD_CHUNK_SIZE = 500
+MOVEMENT_STREAM_CHUNK_SIZE = 2000
+
+COST_PLACES = Decimal('0.0001')
+ZERO = Decimal('0')
+
+
+def _cost(value):
+    return Decimal(value).quantize(COST_PLACES)
+
+
+def is_fifo():
+    return settings.INVENTORY_VALUATION_METHOD == 'fifo'
+
+
+class _Ledger:
+    """Saldo valorizado de un inventario mientras se aplican movimientos"""
+
+    def __init__(self, valuation, fallback_cost, layers=(), fifo=False):
+        self.valuation = valuation
+        self.fallback_cost = _cost(fallback_cost or 0)
+        self.fifo = fifo
+        self.layers = list(layers)
+        self.new_layers = []
+        self.changed_layers = {}
+
+    @property
+    def average_cost(self):
+        if self.valuation.quantity > 0:
+            return _cost(self.valuation.total_cost / self.valuation.quantity)
+        return _cost(self.valuation.average_cost or self.fallback_cost)
+
+    def receive(self, quantity, unit_cost, received_at, movement_id=None):
+        unit_cost = _cost(unit_cost) if unit_cost is not None else self.average_cost
+        self.valuation.quantity += quantity
+        self.valuation.total_cost = _cost(self.valuation.total_cost + unit_cost * quantity)
+        if self.fifo:
+            layer = InventoryCostLayer(
+                inventory_id=self.valuation.inventory_id, movement_id=movement_id,
+                quantity=quantity, quantity_remaining=quantity,
+                unit_cost=unit_cost, received_at=received_at
+            )
+            self.layers.append(layer)
+            self.new_layers.append(layer)
+
+    def issue(self, quantity):
+        """Descuenta unidades del saldo y retorna su costo"""
+        if self.fifo:
+            cost, pending = ZERO, quantity
+            for layer in self.layers:
+                if not pending:
+                    break
+                taken = min(layer.quantity_remaining, pending)
+                if not taken:
+                    continue
+                layer.quantity_remaining -= taken
+                pending -= taken
+                cost += layer.unit_cost * taken
+                if layer.pk is not None:
+                    self.changed_layers[layer.pk] = layer
+            self.layers = [layer for layer in self.layers if layer.quantity_remaining > 0]
+            # Stock sin capas (p. ej. editado a mano): sale al costo promedio
+            cost += self.average_cost * pending
+        elif quantity >= self.valuation.quantity:
+            cost = self.valuation.total_cost + self.average_cost * (quantity - self.valuation.quantity)
+        else:
+            cost = self.average_cost * quantity
+
+        cost = _cost(cost)
+        self.valuation.quantity = max(self.valuation.quantity - quantity, 0)
+        self.valuation.total_cost = (
+            max(_cost(self.valuation.total_cost - cost), ZERO) if self.valuation.quantity else ZERO
+        )
+        return cost
+
+    def apply(self, movement_type, quantity, unit_cost, created_at, movement_id=None):
+        if movement_delta(movement_type, quantity) < 0:
+            return self.issue(quantity)
+        self.receive(quantity, unit_cost, created_at, movement_id)
+        return None
+
+    def close(self):
+        self.valuation.average_cost = self.average_cost
+        self.valuation.updated_at = timezone.now()
+
+
+def _opening_ledger(inventory_id, quantity, fallback_cost, opened_at, fifo):
+    """Saldo inicial de un inventario sin valorizar: su stock a Product.cost"""
+    ledger = _Ledger(
+        InventoryValuation(inventory_id=inventory_id, average_cost=_cost(fallback_cost or 0)),
+        fallback_cost, fifo=fifo
+    )
+    if quantity > 0:
+        ledger.receive(quantity, fallback_cost or 0, opened_at)
+    return ledger
+
+
+def _save(ledgers):
+    created = [ledger.valuation for ledger in ledgers if ledger.valuation.pk is None]
+    updated = [ledger.valuation for ledger in ledgers if ledger.valuation.pk is not None]
+    InventoryValuation.objects.bulk_create(created)
+    InventoryValuation.objects.bulk_update(updated, ['quantity', 'total_cost', 'average_cost', 'updated_at'])
+    InventoryCostLayer.objects.bulk_create([layer for ledger in ledgers for layer in ledger.new_layers])
+    InventoryCostLayer.objects.bulk_update(
+        [layer for ledger in ledgers for layer in ledger.changed_layers.values()], ['quantity_remaining']
+    )
+
+
+def record_movements(movements):
+    """
+    Aplica a los saldos valorizados un lote de movimientos recién creados, en
+    orden. Debe llamarse en la misma transacción que actualizó el stock (las
+    filas de inventario ya están bloqueadas por ese UPDATE).
+    """
+    by_inventory = defaultdict(list)
+    for movement in movements:
+        by_inventory[movement.inventory_id].append(movement)
+    if not by_inventory:
+        return
+
+    fifo = is_fifo()
+    inventories = {
+        pk: (stock, cost, created_at)
+        for pk, stock, cost, created_at in Inventory.objects.filter(
+            pk__in=by_inventory
+        ).values_list('pk', 'stock', 'product__cost', 'created_at')
+    }
+    valuations = InventoryValuation.objects.in_bulk(list(by_inventory), field_name='inventory_id')
+    layers = defaultdict(list)
+    if fifo:
+        for layer in InventoryCostLayer.objects.filter(
+            inventory_id__in=list(valuations), quantity_remaining__gt=0
+        ).order_by('received_at', 'pk'):
+            layers[layer.inventory_id].append(layer)
+
+    ledgers = []
+    for inventory_id, inventory_movements in by_inventory.items():
+        stock, fallback_cost, created_at = inventories[inventory_id]
+        if inventory_id in valuations:
+            ledger = _Ledger(valuations[inventory_id], fallback_cost, layers[inventory_id], fifo)
+        else:
+            # Stock previo a estos movimientos, valorizado a Product.cost
+            net = sum(movement_delta(m.movement_type, m.quantity) for m in inventory_movements)
+            ledger = _opening_ledger(inventory_id, stock - net, fallback_cost, created_at, fifo)
+        for movement in inventory_movements:
+            ledger.apply(
+                movement.movement_type, movement.quantity, movement.unit_cost,
+                movement.created_at, movement.pk
+            )
+        ledger.close()
+        ledgers.append(ledger)
+    _save(ledgers)
+
+
+def average_costs(inventory_ids):
+    """Costo unitario promedio vigente por inventario ({id: costo})"""
+    costs = {
+        pk: _cost(cost or 0)
+        for pk, cost in Inventory.objects.filter(pk__in=inventory_ids).values_list('pk', 'product__cost')
+    }
+    for valuation in InventoryValuation.objects.filter(inventory_id__in=inventory_ids):
+        if valuation.quantity > 0:
+            costs[valuation.inventory_id] = _cost(valuation.total_cost / valuation.quantity)
+    return costs
+
+
+def _inventory_id_batches(company_id, chunk_size):
+    inventories = Inventory.objects.all()
+    if company_id is not None:
+        inventories = inventories.filter(branch__company_id=company_id)
+    last_id = 0
+    while True:
+        batch = list(inventories.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def _rebuild_batch(inventory_ids, fifo):
+    # Bloquear los inventarios evita que entren movimientos durante la reconstrucción
+    inventories = {
+        pk: (stock, cost, created_at)
+        for pk, stock, cost, created_at in Inventory.objects.select_for_update(of=('self',)).filter(
+            pk__in=inventory_ids
+        ).order_by('pk').values_list('pk', 'stock', 'product__cost', 'created_at')
+    }
+    movements = InventoryMovement.objects.filter(inventory_id__in=inventory_ids)
+
+    # El stock que no explican los movimientos es el saldo inicial
+    net = defaultdict(int)
+    for inventory_id, movement_type, quantity in movements.values_list(
+        'inventory_id', 'movement_type'
+    ).annotate(quantity=Sum('quantity')).order_by():
+        net[inventory_id] += movement_delta(movement_type, quantity)
+
+    ledgers = {
+        pk: _opening_ledger(pk, stock - net[pk], cost, created_at, fifo)
+        for pk, (stock, cost, created_at) in inventories.items()
+    }
+    for pk, inventory_id, movement_type, quantity, unit_cost, created_at in movements.order_by(
+        'inventory_id', 'created_at', 'pk'
+    ).values_list(
+        'pk', 'inventory_id', 'movement_type', 'quantity', 'unit_cost', 'created_at'
+    ).iterator(chunk_size=MOVEMENT_STREAM_CHUNK_SIZE):
+        ledgers[inventory_id].apply(movement_type, quantity, unit_cost, created_at, pk)
+
+    InventoryCostLayer.objects.filter(inventory_id__in=inventory_ids).delete()
+    InventoryValuation.objects.filter(inventory_id__in=inventory_ids).delete()
+    for ledger in ledgers.values():
+        ledger.close()
+        # Solo se guardan las capas con unidades pendientes
+        ledger.new_layers = [layer for layer in ledger.new_layers if layer.quantity_remaining > 0]
+        ledger.changed_layers = {}
+    _save(list(ledgers.values()))
+
+
+def rebuild(company_id=None, chunk_size=REBUILD_CHUNK_SIZE, on_progress=None):
+    """
+    Reconstruye saldos y capas desde el historial de movimientos, por lotes de
+    inventarios (una transacción por lote). Retorna la cantidad de inventarios.
+    """
+    fifo = is_fifo()
+    total = 0
+    for batch in _inventory_id_batches(company_id, chunk_size):
+        with transaction.atomic():
+            _rebuild_batch(batch, fifo)
+        total += len(batch)
+        if on_progress:
+            on_progress(total)
+    return total
@@ -1,81 +1,124 @@
 """
 SIGNALS.PY - Señales para manejo de eventos automáticos
 Crea automáticamente inventarios cuando se crean productos o sucursales
+y mantiene los acumulados diarios de ventas y el ranking de productos
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.db import transaction
-from apps.catalyst_app.models import Product, Inventory, Branch
+from apps.catalyst_app.models import (
+    Product, Inventory, Branch, Sale, SaleItem, Order, OrderItem, User
+)
+from apps.catalyst_app.services import (
+    rollup_services, dashboard_services, popularity_services, inventory_services
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Product)
-def create_inventory_for_product(sender, instance, created, **kwargs):
+def create_inventory_for_product(sender, instance, created, raw=False, **kwargs):
     """
     Cuando se crea un nuevo producto, crea automáticamente registros
     de inventario para todas las sucursales de la empresa.
     También se ejecuta para productos existentes para asegurar cobertura completa.
     """
+    if raw:
+        return
     try:
-        # Obtener todas las sucursales de la empresa
-        branches = Branch.objects.filter(company=instance.company)
-        
-        if not branches.exists():
-            logger.warning(f'No branches found for company {instance.company.id}')
-            return
-        
-        # Crear un registro de inventario para cada sucursal si no existe
-        for branch in branches:
-            try:
-                inventory, created_inv = Inventory.objects.get_or_create(
-                    product=instance,
-                    branch=branch,
-                    defaults={
-                        'stock': 0,
-                        'reorder_point': 10
-                    }
-                )
-                if created_inv:
-                    logger.info(f'Inventory created for product {instance.id} ({instance.sku}) in branch {branch.id}')
-            except Exception as e:
-                logger.error(f'Error creating inventory for product {instance.id} in branch {branch.id}: {str(e)}')
-                
+        inventory_services.provision_inventory(instance.company_id, product_ids=[instance.id])
     except Exception as e:
         logger.error(f'Error in create_inventory_for_product signal: {str(e)}')
 
 
 @receiver(post_save, sender=Branch)
-def create_inventory_for_branch(sender, instance, created, **kwargs):
+def create_inventory_for_branch(sender, instance, created, raw=False, **kwargs):
     """
     Cuando se crea una nueva sucursal, crea automáticamente registros
     de inventario para todos los productos existentes en la empresa
     """
-    if created:
+    if created and not raw:
         try:
-            # Obtener todos los productos de la empresa
-            products = Product.objects.filter(company=instance.company)
-            
-            if not products.exists():
-                logger.info(f'No products found for company {instance.company.id}')
-                return
-            
-            # Crear un registro de inventario para cada producto
-            for product in products:
-                try:
-                    inventory, created_inv = Inventory.objects.get_or_create(
-                        product=product,
-                        branch=instance,
-                        defaults={
-                            'stock': 0,
-                            'reorder_point': 10
-                        }
-                    )
-                    if created_inv:
-                        logger.info(f'Inventory created for branch {instance.id} ({instance.name}) with product {product.id}')
-                except Exception as e:
-                    logger.error(f'Error creating inventory for branch {instance.id} with product {product.id}: {str(e)}')
-                    
+            inventory_services.provision_inventory(instance.company_id, branch_ids=[instance.id])
         except Exception as e:
             logger.error(f'Error in create_inventory_for_branch signal: {str(e)}')
+
+
+@receiver(pre_save, sender=Sale)
+@receiver(pre_save, sender=SaleItem)
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=OrderItem)
+def capture_rollup_state(sender, instance, raw=False, **kwargs):
+    """
+    Guarda el estado previo de la venta/orden/item para calcular
+    el delta que se aplicará a los acumulados diarios
+    """
+    if raw:
+        return
+    instance._rollup_previous = rollup_services.snapshot(instance)
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_save, sender=SaleItem)
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=OrderItem)
+def update_sales_rollups(sender, instance, created, raw=False, **kwargs):
+    """
+    Aplica a los acumulados diarios el cambio de la venta/orden/item.
+    Las vistas que escriben ventas u órdenes lo hacen dentro de una transacción,
+    por lo que el acumulado se actualiza en la misma transacción que el registro.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    current = rollup_services.record_saved(instance, previous)
+    if sender in (SaleItem, OrderItem):
+        popularity_services.record_item_change(previous, current)
+    instance._rollup_previous = None
+
+
+@receiver(pre_delete, sender=Sale)
+@receiver(pre_delete, sender=SaleItem)
+@receiver(pre_delete, sender=Order)
+@receiver(pre_delete, sender=OrderItem)
+def discount_sales_rollups(sender, instance, **kwargs):
+    """Descuenta de los acumulados la venta/orden/item eliminado (incluye cascadas)"""
+    previous = rollup_services.record_deleted(instance)
+    if sender in (SaleItem, OrderItem):
+        popularity_services.record_item_change(previous, None)
+        instance._rollup_deleted = previous
+
+
+@receiver(post_delete, sender=SaleItem)
+@receiver(post_delete, sender=OrderItem)
+def recount_sales_rollups(sender, instance, **kwargs):
+    """
+    Recuenta las ventas/órdenes distintas del producto una vez eliminado el
+    item (en una cascada los items se eliminan antes que la venta/orden)
+    """
+    rollup_services.recount_deleted_item(getattr(instance, '_rollup_deleted', None))
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Branch)
+@receiver(post_save, sender=Inventory)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Sale)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Branch)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_delete, sender=User)
+def invalidate_dashboard_metrics(sender, instance, raw=False, **kwargs):
+    """
+    Incrementa la versión de datos de la empresa para invalidar
+    las métricas cacheadas del dashboard admin
+    """
+    if raw:
+        return
+    dashboard_services.bump_tenant_version(dashboard_services.company_id_for(instance))
@@ -140,10 +140,7 @@ def dashboard_view(request):
     elif request.user.role in ['gerente']:
         return redirect('catalyst_app:dashboard-gerente')
     elif request.user.role == 'super_admin' or request.user.role == 'admin_cliente':
-        from django.db.models import Count, Sum, Q
-        from datetime import timedelta
-        from apps.catalyst_app.models import Product, Branch, Order
-        from apps.catalyst_app.models.branch import Inventory
+        from apps.catalyst_app.services.dashboard_services import get_admin_metrics
         
         company = request.user.company
         
@@ -154,105 +151,11 @@ def dashboard_view(request):
             'max_users': company.subscription.get_max_users() if hasattr(company, 'subscription') else 2,
         }
         
-        # Contar productos
-        context['product_count'] = Product.objects.filter(company=company).count()
-        
-        # Contar usuarios
-        context['user_count'] = User.objects.filter(company=company).count()
-        
-        # Contar sucursales
-        context['branch_count'] = Branch.objects.filter(company=company).count()
-        
-        # Contar órdenes
-        context['order_count'] = Order.objects.filter(company=company).count()
-        context['pending_orders'] = Order.objects.filter(
-            company=company,
-            status__in=['pending', 'processing']
-        ).count()
-        
-        # Total de ventas
-        sales_total = Order.objects.filter(
-            company=company,
-            status='entregada'
-        ).aggregate(total=Sum('total'))['total'] or 0
-        context['total_sales'] = f"{sales_total:.2f}"
-        
-        # Total inventario
-        inventory_total = Inventory.objects.filter(
-            branch__company=company
-        ).aggregate(total=Sum('stock'))['total'] or 0
-        context['total_inventory'] = inventory_total
-        
-        # Gráfico de ventas (últimos 7 días)
-        from django.utils.timezone import now
-        seven_days_ago = now().date() - timedelta(days=7)
-        sales_by_date = Order.objects.filter(
-            company=company,
-            status='entregada',
-            created_at__date__gte=seven_days_ago
-        ).extra(
-            select={'date': 'DATE(created_at)'}
-        ).values('date').annotate(
-            amount=Sum('total')
-        ).order_by('date')
-        
-        context['sales_data'] = []
-        for item in sales_by_date:
-            context['sales_data'].append({
-                'date': item['date'].strftime('%a') if item['date'] else '',
-                'amount': float(item['amount'] or 0)
-            })
-        context['sales_data'] = str(context['sales_data']).replace("'", '"')
-        
-        # Top 5 productos
-        products_top = Product.objects.filter(
-            company=company
-        ).annotate(
-            sales_count=Count('order_items')
-        ).order_by('-sales_count')[:5]
-        
-        context['products_data'] = []
-        for prod in products_top:
-            context['products_data'].append({
-                'name': prod.name,
-                'sales': prod.sales_count
-            })
-        context['products_data'] = str(context['products_data']).replace("'", '"')
-        
-        # Estado de órdenes
-        orders_status = Order.objects.filter(
-            company=company
-        ).values('status').annotate(count=Count('id'))
-        
-        context['orders_data'] = []
-        status_map = {
-            'pendiente': 'Pendientes',
-            'confirmada': 'Confirmadas',
-            'preparando': 'Preparando',
-            'enviada': 'Enviadas',
-            'entregada': 'Entregadas',
-            'cancelada': 'Canceladas'
-        }
-        for status in orders_status:
-            context['orders_data'].append({
-                'status': status_map.get(status['status'], status['status']),
-                'count': status['count']
-            })
-        context['orders_data'] = str(context['orders_data']).replace("'", '"')
-        
-        # Ingresos por sucursal (simplificado - top 5 sucursales por ID)
-        context['branches_data'] = []
-        top_branches = Branch.objects.filter(
-            company=company,
-            is_active=True
-        ).order_by('-created_at')[:5]
-        
-        for branch in top_branches:
-            context['branches_data'].append({
-                'name': branch.name,
-                'revenue': 0.0  # Simulado: sin órdenes asociadas directamente
-            })
-        context['branches_data'] = str(context['branches_data']).replace("'", '"')
+        # Métricas cacheadas por empresa (se invalidan al escribir datos de la empresa)
+        # Los datos de gráficos se serializan en la plantilla con json_script
+        version, metrics = get_admin_metrics(company)
+        context.update(metrics)
+        context['total_sales'] = f"{metrics['total_sales']:.2f}"
         
         # Actividad reciente (simulada porque no tenemos modelo Activity)
         context['recent_activities'] = []
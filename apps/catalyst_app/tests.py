@@ -1,3 +1,616 @@
-from django.test import TestCase
+"""
+TESTS.PY - Pruebas de la app catalyst_app
+"""
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from apps.catalyst_app.exceptions import InsufficientStock
+from apps.catalyst_app.models import (
+    Company, Branch, Product, Inventory, InventoryMovement, User, Sale, SaleItem,
+    Order, OrderItem, Supplier, Purchase, PurchaseItem, ProductSalesDailyRollup, ProductPopularity,
+    ShoppingCart, CartItem
+)
+from apps.catalyst_app.services.checkout_services import checkout
+from apps.catalyst_app.services.dashboard_services import compute_admin_metrics
+from apps.catalyst_app.services.fanout_services import run_parallel
+from apps.catalyst_app.services.inventory_services import (
+    apply_movements_bulk, apply_stock_delta, transfer_stock
+)
+from apps.catalyst_app.services.snapshot_services import take_snapshots, with_stock_as_of
+from apps.catalyst_app.services.popularity_services import refresh_company
+from apps.catalyst_app.services.rollup_services import rebuild_rollups
+from apps.catalyst_app.services.stats_services import bucket_count, iter_buckets
+
+
+# SQLite serializa las escrituras y bloquea la base completa: las pruebas
+# concurrentes solo tienen sentido sobre PostgreSQL
+concurrent_db = skipIf(connection.vendor == 'sqlite', 'Requiere una base con escrituras concurrentes')
+
+
+def run_concurrently(function, arguments):
+    """
+    Ejecuta function(*args) en un hilo por elemento de arguments, todos
+    liberados a la vez. Retorna [(resultado, excepción)] en el mismo orden.
+    """
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+
+    def worker(index, args):
+        try:
+            barrier.wait()
+            results[index] = (function(*args), None)
+        except Exception as e:
+            results[index] = (None, e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index, args)) for index, args in enumerate(arguments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class CatalystFixtureMixin:
+    """Empresa con sucursales, productos (con inventario por sucursal) y un admin"""
+
+    def create_company(self, products=2, branches=1):
+        self.company = Company.objects.create(name='Acme', rut='111111111', email='acme@example.com')
+        self.user = User.objects.create_user(
+            'admin', 'admin@example.com', 'pw', company=self.company, role='admin_cliente'
+        )
+        self.branches = [
+            Branch.objects.create(company=self.company, name=f'Sucursal {i}', address='Calle 1')
+            for i in range(branches)
+        ]
+        self.products = [
+            Product.objects.create(
+                company=self.company, sku=f'SKU{i}', name=f'Producto {i}',
+                price=Decimal('10.00'), cost=Decimal('5.00')
+            )
+            for i in range(products)
+        ]
+
+    def inventory(self, product, branch):
+        return Inventory.objects.get(product=product, branch=branch)
+
+    def set_stock(self, inventory, stock):
+        Inventory.objects.filter(pk=inventory.pk).update(stock=stock)
+
+
+@concurrent_db
+class StockDeltaConcurrencyTests(CatalystFixtureMixin, TransactionTestCase):
+    """Salidas simultáneas sobre la misma fila de inventario"""
+    INITIAL_STOCK = 10
+    THREADS = 12
+    QUANTITY = 3
+
+    def setUp(self):
+        self.create_company(products=1)
+        self.stock = self.inventory(self.products[0], self.branches[0])
+        self.set_stock(self.stock, self.INITIAL_STOCK)
+
+    def watch_stock(self, stop):
+        """Registra el stock mientras corren las salidas"""
+        seen = []
+
+        def watch():
+            try:
+                while not stop.is_set():
+                    seen.append(Inventory.objects.values_list('stock', flat=True).get(pk=self.stock.pk))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=watch)
+        thread.start()
+        return thread, seen
+
+    def assert_consistent(self, successes, seen):
+        final = Inventory.objects.values_list('stock', flat=True).get(pk=self.stock.pk)
+        self.assertEqual(final, self.INITIAL_STOCK - successes * self.QUANTITY)
+        self.assertEqual(successes, self.INITIAL_STOCK // self.QUANTITY)
+        self.assertGreaterEqual(min(seen + [final]), 0)
+
+    def test_apply_stock_delta(self):
+        stop = threading.Event()
+        watcher, seen = self.watch_stock(stop)
+        try:
+            results = run_concurrently(
+                apply_stock_delta,
+                [(self.stock.pk, -self.QUANTITY, self.company.id)] * self.THREADS
+            )
+        finally:
+            stop.set()
+            watcher.join()
+
+        errors = [error for _, error in results if error is not None]
+        for error in errors:
+            self.assertIsInstance(error, InsufficientStock)
+        self.assert_consistent(len(results) - len(errors), seen)
+
+    def test_post_salida(self):
+        def post():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            return client.post('/api/inventory-movements/', {
+                'inventory': self.stock.pk,
+                'movement_type': 'salida',
+                'quantity': self.QUANTITY,
+                'reference': 'stress',
+            }, format='json').status_code
+
+        stop = threading.Event()
+        watcher, seen = self.watch_stock(stop)
+        try:
+            results = run_concurrently(post, [()] * self.THREADS)
+        finally:
+            stop.set()
+            watcher.join()
+
+        self.assertEqual([error for _, error in results if error is not None], [])
+        codes = [code for code, _ in results]
+        self.assertEqual(set(codes) - {201, 409}, set())
+        successes = codes.count(201)
+        self.assert_consistent(successes, seen)
+        self.assertEqual(
+            InventoryMovement.objects.filter(inventory=self.stock, movement_type='salida').count(),
+            successes
+        )
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class CrossingTransferConcurrencyTests(CatalystFixtureMixin, TransactionTestCase):
+    """Transferencias simultáneas A->B y B->A sobre los mismos productos"""
+    INITIAL_STOCK = 100
+    THREADS = 8
+    ROUNDS = 5
+
+    def setUp(self):
+        self.create_company(products=3, branches=2)
+        for product in self.products:
+            for branch in self.branches:
+                self.set_stock(self.inventory(product, branch), self.INITIAL_STOCK)
+
+    def test_crossing_transfers(self):
+        a, b = self.branches
+        forward = [{'product': product.id, 'quantity': 2} for product in self.products]
+        # Las líneas en orden inverso fuerzan órdenes de bloqueo opuestos si no se ordenaran por id
+        backward = [{'product': product.id, 'quantity': 3} for product in reversed(self.products)]
+        arguments = [
+            (self.company.id, self.user, a.id, b.id, forward) if index % 2 == 0
+            else (self.company.id, self.user, b.id, a.id, backward)
+            for index in range(self.THREADS)
+        ]
+
+        for _ in range(self.ROUNDS):
+            results = run_concurrently(transfer_stock, arguments)
+            self.assertEqual([error for _, error in results if error is not None], [])
+            self.assertEqual([result[2] for result, _ in results], [[]] * self.THREADS)
+
+        for product in self.products:
+            stocks = Inventory.objects.filter(product=product).values_list('stock', flat=True)
+            self.assertEqual(sum(stocks), self.INITIAL_STOCK * len(self.branches))
+            self.assertGreaterEqual(min(stocks), 0)
+        self.assertEqual(
+            InventoryMovement.objects.count(),
+            self.ROUNDS * self.THREADS * len(self.products) * 2
+        )
+
+
+class TransferStockTests(CatalystFixtureMixin, TestCase):
+    """Una transferencia rechazada no deja cambios, tampoco inventarios creados en destino"""
+
+    def setUp(self):
+        self.create_company(products=2, branches=2)
+        self.source, self.destination = self.branches
+        self.product = self.products[0]
+        self.set_stock(self.inventory(self.product, self.source), 5)
+        self.inventory(self.product, self.destination).delete()
+
+    def transfer(self, lines):
+        return transfer_stock(self.company.id, self.user, self.source.id, self.destination.id, lines)
+
+    def destination_exists(self):
+        return Inventory.objects.filter(product=self.product, branch=self.destination).exists()
+
+    def test_insufficient_stock_rolls_back_provisioning(self):
+        _, movements, errors = self.transfer([{'product': self.product.id, 'quantity': 6}])
+        self.assertEqual(movements, [])
+        self.assertEqual(errors, [{'index': 0, 'error': 'Stock insuficiente'}])
+        self.assertFalse(self.destination_exists())
+        self.assertEqual(self.inventory(self.product, self.source).stock, 5)
+
+    def test_missing_source_inventory_does_not_provision(self):
+        self.inventory(self.products[1], self.source).delete()
+        _, _, errors = self.transfer([
+            {'product': self.product.id, 'quantity': 1},
+            {'product': self.products[1].id, 'quantity': 1},
+        ])
+        self.assertEqual(errors, [{'index': 1, 'error': 'Producto sin inventario en la sucursal de origen'}])
+        self.assertFalse(self.destination_exists())
+
+    def test_transfer_provisions_destination(self):
+        _, movements, errors = self.transfer([{'product': self.product.id, 'quantity': 2}])
+        self.assertEqual(errors, [])
+        self.assertEqual(len(movements), 2)
+        self.assertEqual(self.inventory(self.product, self.source).stock, 3)
+        self.assertEqual(self.inventory(self.product, self.destination).stock, 2)
+
+
+class ListQueryCountTests(CatalystFixtureMixin, TestCase):
+    """
+    Las consultas de los listados no dependen del tamaño de la página
+    (page_size=1 y una página con todas las filas), tampoco con ?fields= / ?expand=.
+    """
+    client_class = APIClient
+    ROWS = 4
+    LARGE_PAGE = 100
+
+    def setUp(self):
+        self.create_company(products=3, branches=2)
+        supplier = Supplier.objects.create(company=self.company, name='Proveedor', rut='222222222')
+        for i in range(self.ROWS):
+            branch = self.branches[i % 2]
+            seller = User.objects.create_user(
+                f'vendedor{i}', f'vendedor{i}@example.com', 'pw', company=self.company, role='vendedor'
+            )
+            cart = ShoppingCart.objects.create(user=seller, company=self.company)
+            sale = Sale.objects.create(
+                branch=branch, seller=self.user, receipt_number=f'R{i}',
+                subtotal=Decimal('20.00'), total=Decimal('20.00'), payment_method='efectivo'
+            )
+            order = Order.objects.create(
+                company=self.company, user=self.user, order_number=f'O{i}', customer_name='Cliente',
+                customer_email='cliente@example.com', shipping_address='Calle 2',
+                subtotal=Decimal('20.00'), total=Decimal('20.00')
+            )
+            purchase = Purchase.objects.create(
+                supplier=supplier, branch=branch, invoice_number=f'F{i}',
+                purchase_date=timezone.localdate(), total_amount=Decimal('10.00')
+            )
+            for product in self.products[:2]:
+                SaleItem.objects.create(
+                    sale=sale, product=product, quantity=1, unit_price=product.price, subtotal=product.price
+                )
+                OrderItem.objects.create(
+                    order=order, product=product, quantity=1, unit_price=product.price, subtotal=product.price
+                )
+                PurchaseItem.objects.create(
+                    purchase=purchase, product=product, quantity=1, unit_price=product.cost, subtotal=product.cost
+                )
+                CartItem.objects.create(cart=cart, product=product, quantity=2)
+            InventoryMovement.objects.create(
+                inventory=self.inventory(self.products[i % 3], branch), movement_type='entrada',
+                quantity=5, user=self.user
+            )
+
+    # Base: user.company, COUNT de la paginación y la página (relaciones con
+    # select_related). ?expand=items suma el prefetch de items y de sus productos
+    def assert_list_queries(self, url, expected):
+        for page_size in (1, self.LARGE_PAGE):
+            # Usuario recién leído, como en un request real (sin relaciones en cache)
+            self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+            with self.subTest(url=url, page_size=page_size), \
+                    mock.patch.object(PageNumberPagination, 'page_size', page_size):
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), min(page_size, response.data['count']))
+                self.assertGreaterEqual(response.data['count'], self.ROWS)
+
+    def test_sales(self):
+        self.assert_list_queries('/api/sales/', 3)
+        self.assert_list_queries('/api/sales/?fields=id,total,branch_name', 3)
+        self.assert_list_queries('/api/sales/?expand=items', 5)
+
+    def test_inventory_movements(self):
+        self.assert_list_queries('/api/inventory-movements/', 3)
+        self.assert_list_queries('/api/inventory-movements/?fields=id,quantity,product_name', 3)
+
+    def test_inventory(self):
+        self.assert_list_queries('/api/inventory/', 3)
+        self.assert_list_queries('/api/inventory/?fields=id,stock,product_name', 3)
+
+    def test_purchases(self):
+        self.assert_list_queries('/api/purchases/', 3)
+        self.assert_list_queries('/api/purchases/?fields=id,total_amount,supplier_name', 3)
+        self.assert_list_queries('/api/purchases/?expand=items,supplier', 5)
+
+    def test_orders(self):
+        self.assert_list_queries('/api/orders/', 3)
+        self.assert_list_queries('/api/orders/?fields=id,total', 3)
+        self.assert_list_queries('/api/orders/?expand=items', 5)
+
+    def test_users(self):
+        self.assert_list_queries('/api/users/', 3)
+        self.assert_list_queries('/api/users/?fields=id,username', 3)
+        self.assert_list_queries('/api/users/?expand=company', 3)
+
+    def test_carts(self):
+        # Solo super_admin lista carros de otros usuarios (sin consultar user.company);
+        # total y total_items salen de la anotación CART_TOTALS
+        User.objects.filter(pk=self.user.pk).update(role='super_admin')
+        self.assert_list_queries('/api/carts/', 4)
+        self.assert_list_queries('/api/carts/?fields=id,total,total_items', 2)
+        self.assert_list_queries('/api/carts/?fields=id,items', 4)
+
+
+class ShoppingCartTests(CatalystFixtureMixin, TestCase):
+    """Las respuestas de update del carro coinciden con las de retrieve"""
+    client_class = APIClient
+
+    def setUp(self):
+        self.create_company(products=2)
+        self.cart = ShoppingCart.objects.create(user=self.user, company=self.company)
+        for quantity, product in enumerate(self.products, start=1):
+            CartItem.objects.create(cart=self.cart, product=product, quantity=quantity)
+        self.client.force_authenticate(self.user)
+
+    def test_update_matches_retrieve(self):
+        url = f'/api/carts/{self.cart.pk}/'
+        for method in ('patch', 'put'):
+            with self.subTest(method=method):
+                # Carro anotado, validación de user (existe y único), UPDATE, items y productos
+                with self.assertNumQueries(6):
+                    response = getattr(self.client, method)(url, {'user': self.user.pk}, format='json')
+                self.assertEqual(response.status_code, 200)
+                retrieved = self.client.get(url).data
+                self.assertEqual(response.data, retrieved)
+                self.assertEqual(response.data['total_items'], 3)
+                self.assertEqual(response.data['total'], '30.00')
+
+
+class ProductSalesRollupTests(CatalystFixtureMixin, TestCase):
+    """sales_count cuenta ventas distintas con el producto, no líneas"""
+
+    def setUp(self):
+        self.create_company(products=2)
+        self.product, self.other = self.products
+
+    def create_sale(self, receipt_number, products):
+        sale = Sale.objects.create(
+            branch=self.branches[0], seller=self.user, receipt_number=receipt_number,
+            subtotal=Decimal('10.00'), total=Decimal('10.00'), payment_method='efectivo'
+        )
+        return sale, [
+            SaleItem.objects.create(
+                sale=sale, product=product, quantity=1, unit_price=product.price, subtotal=product.price
+            )
+            for product in products
+        ]
+
+    def counts(self, product):
+        return list(
+            ProductSalesDailyRollup.objects.filter(product=product, line_count__gt=0)
+            .values_list('line_count', 'sales_count')
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = {product.pk: self.counts(product) for product in self.products}
+        rebuild_rollups(self.company.id)
+        self.assertEqual({product.pk: self.counts(product) for product in self.products}, incremental)
+
+    def test_two_lines_of_one_sale_count_once(self):
+        sale, items = self.create_sale('R1', [self.product, self.product, self.other])
+        self.create_sale('R2', [self.product])
+        self.assertEqual(self.counts(self.product), [(3, 2)])
+        self.assert_matches_rebuild()
+
+        items[0].delete()
+        self.assertEqual(self.counts(self.product), [(2, 2)])
+        items[1].product = self.other
+        items[1].save()
+        self.assertEqual(self.counts(self.product), [(1, 1)])
+        self.assertEqual(self.counts(self.other), [(2, 1)])
+        self.assert_matches_rebuild()
+
+    def test_cascade_delete(self):
+        sale, _ = self.create_sale('R1', [self.product, self.product])
+        self.create_sale('R2', [self.product])
+        sale.delete()
+        self.assertEqual(self.counts(self.product), [(1, 1)])
+        self.assert_matches_rebuild()
+
+
+class CheckoutTests(CatalystFixtureMixin, TestCase):
+    """Checkout POS: respuesta y consultas que no crecen con la cantidad de líneas"""
+
+    def setUp(self):
+        self.create_company(products=10)
+        for product in self.products:
+            self.set_stock(self.inventory(product, self.branches[0]), 100)
+        # Crea el acumulado diario de ventas (primera venta del día)
+        self.checkout(self.products[9:])
+
+    def checkout(self, products):
+        sale, _, errors = checkout(
+            self.user, self.branches[0].pk,
+            [{'product': product.pk, 'quantity': 2} for product in products],
+            [{'payment_method': 'efectivo', 'amount': Decimal('1000')}]
+        )
+        self.assertEqual(errors, [])
+        return sale
+
+    def assert_constant_queries(self, few, many):
+        with CaptureQueriesContext(connection) as queries:
+            self.checkout(few)
+        with self.assertNumQueries(len(queries)):
+            self.checkout(many)
+
+    def snapshot(self, model, *fields):
+        return set(model.objects.values_list('product_id', *fields))
+
+    def test_queries_do_not_grow_with_lines(self):
+        p = self.products
+        # Productos sin acumulados ni ranking todavía
+        self.assert_constant_queries(p[:1], p[1:5])
+        # Filas existentes (con líneas repetidas)
+        self.assert_constant_queries(p[:1], p[1:5] + p[1:5])
+        # Mezcla de productos con y sin filas
+        self.assert_constant_queries([p[0], p[5]], p[1:5] + p[6:9])
+
+        rollups = self.snapshot(ProductSalesDailyRollup, 'quantity', 'revenue', 'line_count', 'sales_count')
+        rebuild_rollups(self.company.id)
+        self.assertEqual(
+            self.snapshot(ProductSalesDailyRollup, 'quantity', 'revenue', 'line_count', 'sales_count'), rollups
+        )
+        popularity = self.snapshot(ProductPopularity, 'channel', 'units_7d', 'orders_7d', 'units_365d')
+        refresh_company(self.company.id)
+        self.assertEqual(
+            self.snapshot(ProductPopularity, 'channel', 'units_7d', 'orders_7d', 'units_365d'), popularity
+        )
+
+    def test_checkout_response_includes_items(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/pos/checkout/', {
+            'branch': self.branches[0].pk,
+            'items': [{'product': product.pk, 'quantity': 1} for product in self.products[:3]],
+            'payments': [{'payment_method': 'efectivo', 'amount': '100.00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [item['product'] for item in response.data['items']],
+            [product.pk for product in self.products[:3]]
+        )
+        self.assertEqual(response.data['items'][0]['product_name'], 'Producto 0')
+        self.assertEqual(response.data['change'], '64.30')
+
+
+class AdminDashboardTests(CatalystFixtureMixin, TestCase):
+    """Dashboard admin (plantilla) con y sin empresa asignada"""
+
+    def test_super_admin_without_company(self):
+        user = User.objects.create_user('root', 'root@example.com', 'pw', role='super_admin')
+        self.client.force_login(user)
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['product_count'], 0)
+        self.assertEqual(response.context['total_sales'], '0.00')
+
+    def test_admin_with_company(self):
+        self.create_company()
+        self.client.force_login(self.user)
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['product_count'], 2)
+
+
+class SalesAnalyticsRangeTests(CatalystFixtureMixin, TestCase):
+    """Validación de rangos de /api/analytics/sales/"""
+
+    client_class = APIClient
+
+    def setUp(self):
+        self.create_company()
+        self.client.force_authenticate(self.user)
+
+    def test_out_of_range_dates_are_rejected(self):
+        for query in ('to=9999-12-31', 'from=0001-01-01&compare=previous', 'to=2026-02-30'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/analytics/sales/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+
+    def test_too_many_buckets(self):
+        response = self.client.get('/api/analytics/sales/?from=2000-01-01&to=2099-12-31')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bucket_count_matches_iteration(self):
+        start = date(2023, 12, 30)
+        for granularity in ('day', 'week', 'month', 'quarter', 'year'):
+            for days in (0, 1, 6, 7, 31, 95, 400, 800):
+                end = start + timedelta(days=days)
+                with self.subTest(granularity=granularity, days=days):
+                    self.assertEqual(
+                        bucket_count(start, end, granularity),
+                        sum(1 for _ in iter_buckets(start, end, granularity))
+                    )
+
+
+@override_settings(QUERY_FANOUT_MAX_WORKERS=2)
+class FanoutTests(CatalystFixtureMixin, TransactionTestCase):
+    """
+    Ejecución concurrente real: fuera de una transacción run_parallel usa hilos
+    (TestCase envuelve cada prueba en una transacción y lo forzaría a serie).
+    """
+
+    def setUp(self):
+        self.create_company()
+
+    def test_bounded_per_call_and_connections_closed(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        used = []
+
+        def task():
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            try:
+                threading.Event().wait(0.05)
+                count = Product.objects.filter(company=self.company).count()
+                used.append((threading.current_thread(), connections['default']))
+                return count
+            finally:
+                with lock:
+                    state['running'] -= 1
+
+        results = run_parallel({f'task{i}': task for i in range(5)})
+
+        self.assertEqual(results, {f'task{i}': 2 for i in range(5)})
+        self.assertEqual(state['peak'], 2)
+        threads = {thread for thread, _ in used}
+        self.assertNotIn(threading.current_thread(), threads)
+        # Cada hilo cerró su conexión al terminar la tarea
+        self.assertTrue(all(conn.connection is None for _, conn in used))
+
+    def test_admin_metrics_match_serial(self):
+        parallel = compute_admin_metrics(self.company)
+        with override_settings(QUERY_FANOUT_MAX_WORKERS=1):
+            serial = compute_admin_metrics(self.company)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel['product_count'], 2)
+
+
+class InventorySnapshotTests(CatalystFixtureMixin, TestCase):
+    """Stock a una fecha a partir de fotos y movimientos"""
+
+    def setUp(self):
+        self.create_company(products=1)
+        self.inv = self.inventory(self.products[0], self.branches[0])
+        self.set_stock(self.inv, 10)
+
+    def stock_as_of(self, as_of):
+        return with_stock_as_of(Inventory.objects.filter(pk=self.inv.pk), as_of).get().stock_as_of
+
+    def test_movements_after_snapshot_count_once(self):
+        self.assertEqual(take_snapshots(self.company.id), 1)
+        apply_movements_bulk(self.company.id, self.user, [
+            {'inventory': self.inv.pk, 'movement_type': 'salida', 'quantity': 3},
+            {'inventory': self.inv.pk, 'movement_type': 'entrada', 'quantity': 5},
+        ])
+        self.assertEqual(self.stock_as_of(timezone.now()), 12)
+        # Repetir la foto el mismo día la reemplaza con el stock actual
+        self.assertEqual(take_snapshots(self.company.id), 1)
+        self.assertEqual(self.stock_as_of(timezone.now()), 12)
+
+    def test_invalid_at_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for value in ('2026-02-30T10:00', '9999-12-31', 'ayer'):
+            with self.subTest(at=value):
+                response = client.get('/api/inventory/as-of/', {'at': value})
+                self.assertEqual(response.status_code, 400)
+        response = client.get('/api/inventory/as-of/', {'at': timezone.localdate().isoformat()})
+        self.assertEqual(response.status_code, 200)
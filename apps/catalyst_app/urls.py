@@ -9,7 +9,10 @@ from apps.catalyst_app.views.movement_views import InventoryMovementViewSet
 from apps.catalyst_app.views.supplier_views import SupplierViewSet, PurchaseViewSet
 from apps.catalyst_app.views.sales_views import SaleViewSet
 from apps.catalyst_app.views.branch_views import OrderViewSet, ShoppingCartViewSet
-from apps.catalyst_app.views.stats_views import vendor_stats, manager_stats
+from apps.catalyst_app.views.stats_views import vendor_stats, manager_stats, query_budget_stats
+from apps.catalyst_app.views.dashboard_views import admin_summary
+from apps.catalyst_app.views.analytics_views import sales_analytics
+from apps.catalyst_app.views.pos_views import pos_checkout
 from apps.catalyst_app.template_views import (
     index_view, dashboard_view, login_view, register_view, logout_view, planes_view, error_view,
     productos_view, usuarios_view, ventas_view, ordenes_view,
@@ -42,14 +45,18 @@ urlpatterns = [
     path('schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='catalyst_app:schema'), name='swagger-ui'),
     path('schema/redoc/', SpectacularRedocView.as_view(url_name='catalyst_app:schema'), name='redoc'),
     
+    # Stats endpoints (antes del router para que no los capture la ruta de detalle de ventas)
+    path('sales/vendor-stats/', vendor_stats, name='vendor-stats'),
+    path('sales/manager-stats/', manager_stats, name='manager-stats'),
+    path('stats/query-budgets/', query_budget_stats, name='query-budget-stats'),
+    path('dashboard/admin-summary/', admin_summary, name='dashboard-admin-summary'),
+    path('analytics/sales/', sales_analytics, name='analytics-sales'),
+    path('pos/checkout/', pos_checkout, name='pos-checkout'),
+    
     # API Routes
     path('', include(router.urls)),
     path('auth/', include('rest_framework.urls')),
     
-    # Stats endpoints
-    path('sales/vendor-stats/', vendor_stats, name='vendor-stats'),
-    path('sales/manager-stats/', manager_stats, name='manager-stats'),
-    
     # Template Routes (HTML Pages)
     path('', index_view, name='index'),
     path('dashboard/', dashboard_view, name='dashboard'),
@@ -0,0 +1,178 @@
+"""
+ANALYTICS_VIEWS.PY - Analítica de ventas POS con rangos y granularidades arbitrarias
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Sum, Count
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from apps.catalyst_app.models import Sale, SaleItem
+from apps.catalyst_app.services.stats_services import (
+    ANALYTICS_GRANULARITIES, sales_breakdown, bucket_count, percentage_change
+)
+
+
+# group_by -> (nivel de la consulta, campos de agrupación)
+GROUP_BY_FIELDS = {
+    'branch': ('sale', ('branch_id', 'branch__name')),
+    'seller': ('sale', ('seller_id', 'seller__username')),
+    'payment_method': ('sale', ('payment_method',)),
+    'product': ('item', ('product_id', 'product__name')),
+    'category': ('item', ('product__category',)),
+}
+
+COMPARE_MODES = ('previous', 'previous_year')
+
+DEFAULT_RANGE_DAYS = 30
+DEFAULT_GROUP_LIMIT = 10
+MAX_GROUP_LIMIT = 50
+
+# Fechas aceptadas: fuera de este rango la aritmética de fechas (comparaciones,
+# límites del día) podría desbordar date.min/date.max
+MIN_DATE = date(2000, 1, 1)
+MAX_DATE = date(2099, 12, 31)
+
+
+def _parse_date(value, name):
+    try:
+        day = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} debe tener formato YYYY-MM-DD')
+    if not MIN_DATE <= day <= MAX_DATE:
+        raise ValueError(f'{name} debe estar entre {MIN_DATE} y {MAX_DATE}')
+    return day
+
+
+def _shift_year(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # 29 de febrero en un año no bisiesto
+        return day.replace(year=day.year + years, day=28)
+
+
+def _comparison_range(params, start, end):
+    """Rango de comparación según compare o compare_from/compare_to"""
+    if params.get('compare_from') or params.get('compare_to'):
+        return (
+            _parse_date(params.get('compare_from'), 'compare_from'),
+            _parse_date(params.get('compare_to'), 'compare_to'),
+        )
+    mode = params.get('compare')
+    if not mode:
+        return None, None
+    if mode not in COMPARE_MODES:
+        raise ValueError(f'compare debe ser uno de: {", ".join(COMPARE_MODES)}')
+    if mode == 'previous_year':
+        return _shift_year(start, -1), _shift_year(end, -1)
+    previous_end = start - timedelta(days=1)
+    return previous_end - (end - start), previous_end
+
+
+def _scoped(queryset, user, prefix=''):
+    """Limita las ventas a las visibles para el usuario"""
+    if user.is_super_admin():
+        return queryset
+    if user.is_vendedor():
+        return queryset.filter(**{f'{prefix}seller': user})
+    if user.company:
+        return queryset.filter(**{f'{prefix}branch__company': user.company})
+    return queryset.none()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sales_analytics(request):
+    """
+    Analítica de ventas POS.
+    Parámetros: from, to (YYYY-MM-DD, inclusive), granularity
+    (hour, day, week, month, quarter, year), group_by (branch, seller,
+    payment_method, product, category), compare (previous, previous_year)
+    o compare_from/compare_to, limit (cantidad de grupos).
+    """
+    user = request.user
+    if user.role == 'cliente_final':
+        return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    granularity = params.get('granularity', 'day')
+    group_by = params.get('group_by') or None
+
+    try:
+        end = _parse_date(params['to'], 'to') if params.get('to') else timezone.localdate()
+        start = (_parse_date(params['from'], 'from') if params.get('from')
+                 else end - timedelta(days=DEFAULT_RANGE_DAYS - 1))
+        compare_start, compare_end = _comparison_range(params, start, end)
+        limit = min(max(int(params.get('limit', DEFAULT_GROUP_LIMIT)), 1), MAX_GROUP_LIMIT)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if granularity not in ANALYTICS_GRANULARITIES:
+        return Response(
+            {'error': f'granularity debe ser uno de: {", ".join(ANALYTICS_GRANULARITIES)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if group_by is not None and group_by not in GROUP_BY_FIELDS:
+        return Response(
+            {'error': f'group_by debe ser uno de: {", ".join(GROUP_BY_FIELDS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start > end or (compare_start and compare_start > compare_end):
+        return Response({'error': 'El inicio del rango no puede ser posterior al fin'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if compare_start and compare_start <= end and compare_end >= start:
+        return Response({'error': 'El rango de comparación no puede solaparse con el actual'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # Limitar la cantidad de buckets para acotar el tamaño de la respuesta
+    max_buckets = settings.ANALYTICS_MAX_BUCKETS
+    buckets = bucket_count(start, end, granularity)
+    if compare_start:
+        buckets = max(buckets, bucket_count(compare_start, compare_end, granularity))
+    if buckets > max_buckets:
+        return Response(
+            {'error': f'El rango genera {buckets} periodos; el máximo es {max_buckets}. '
+                      f'Use una granularidad mayor o un rango menor.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    level, group_fields = GROUP_BY_FIELDS.get(group_by, ('sale', ()))
+    if level == 'item':
+        queryset = _scoped(SaleItem.objects.all(), user, prefix='sale__')
+        options = {
+            'value_field': 'subtotal',
+            'date_field': 'sale__created_at',
+            'count_expr': Count('sale', distinct=True),
+            'extra_measures': {'quantity': Sum('quantity')},
+        }
+    else:
+        queryset = _scoped(Sale.objects.all(), user)
+        options = {'value_field': 'total', 'date_field': 'created_at'}
+
+    result = sales_breakdown(
+        queryset, start, end, granularity,
+        group_fields=group_fields,
+        compare_start=compare_start, compare_end=compare_end,
+        group_limit=limit if group_fields else None,
+        **options
+    )
+
+    current, comparison = result['current'], result['comparison']
+    data = {
+        'from': start,
+        'to': end,
+        'granularity': granularity,
+        'group_by': group_by,
+        'current': current,
+    }
+    if comparison is not None:
+        data['comparison'] = dict(comparison, **{'from': compare_start, 'to': compare_end})
+        data['change_pct'] = round(float(percentage_change(
+            current['totals']['amount'], comparison['totals']['amount']
+        )), 2)
+    return Response(data)
@@ -1,14 +1,27 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 
 from apps.catalyst_app.models import Order, ShoppingCart
+from apps.catalyst_app.models.orders import CART_TOTALS
 from apps.catalyst_app.serializers.branch_serializers import (
     OrderSerializer, OrderDetailSerializer, ShoppingCartSerializer
 )
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para órdenes de e-commerce"""
+    query_budgets = {'list': 6, 'retrieve': 7}
+    query_profiles = {
+        'list': {'select_related': ['user'], 'prefetch_related': ['items__product']},
+        'retrieve': {
+            'select_related': ['user', 'company'],
+            'prefetch_related': ['items__product'],
+        },
+    }
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
@@ -30,10 +43,31 @@ class OrderViewSet(viewsets.ModelViewSet):
         if user.company:
             return Order.objects.filter(company=user.company)
         return Order.objects.none()
+    
+    @transaction.atomic
+    def perform_create(self, serializer):
+        """Crear la orden junto con sus acumulados diarios"""
+        serializer.save()
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        """Actualizar la orden junto con sus acumulados diarios"""
+        serializer.save()
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Eliminar la orden junto con sus acumulados diarios"""
+        instance.delete()
 
 
-class ShoppingCartViewSet(viewsets.ModelViewSet):
+class ShoppingCartViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para carritos de compra"""
+    query_profiles = {
+        'list': {'select_related': ['user'], 'prefetch_related': ['items__product']},
+        'retrieve': {'select_related': ['user'], 'prefetch_related': ['items__product']},
+        'update': {'select_related': ['user']},
+        'partial_update': {'select_related': ['user']},
+    }
     queryset = ShoppingCart.objects.all()
     serializer_class = ShoppingCartSerializer
     permission_classes = [IsAuthenticated]
@@ -42,6 +76,28 @@ class ShoppingCartViewSet(viewsets.ModelViewSet):
         """Filtrar carritos del usuario actual o si es admin de su company"""
         user = self.request.user
         if user.is_super_admin():
-            return ShoppingCart.objects.all()
-        # Cada usuario ve solo su carrito
-        return ShoppingCart.objects.filter(user=user)
+            queryset = ShoppingCart.objects.all()
+        else:
+            # Cada usuario ve solo su carrito
+            queryset = ShoppingCart.objects.filter(user=user)
+        
+        if self.action in ('list', 'retrieve', 'update', 'partial_update'):
+            # Total y cantidad de items en la misma consulta (Meta.ordering no
+            # se aplica a consultas con GROUP BY). Las respuestas de update usan
+            # la misma anotación que list/retrieve
+            queryset = queryset.annotate(**CART_TOTALS).order_by('-updated_at')
+        return queryset
+    
+    def update(self, request, *args, **kwargs):
+        """
+        Igual que ModelViewSet.update, pero la respuesta lee los items con sus
+        productos en una sola consulta (DRF descarta los prefetch al guardar).
+        """
+        partial = kwargs.pop('partial', False)
+        cart = self.get_object()
+        serializer = self.get_serializer(cart, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        cart._prefetched_objects_cache = {}
+        prefetch_related_objects([cart], 'items__product')
+        return Response(serializer.data)
@@ -0,0 +1,47 @@
+"""
+DASHBOARD_VIEWS.PY - Resumen JSON del dashboard admin
+El ETag se deriva de la versión de datos de la empresa, por lo que un
+cliente que consulta periódicamente recibe 304 sin recalcular métricas.
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from apps.catalyst_app.services.dashboard_services import (
+    get_admin_metrics, tenant_version, summary_etag
+)
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_summary(request):
+    """
+    Métricas del dashboard admin en JSON.
+    Responde 304 si el If-None-Match coincide con la versión actual de los datos.
+    """
+    user = request.user
+    if user.role not in ['super_admin', 'admin_cliente']:
+        return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+
+    company = user.company
+    if not company:
+        return Response({'error': 'Usuario sin empresa asignada'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validar el ETag con la sola lectura de la versión, sin tocar las métricas
+    etag = summary_etag(company.id, tenant_version(company.id))
+    if _etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        version, metrics = get_admin_metrics(company)
+        etag = summary_etag(company.id, version)
+        response = Response(dict(metrics, version=str(version)))
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -1,17 +1,64 @@
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import F, Q, Count, Sum
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from apps.catalyst_app.models import Branch, Inventory, Product
+from apps.catalyst_app.models import Branch, Inventory, InventorySyncJob, InventoryValuation
+from apps.catalyst_app.models.branch import LOW_STOCK
 from apps.catalyst_app.serializers.inventory_serializers import (
-    BranchSerializer, BranchDetailSerializer, InventorySerializer
+    BranchSerializer, BranchDetailSerializer, InventorySerializer, InventorySyncJobSerializer
 )
+from apps.catalyst_app.services.inventory_services import enqueue_sync_job
+from apps.catalyst_app.services.snapshot_services import with_stock_as_of
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin, CompiledListMixin
+
+
+def _parse_as_of(value):
+    """
+    Instante ISO 8601 (2026-01-31T18:00:00) o fecha (2026-01-31, se toma el
+    cierre del día en la zona horaria local). Retorna None si no es válido.
+    """
+    if not value:
+        return None
+    try:
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            moment = parse_datetime(value)
+            if moment is None:
+                return None
+            return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+        return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)) - timedelta(microseconds=1)
+    except (ValueError, OverflowError):
+        # Fecha inexistente (2026-02-30T10:00) o fuera del rango representable
+        return None
+
 
+def _parse_id(value):
+    """Id de un parámetro de la URL (?branch=3). Retorna None si no es un entero positivo."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
 
-class BranchViewSet(viewsets.ModelViewSet):
+
+class BranchViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para sucursales"""
+    query_budgets = {'list': 6, 'retrieve': 6, 'inventory': 6}
+    query_profiles = {
+        'list': {'select_related': ['company', 'manager']},
+        'retrieve': {'select_related': ['company', 'manager']},
+    }
     queryset = Branch.objects.all()
     serializer_class = BranchSerializer
     permission_classes = [IsAuthenticated]
@@ -29,10 +76,16 @@ class BranchViewSet(viewsets.ModelViewSet):
         """Filtrar sucursales por company del usuario"""
         user = self.request.user
         if user.is_super_admin():
-            return Branch.objects.all()
-        if user.company:
-            return Branch.objects.filter(company=user.company)
-        return Branch.objects.none()
+            queryset = Branch.objects.all()
+        elif user.company:
+            queryset = Branch.objects.filter(company=user.company)
+        else:
+            return Branch.objects.none()
+        
+        if self.action in ('list', 'retrieve'):
+            # Conteo de inventario en la misma consulta
+            queryset = queryset.annotate(inventory_total=Count('inventory'))
+        return queryset
     
     def perform_create(self, serializer):
         """Asignar company automáticamente y validar límite de sucursales"""
@@ -54,10 +107,37 @@ class BranchViewSet(viewsets.ModelViewSet):
             )
         
         serializer.save(company=user.company)
+    
+    @action(detail=True, methods=['get'], url_path='inventory', url_name='inventory')
+    def inventory(self, request, pk=None):
+        """
+        Inventario paginado de la sucursal. Parámetros: search (nombre o SKU
+        del producto), ordering (product__name, stock; con - descendente).
+        """
+        # Sin filter_queryset: search/ordering aplican al inventario, no a la sucursal
+        branch = get_object_or_404(self.get_queryset(), pk=pk)
+        self.check_object_permissions(request, branch)
+        inventories = Inventory.objects.filter(branch=branch).select_related('product', 'branch')
+        
+        search = request.query_params.get('search')
+        if search:
+            inventories = inventories.filter(Q(product__name__icontains=search) | Q(product__sku__icontains=search))
+        
+        ordering = request.query_params.get('ordering', 'product__name')
+        if ordering.lstrip('-') not in ('product__name', 'stock'):
+            ordering = 'product__name'
+        
+        page = self.paginate_queryset(inventories.order_by(ordering, 'pk'))
+        return self.get_paginated_response(InventorySerializer(page, many=True).data)
 
 
-class InventoryViewSet(viewsets.ModelViewSet):
+class InventoryViewSet(QueryBudgetMixin, QueryProfileMixin, CompiledListMixin, viewsets.ModelViewSet):
     """ViewSet para inventario"""
+    query_budgets = {'list': 6, 'retrieve': 6, 'low_stock': 5}
+    query_profiles = {
+        'list': {'select_related': ['product', 'branch']},
+        'retrieve': {'select_related': ['product', 'branch']},
+    }
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [IsAuthenticated]
@@ -75,11 +155,77 @@ class InventoryViewSet(viewsets.ModelViewSet):
             return Inventory.objects.filter(branch__company=user.company)
         return Inventory.objects.none()
     
+    @action(detail=False, methods=['get'], url_path='low-stock', url_name='low-stock')
+    def low_stock(self, request):
+        """
+        Inventarios en o bajo el punto de reorden (usa el índice parcial
+        inventory_low_stock_idx), con el conteo por sucursal.
+        Parámetros: branch, category.
+        """
+        inventories = self.get_queryset().filter(LOW_STOCK)
+        if request.query_params.get('branch'):
+            branch_id = _parse_id(request.query_params['branch'])
+            if branch_id is None:
+                return Response({'error': 'branch debe ser un id numérico'}, status=status.HTTP_400_BAD_REQUEST)
+            inventories = inventories.filter(branch_id=branch_id)
+        if request.query_params.get('category'):
+            inventories = inventories.filter(product__category=request.query_params['category'])
+        
+        summary = inventories.order_by('branch__name').values('branch', 'branch__name').annotate(
+            count=Count('id')
+        )
+        
+        page = self.paginate_queryset(
+            inventories.select_related('product', 'branch').order_by('stock', 'product__name', 'pk')
+        )
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['summary'] = [
+            {'branch': row['branch'], 'branch_name': row['branch__name'], 'count': row['count']}
+            for row in summary
+        ]
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """
+        Stock valorizado al costo por sucursal, desde los saldos precalculados
+        (InventoryValuation). Parámetros: branch.
+        """
+        valuations = InventoryValuation.objects.filter(
+            inventory__in=self.get_queryset().order_by()
+        )
+        if request.query_params.get('branch'):
+            branch_id = _parse_id(request.query_params['branch'])
+            if branch_id is None:
+                return Response({'error': 'branch debe ser un id numérico'}, status=status.HTTP_400_BAD_REQUEST)
+            valuations = valuations.filter(inventory__branch_id=branch_id)
+        
+        branches = list(
+            valuations.values('inventory__branch', 'inventory__branch__name').annotate(
+                units=Sum('quantity'), value=Sum('total_cost')
+            ).order_by('inventory__branch__name')
+        )
+        return Response({
+            'method': settings.INVENTORY_VALUATION_METHOD,
+            'total_units': sum(row['units'] or 0 for row in branches),
+            'total_value': sum(row['value'] or 0 for row in branches),
+            'branches': [
+                {
+                    'branch': row['inventory__branch'],
+                    'branch_name': row['inventory__branch__name'],
+                    'units': row['units'] or 0,
+                    'value': row['value'] or 0,
+                }
+                for row in branches
+            ]
+        })
+    
     @action(detail=False, methods=['post'])
     def sync_inventory(self, request):
         """
-        Sincroniza el inventario creando registros faltantes para todos los productos
-        que no tienen inventario en todas las sucursales
+        Encola la sincronización del inventario: el worker (run_inventory_worker)
+        crea los registros faltantes para todos los productos que no tienen
+        inventario en todas las sucursales. Retorna el id del trabajo.
         """
         user = request.user
         
@@ -90,35 +236,68 @@ class InventoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Obtener todas las sucursales y productos de la company
-        branches = Branch.objects.filter(company=user.company)
-        products = Product.objects.filter(company=user.company)
-        
-        if not branches.exists():
+        if not Branch.objects.filter(company=user.company).exists():
             return Response(
                 {'error': 'No hay sucursales configuradas'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        created_count = 0
-        
-        # Para cada producto, crear inventario en todas las sucursales que falten
-        for product in products:
-            for branch in branches:
-                inventory, created = Inventory.objects.get_or_create(
-                    product=product,
-                    branch=branch,
-                    defaults={
-                        'stock': 0,
-                        'reorder_point': 10
-                    }
-                )
-                if created:
-                    created_count += 1
+        job, created = enqueue_sync_job(user.company, user)
         
         return Response({
-            'message': f'Sincronización completada',
-            'inventories_created': created_count,
-            'total_branches': branches.count(),
-            'total_products': products.count()
-        }, status=status.HTTP_200_OK)
+            'message': 'Sincronización encolada' if created else 'Ya hay una sincronización en curso',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse(
+                'catalyst_app:inventory-sync-job', kwargs={'job_id': job.id}, request=request
+            )
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'sync-jobs/(?P<job_id>\d+)', url_name='sync-job')
+    def sync_job(self, request, job_id=None):
+        """Avance de un trabajo de sincronización de inventario"""
+        user = request.user
+        jobs = InventorySyncJob.objects.all()
+        if not user.is_super_admin():
+            jobs = jobs.filter(company=user.company)
+        
+        job = jobs.filter(pk=job_id).first()
+        if job is None:
+            return Response({'error': 'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(InventorySyncJobSerializer(job).data)
+    
+    @action(detail=False, methods=['get'], url_path='as-of', url_name='as-of')
+    def stock_as_of(self, request):
+        """
+        Stock de cada inventario a una fecha, calculado desde la última foto
+        (InventorySnapshot) más los movimientos posteriores.
+        Parámetros: at (YYYY-MM-DD o fecha-hora ISO, obligatorio), branch, product.
+        """
+        as_of = _parse_as_of(request.query_params.get('at'))
+        if as_of is None:
+            return Response(
+                {'error': 'at debe tener formato YYYY-MM-DD o fecha-hora ISO 8601'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        inventories = self.get_queryset()
+        for param in ('branch', 'product'):
+            if request.query_params.get(param):
+                pk = _parse_id(request.query_params[param])
+                if pk is None:
+                    return Response(
+                        {'error': f'{param} debe ser un id numérico'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                inventories = inventories.filter(**{f'{param}_id': pk})
+        
+        rows = with_stock_as_of(inventories, as_of).order_by('branch__name', 'product__name', 'pk').values(
+            'id', 'branch', 'product', 'stock_as_of', 'snapshot_taken_at',
+            branch_name=F('branch__name'), product_name=F('product__name'),
+            product_code=F('product__sku'), current_stock=F('stock')
+        )
+        page = self.paginate_queryset(rows)
+        response = self.get_paginated_response(page)
+        response.data['as_of'] = as_of
+        return response
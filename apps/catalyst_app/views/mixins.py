@@ -0,0 +1,159 @@
+"""
+MIXINS.PY - Mixins compartidos por los ViewSets
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from apps.catalyst_app.middleware import timed_serialization
+from apps.catalyst_app.serializers.compiled import compile_serializer
+from apps.catalyst_app.serializers.mixins import requested_names
+
+
+_timed_serializers = {}
+
+
+def _timed_serializer_class(serializer_class):
+    """Subclase del serializador que suma su tiempo de serialización al request"""
+    timed = _timed_serializers.get(serializer_class)
+    if timed is None:
+        class timed(serializer_class):
+            def to_representation(self, instance):
+                with timed_serialization():
+                    return super().to_representation(instance)
+
+        timed.__name__ = serializer_class.__name__
+        timed.__qualname__ = serializer_class.__qualname__
+        timed.__module__ = serializer_class.__module__
+        _timed_serializers[serializer_class] = timed
+    return timed
+
+
+class QueryBudgetMixin:
+    """
+    Declara el presupuesto de consultas por acción y mide el tiempo de
+    serialización para QueryBudgetMiddleware.
+
+    Ejemplo:
+        query_budgets = {'list': 5, 'retrieve': 4}
+    """
+    query_budgets = {}
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        # La generación del schema (drf_spectacular) necesita la clase original
+        if not getattr(self, 'swagger_fake_view', False):
+            serializer_class = _timed_serializer_class(serializer_class)
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class QueryProfileMixin:
+    """
+    Declara por acción las relaciones que el serializador recorre y las aplica
+    con select_related/prefetch_related al queryset del listado y de
+    get_object (filter_queryset), evitando una consulta por fila.
+
+    En las lecturas solo se aplican las relaciones de los campos que el
+    serializador va a entregar (ver DynamicFieldsMixin: ?fields= / ?expand=)
+    y, con ?fields=, se leen solo las columnas necesarias con .only(). Los
+    SerializerMethodField deben apoyarse en anotaciones o columnas propias.
+
+    Ejemplo:
+        query_profiles = {
+            'list': {'select_related': ['branch', 'seller']},
+            'retrieve': {'select_related': ['branch'], 'prefetch_related': ['items__product']},
+        }
+    """
+    query_profiles = {}
+
+    def apply_query_profile(self, queryset):
+        profile = self.query_profiles.get(self.action) or {}
+        select_related = profile.get('select_related', [])
+        prefetch_related = profile.get('prefetch_related', [])
+
+        columns = None
+        if self.request.method in SAFE_METHODS:
+            fields = list(self.get_serializer().fields.values())
+            # Una relación que se entrega solo como id no necesita join
+            joined = {
+                field.source_attrs[0] for field in fields
+                if len(field.source_attrs) > 1
+                or (field.source_attrs and not isinstance(field, PrimaryKeyRelatedField))
+            }
+            select_related = [path for path in select_related if path.split('__')[0] in joined]
+            prefetch_related = [path for path in prefetch_related if path.split('__')[0] in joined]
+            if requested_names(self.request, 'fields'):
+                columns = _only_columns(fields, queryset.model, select_related)
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if columns:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(self.apply_query_profile(queryset))
+
+
+class CompiledListMixin:
+    """
+    Listado de solo lectura compilado (ver serializers/compiled.py): las filas
+    se leen con .values() y se convierten a dicts sin instanciar modelos ni
+    pasar por los campos de DRF, con el mismo JSON que el listado normal. Si el
+    serializador tiene campos que no se pueden compilar se usa el camino normal.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = compiled.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        with timed_serialization():
+            data = compiled.to_representation(page if page is not None else rows)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+def _only_columns(fields, model, select_related):
+    """
+    Columnas para .only() a partir de los atributos que leen los campos del
+    serializador (primer nivel de cada source) y de las relaciones con
+    select_related. Retorna None si algún campo lee algo que no es un campo
+    del modelo (SerializerMethodField, propiedad o método).
+    """
+    columns = {model._meta.pk.name}
+    for field in fields:
+        if not field.source_attrs:
+            return None
+        root = field.source_attrs[0]
+        display = re.fullmatch(r'get_(\w+)_display', root)
+        if display:
+            root = display.group(1)
+        try:
+            model_field = model._meta.get_field(root)
+        except FieldDoesNotExist:
+            return None
+        # Las relaciones inversas se cargan con prefetch y solo necesitan el id
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(root)
+
+    # Las relaciones con select_related se cargan completas
+    for path in select_related:
+        related, prefix = model, []
+        for name in path.split('__'):
+            related = related._meta.get_field(name).related_model
+            prefix.append(name)
+            columns.update(
+                '__'.join(prefix + [field.name])
+                for field in related._meta.concrete_fields
+            )
+    return columns
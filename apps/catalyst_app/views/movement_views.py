@@ -5,14 +5,27 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from django.db import transaction
 
 from apps.catalyst_app.models import InventoryMovement, Inventory
-from apps.catalyst_app.serializers.inventory_serializers import InventoryMovementSerializer
+from apps.catalyst_app.models.branch import movement_delta
+from apps.catalyst_app.serializers.inventory_serializers import (
+    InventoryMovementSerializer, InventoryMovementBulkSerializer, InventoryTransferSerializer
+)
+from apps.catalyst_app.services.inventory_services import (
+    apply_stock_delta, apply_movements_bulk, transfer_stock
+)
+from apps.catalyst_app.services import valuation_services
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin, CompiledListMixin
 
 
-class InventoryMovementViewSet(viewsets.ModelViewSet):
+class InventoryMovementViewSet(QueryBudgetMixin, QueryProfileMixin, CompiledListMixin, viewsets.ModelViewSet):
     """ViewSet para registrar movimientos de inventario"""
+    query_profiles = {
+        'list': {'select_related': ['user', 'inventory__product', 'inventory__branch']},
+        'retrieve': {'select_related': ['user', 'inventory__product', 'inventory__branch']},
+    }
     queryset = InventoryMovement.objects.all()
     serializer_class = InventoryMovementSerializer
     permission_classes = [IsAuthenticated]
@@ -31,27 +44,86 @@ class InventoryMovementViewSet(viewsets.ModelViewSet):
     @transaction.atomic
     def perform_create(self, serializer):
         """
-        Crear movimiento y actualizar el stock del inventario
+        Crear movimiento y actualizar el stock del inventario en la misma
+        transacción. El stock se modifica con un UPDATE atómico, por lo que
+        dos ventas simultáneas del mismo producto no pueden sobrevender.
         """
         user = self.request.user
+        inventory = serializer.validated_data['inventory']
+        company_id = inventory.branch.company_id
+        
+        if not user.is_super_admin() and company_id != user.company_id:
+            raise PermissionDenied('No tienes permiso para mover este inventario')
+        
+        # Actualizar stock según el tipo de movimiento (409 si no alcanza)
+        apply_stock_delta(
+            inventory.pk,
+            movement_delta(serializer.validated_data['movement_type'], serializer.validated_data['quantity']),
+            company_id=company_id
+        )
         movement = serializer.save(user=user)
+        valuation_services.record_movements([movement])
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Registra miles de movimientos en una sola transacción.
+        Body: {"movements": [{inventory, movement_type, quantity, reference, notes}, ...],
+               "partial": false}
+        Sin partial es todo o nada; con partial se aplican los válidos y se
+        informan los rechazados por índice.
+        """
+        user = request.user
+        if not user.company:
+            return Response({'error': 'Usuario sin compañía asignada'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = InventoryMovementBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['movements']
+        partial = serializer.validated_data['partial']
+        
+        with transaction.atomic():
+            movements, errors = apply_movements_bulk(user.company_id, user, items, partial=partial)
+        
+        if not movements and errors:
+            return Response({
+                'error': 'No se aplicó ningún movimiento',
+                'errors': errors
+            }, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            'created': len(movements),
+            'rejected': len(errors),
+            'errors': errors
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def transfer(self, request):
+        """
+        Transfiere stock entre sucursales de forma atómica.
+        Body: {"source_branch": id, "destination_branch": id,
+               "lines": [{"product": id, "quantity": n}, ...], "reference", "notes"}
+        """
+        user = request.user
+        if not user.company:
+            return Response({'error': 'Usuario sin compañía asignada'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = InventoryTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        reference, movements, errors = transfer_stock(
+            user.company_id, user, data['source_branch'], data['destination_branch'], data['lines'],
+            reference=data.get('reference'), notes=data.get('notes')
+        )
+        if errors:
+            return Response({
+                'error': 'No se realizó la transferencia',
+                'errors': errors
+            }, status=status.HTTP_404_NOT_FOUND if errors[0]['index'] is None else status.HTTP_409_CONFLICT)
         
-        # Obtener el inventario relacionado
-        inventory = movement.inventory
-        
-        # Actualizar stock según el tipo de movimiento
-        if movement.movement_type in ['entrada', 'devolucion']:
-            # Sumar al stock
-            inventory.stock += movement.quantity
-        elif movement.movement_type in ['salida']:
-            # Restar del stock
-            if inventory.stock < movement.quantity:
-                raise ValueError('Stock insuficiente para realizar esta salida')
-            inventory.stock -= movement.quantity
-        elif movement.movement_type == 'ajuste':
-            # Para ajustes, la cantidad se interpreta como el nuevo stock
-            # (o cambio si es positivo/negativo)
-            # Aquí mantenemos la cantidad como cambio
-            inventory.stock += movement.quantity
-        
-        inventory.save()
+        return Response({
+            'reference': reference,
+            'lines': len(data['lines']),
+            'movements': len(movements)
+        }, status=status.HTTP_201_CREATED)
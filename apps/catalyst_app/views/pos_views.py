@@ -0,0 +1,51 @@
+"""
+POS_VIEWS.PY - Checkout del punto de venta en un solo request
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from apps.catalyst_app.models import Sale
+from apps.catalyst_app.serializers.sales_serializers import CheckoutSerializer, CheckoutSaleSerializer
+from apps.catalyst_app.services.checkout_services import checkout
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def pos_checkout(request):
+    """
+    Registra una venta POS completa: venta, items, pagos y salidas de stock
+    de la sucursal en una sola transacción.
+    Body: {"branch": id, "items": [{product, quantity}],
+           "payments": [{payment_method, amount, reference}],
+           "discount", "receipt_number", "customer_name", "customer_rut", "notes"}
+    """
+    user = request.user
+    if user.role == 'cliente_final':
+        return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+    if not user.company:
+        return Response({'error': 'Usuario sin compañía asignada'}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = CheckoutSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    sale, change, errors = checkout(
+        user, data['branch'], data['items'], data['payments'],
+        discount=data['discount'],
+        receipt_number=data.get('receipt_number'),
+        customer_name=data.get('customer_name'),
+        customer_rut=data.get('customer_rut'),
+        notes=data.get('notes'),
+    )
+    if errors:
+        return Response({
+            'error': 'No se registró la venta',
+            'errors': errors
+        }, status=status.HTTP_409_CONFLICT)
+
+    sale = Sale.objects.select_related('branch', 'seller').prefetch_related('items__product').get(pk=sale.pk)
+    response = CheckoutSaleSerializer(sale).data
+    response['change'] = str(change)
+    return Response(response, status=status.HTTP_201_CREATED)
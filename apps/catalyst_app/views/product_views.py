@@ -1,23 +1,31 @@
+from django.db.models import F, OuterRef, Subquery, Sum, IntegerField
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 
-from apps.catalyst_app.models import Product
+from apps.catalyst_app.models import Product, Inventory
+from apps.catalyst_app.services import popularity_services
 from apps.catalyst_app.serializers.product_serializers import (
     ProductSerializer, ProductListSerializer, ProductDetailSerializer
 )
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin, CompiledListMixin
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(QueryBudgetMixin, QueryProfileMixin, CompiledListMixin, viewsets.ModelViewSet):
     """ViewSet para productos del catálogo"""
+    query_budgets = {'list': 5, 'retrieve': 5}
+    query_profiles = {
+        'retrieve': {'select_related': ['company']},
+    }
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'sku', 'category', 'description']
-    ordering_fields = ['name', 'price', 'cost', 'created_at']
+    ordering_fields = ['name', 'price', 'cost', 'created_at', 'stock']
     ordering = ['name']
     
     def get_serializer_class(self):
@@ -31,10 +39,45 @@ class ProductViewSet(viewsets.ModelViewSet):
         """Filtrar productos por company del usuario"""
         user = self.request.user
         if user.is_super_admin():
-            return Product.objects.all()
-        if user.company:
-            return Product.objects.filter(company=user.company)
-        return Product.objects.none()
+            queryset = Product.objects.all()
+        elif user.company:
+            queryset = Product.objects.filter(company=user.company)
+        else:
+            return Product.objects.none()
+        
+        if self.action == 'list':
+            queryset = self._with_stock(queryset)
+        return queryset
+    
+    def _with_stock(self, queryset):
+        """
+        Anota el stock total (o de la sucursal ?branch=) en la consulta principal
+        y aplica los filtros ?stock_min= / ?stock_max=. Se expone como 'stock'
+        para ordenar con ?ordering=stock.
+        """
+        params = self.request.query_params
+        numbers = {}
+        try:
+            for name in ('branch', 'stock_min', 'stock_max'):
+                if params.get(name):
+                    numbers[name] = int(params[name])
+        except ValueError:
+            raise ValidationError({name: f'{name} debe ser un número'})
+        
+        inventories = Inventory.objects.filter(product=OuterRef('pk'))
+        if 'branch' in numbers:
+            inventories = inventories.filter(branch_id=numbers['branch'])
+        total = inventories.order_by().values('product').annotate(total=Sum('stock')).values('total')
+        
+        queryset = queryset.annotate(
+            total_stock=Coalesce(Subquery(total, output_field=IntegerField()), 0)
+        ).alias(stock=F('total_stock'))
+        
+        if 'stock_min' in numbers:
+            queryset = queryset.filter(total_stock__gte=numbers['stock_min'])
+        if 'stock_max' in numbers:
+            queryset = queryset.filter(total_stock__lte=numbers['stock_max'])
+        return queryset
     
     def perform_create(self, serializer):
         """Asignar company automáticamente"""
@@ -78,3 +121,48 @@ class ProductViewSet(viewsets.ModelViewSet):
         products = self.get_queryset().filter(is_active=True)
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """
+        Top N de productos más vendidos desde el ranking precalculado.
+        Parámetros: window (7, 30, 365), by (units, orders), channel (pos, ecommerce), limit
+        """
+        company = request.user.company
+        if not company:
+            return Response({'error': 'Usuario sin empresa asignada'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            window = int(request.query_params.get('window', 30))
+            limit = min(int(request.query_params.get('limit', popularity_services.DEFAULT_TOP_LIMIT)),
+                        popularity_services.MAX_TOP_LIMIT)
+        except ValueError:
+            return Response({'error': 'window y limit deben ser números'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        by = request.query_params.get('by', 'units')
+        channel = request.query_params.get('channel') or None
+        if channel not in (None, 'pos', 'ecommerce'):
+            return Response({'error': 'Canal inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            ranking = popularity_services.top_products(
+                company.id, window=window, channel=channel, limit=max(limit, 1), by=by
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'window': window,
+            'by': by,
+            'channel': channel,
+            'results': [
+                {
+                    'product_id': row['product_id'],
+                    'name': row['product__name'],
+                    'sku': row['product__sku'],
+                    'units': row['units'],
+                    'orders': row['orders'],
+                }
+                for row in ranking
+            ]
+        })
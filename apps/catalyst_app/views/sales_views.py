@@ -1,14 +1,24 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 
 from apps.catalyst_app.models import Sale
 from apps.catalyst_app.serializers.sales_serializers import (
     SaleSerializer, SaleDetailSerializer
 )
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin, CompiledListMixin
 
 
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(QueryBudgetMixin, QueryProfileMixin, CompiledListMixin, viewsets.ModelViewSet):
     """ViewSet para ventas POS"""
+    query_budgets = {'list': 6, 'retrieve': 6}
+    query_profiles = {
+        'list': {'select_related': ['branch', 'seller'], 'prefetch_related': ['items__product']},
+        'retrieve': {
+            'select_related': ['branch__company', 'seller'],
+            'prefetch_related': ['items__product'],
+        },
+    }
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
     permission_classes = [IsAuthenticated]
@@ -31,6 +41,17 @@ class SaleViewSet(viewsets.ModelViewSet):
             return Sale.objects.filter(branch__company=user.company)
         return Sale.objects.none()
     
+    @transaction.atomic
     def perform_create(self, serializer):
         """Asignar seller automáticamente"""
         serializer.save(seller=self.request.user)
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        """Actualizar la venta junto con sus acumulados diarios"""
+        serializer.save()
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Eliminar la venta junto con sus acumulados diarios"""
+        instance.delete()
@@ -1,12 +1,21 @@
 from django.db.models import Sum, Count, Avg, F, Q
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from apps.catalyst_app.models.sales import Sale
 from apps.catalyst_app.models.users import User
+from apps.catalyst_app.models.stats import SalesDailyRollup, ProductSalesDailyRollup
+from apps.catalyst_app.services.stats_services import (
+    previous_month_range, period_comparison, percentage_change, sales_timeseries,
+    seller_performance, iter_buckets, ROLLUP_MEASURES
+)
+from apps.catalyst_app.services.fanout_services import run_parallel
+from apps.catalyst_app.middleware import query_stats
+from apps.catalyst_app.permissions import IsSuperAdmin
 
 
 @api_view(['GET'])
@@ -21,20 +30,8 @@ def vendor_stats(request):
     if user.role not in ['vendedor']:
         return Response({'error': 'No autorizado'}, status=403)
     
-    # Obtener mes actual
-    today = timezone.now().date()
-    first_day = today.replace(day=1)
-    
-    # Mes anterior
-    if first_day.month == 1:
-        prev_first = first_day.replace(year=first_day.year - 1, month=12)
-    else:
-        prev_first = first_day.replace(month=first_day.month - 1)
-    
-    if prev_first.month == 1:
-        prev_last = prev_first.replace(year=prev_first.year - 1, month=12, day=31)
-    else:
-        prev_last = (prev_first.replace(day=1) - timedelta(days=1))
+    today = timezone.localdate()
+    first_day, prev_first, prev_last = previous_month_range(today)
     
     # Ventas este mes
     current_sales = Sale.objects.filter(
@@ -42,62 +39,62 @@ def vendor_stats(request):
         created_at__date__gte=first_day
     )
     
-    # Ventas mes anterior
-    prev_sales = Sale.objects.filter(
-        seller=user,
-        created_at__date__gte=prev_first,
-        created_at__date__lte=prev_last
-    )
+    # Acumulados diarios POS del vendedor
+    rollups = SalesDailyRollup.objects.filter(seller=user, channel='pos')
+    
+    # Consultas independientes ejecutadas en paralelo
+    results = run_parallel({
+        # Totales del mes actual y anterior en una sola consulta
+        'summary': lambda: period_comparison(
+            rollups, first_day, prev_first, prev_last, **ROLLUP_MEASURES
+        ),
+        # Ventas por día (últimos 30 días)
+        'daily': lambda: sales_timeseries(
+            rollups,
+            today - timedelta(days=29),
+            today,
+            **ROLLUP_MEASURES
+        ),
+        # Métodos de pago
+        'payment_methods': rollups.filter(day__gte=first_day).values('payment_method').annotate(
+            total=Sum('total_amount'),
+            count=Sum('sales_count')
+        ).filter(count__gt=0).order_by('payment_method'),
+        # Productos más vendidos
+        'top_products': ProductSalesDailyRollup.objects.filter(
+            seller=user,
+            channel='pos',
+            day__gte=first_day
+        ).values('product__name').annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('revenue'),
+            ticket_count=Sum('sales_count')
+        ).filter(total_quantity__gt=0).order_by('-total_revenue')[:5],
+        # Últimas 10 ventas
+        'recent_sales': current_sales.values(
+            'id', 'receipt_number', 'customer_name', 'total',
+            'payment_method', 'created_at'
+        ).order_by('-created_at')[:10],
+    })
     
-    total_current = current_sales.aggregate(Sum('total'))['total__sum'] or 0
-    total_prev = prev_sales.aggregate(Sum('total'))['total__sum'] or 0
+    summary = results['summary']
+    total_current = summary['current_total']
     
     # Calcular cambio porcentual
-    sales_change = 0
-    if total_prev > 0:
-        sales_change = ((total_current - total_prev) / total_prev) * 100
+    sales_change = percentage_change(total_current, summary['previous_total'])
     
     # Estadísticas básicas
-    transaction_count = current_sales.count()
-    avg_ticket = current_sales.aggregate(Avg('total'))['total__avg'] or 0
-    estimated_commission = total_current * 0.05  # 5% de comisión
-    
-    # Ventas por día (últimos 30 días)
-    daily_sales = []
-    for i in range(30):
-        day = today - timedelta(days=i)
-        day_sales = Sale.objects.filter(
-            seller=user,
-            created_at__date=day
-        ).aggregate(Sum('total'))['total__sum'] or 0
-        daily_sales.append({
-            'date': day.strftime('%d/%m'),
-            'amount': float(day_sales)
-        })
-    daily_sales.reverse()
-    
-    # Métodos de pago
-    payment_methods = current_sales.values('payment_method').annotate(
-        total=Sum('total'),
-        count=Count('id')
-    )
-    
-    # Productos más vendidos
-    from apps.catalyst_app.models.sales import SaleItem
-    top_products = SaleItem.objects.filter(
-        sale__seller=user,
-        sale__created_at__date__gte=first_day
-    ).values('product__name').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('subtotal'),
-        ticket_count=Count('sale_id', distinct=True)
-    ).order_by('-total_revenue')[:5]
-    
-    # Últimas 10 ventas
-    recent_sales = current_sales.values(
-        'id', 'receipt_number', 'customer_name', 'total',
-        'payment_method', 'created_at'
-    ).order_by('-created_at')[:10]
+    transaction_count = summary['current_count']
+    avg_ticket = summary['current_avg']
+    estimated_commission = total_current * Decimal('0.05')  # 5% de comisión
+    
+    daily_sales = [
+        {'date': bucket['period'].strftime('%d/%m'), 'amount': float(bucket['amount'])}
+        for bucket in results['daily']
+    ]
+    payment_methods = results['payment_methods']
+    top_products = results['top_products']
+    recent_sales = results['recent_sales']
     
     # Mapear display de métodos de pago
     payment_display = {
@@ -127,8 +124,8 @@ def vendor_stats(request):
                       for pm in payment_methods],
             'values': [pm['count'] for pm in payment_methods]
         },
-        'recent_sales': list(recent_sales),
-        'top_products': list(top_products)
+        'recent_sales': recent_sales,
+        'top_products': top_products
     })
 
 
@@ -145,20 +142,9 @@ def manager_stats(request):
     if user.role not in ['gerente', 'admin_cliente']:
         return Response({'error': 'No autorizado'}, status=403)
     
-    # Obtener mes actual
-    today = timezone.now().date()
-    first_day = today.replace(day=1)
-    
-    # Mes anterior
-    if first_day.month == 1:
-        prev_first = first_day.replace(year=first_day.year - 1, month=12)
-    else:
-        prev_first = first_day.replace(month=first_day.month - 1)
-    
-    if prev_first.month == 1:
-        prev_last = prev_first.replace(year=prev_first.year - 1, month=12, day=31)
-    else:
-        prev_last = (prev_first.replace(day=1) - timedelta(days=1))
+    today = timezone.localdate()
+    first_day, prev_first, prev_last = previous_month_range(today)
+    week_start = today - timedelta(days=6)
     
     # Obtener vendedores del mismo equipo/sucursal del gerente
     vendors = User.objects.filter(
@@ -172,86 +158,81 @@ def manager_stats(request):
         created_at__date__gte=first_day
     )
     
-    # Ventas del equipo mes anterior
-    prev_team_sales = Sale.objects.filter(
-        seller__in=vendors,
-        created_at__date__gte=prev_first,
-        created_at__date__lte=prev_last
-    )
+    results = run_parallel({
+        'vendor_list': vendors.only('id', 'first_name', 'last_name', 'is_active'),
+        # Desempeño por vendedor (mes actual, mes anterior y últimos 7 días) en una consulta
+        'performance': lambda: seller_performance(
+            SalesDailyRollup.objects.filter(seller__in=vendors, channel='pos'),
+            first_day, prev_first, prev_last,
+            daily_since=week_start, today=today,
+            **ROLLUP_MEASURES
+        ),
+        # Últimas transacciones del equipo
+        'recent_transactions': current_team_sales.values(
+            'id', 'receipt_number', 'seller__first_name', 'seller__last_name',
+            'customer_name', 'total', 'payment_method', 'created_at'
+        ).order_by('-created_at')[:10],
+    })
+    vendor_list = results['vendor_list']
+    performance = results['performance']
+    empty = {
+        'current_total': 0, 'current_count': 0, 'current_avg': 0,
+        'previous_total': 0, 'daily': [0] * 7
+    }
     
-    total_current = current_team_sales.aggregate(Sum('total'))['total__sum'] or 0
-    total_prev = prev_team_sales.aggregate(Sum('total'))['total__sum'] or 0
+    total_current = sum(row['current_total'] for row in performance.values())
+    total_prev = sum(row['previous_total'] for row in performance.values())
+    team_count = sum(row['current_count'] for row in performance.values())
     
     # Calcular cambio porcentual
-    sales_change = 0
-    if total_prev > 0:
-        sales_change = ((total_current - total_prev) / total_prev) * 100
+    sales_change = percentage_change(total_current, total_prev)
     
     # Número de vendedores activos
-    active_sellers = vendors.filter(is_active=True).count()
+    active_sellers = sum(1 for vendor in vendor_list if vendor.is_active)
     
     # Ticket promedio del equipo
-    team_avg_ticket = current_team_sales.aggregate(Avg('total'))['total__avg'] or 0
-    
-    # Mejor vendedor del mes
-    top_seller = None
-    top_seller_sales = Sale.objects.filter(
-        seller__in=vendors,
-        created_at__date__gte=first_day
-    ).values('seller__first_name', 'seller__last_name').annotate(
-        total_sales=Sum('total')
-    ).order_by('-total_sales').first()
-    
-    if top_seller_sales:
-        top_seller = {
-            'name': f"{top_seller_sales['seller__first_name']} {top_seller_sales['seller__last_name']}",
-            'sales': float(top_seller_sales['total_sales'])
-        }
+    team_avg_ticket = total_current / team_count if team_count else 0
     
     # Desempeño de cada vendedor
     team_performance = []
-    for vendor in vendors:
-        vendor_sales = current_team_sales.filter(seller=vendor)
-        vendor_prev_sales = prev_team_sales.filter(seller=vendor)
-        
-        vendor_total = vendor_sales.aggregate(Sum('total'))['total__sum'] or 0
-        vendor_prev_total = vendor_prev_sales.aggregate(Sum('total'))['total__sum'] or 0
-        
-        vendor_change = 0
-        if vendor_prev_total > 0:
-            vendor_change = ((vendor_total - vendor_prev_total) / vendor_prev_total) * 100
+    for vendor in vendor_list:
+        row = performance.get(vendor.id, empty)
+        vendor_total = row['current_total']
         
         team_performance.append({
             'name': f"{vendor.first_name} {vendor.last_name}",
             'total_sales': float(vendor_total),
-            'transaction_count': vendor_sales.count(),
-            'avg_ticket': float(vendor_sales.aggregate(Avg('total'))['total__avg'] or 0),
-            'commission': float(vendor_total * 0.05),
-            'change_percentage': vendor_change,
+            'transaction_count': row['current_count'],
+            'avg_ticket': float(row['current_avg']),
+            'commission': float(vendor_total * Decimal('0.05')),
+            'change_percentage': percentage_change(vendor_total, row['previous_total']),
             'status': 'active' if vendor.is_active else 'inactive'
         })
     
+    # Mejor vendedor del mes
+    top_seller = None
+    top_candidates = [p for p in team_performance if p['transaction_count'] > 0]
+    if top_candidates:
+        best = max(top_candidates, key=lambda p: p['total_sales'])
+        top_seller = {
+            'name': best['name'],
+            'sales': best['total_sales']
+        }
+    
     # Ventas por día (últimos 7 días para desempeño semanal)
     weekly_sales = []
-    for i in range(7):
-        day = today - timedelta(days=i)
-        day_sales = current_team_sales.filter(
-            created_at__date=day
-        ).aggregate(Sum('total'))['total__sum'] or 0
+    for index, day in enumerate(iter_buckets(week_start, today)):
+        day_total = sum(row['daily'][index] for row in performance.values())
         weekly_sales.append({
             'date': day.strftime('%a'),
-            'amount': float(day_sales)
+            'amount': float(day_total)
         })
-    weekly_sales.reverse()
     
     # Ventas por vendedor
-    seller_sales = []
-    for vendor in vendors:
-        vendor_total = current_team_sales.filter(seller=vendor).aggregate(Sum('total'))['total__sum'] or 0
-        seller_sales.append({
-            'name': f"{vendor.first_name} {vendor.last_name}",
-            'sales': float(vendor_total)
-        })
+    seller_sales = [
+        {'name': p['name'], 'sales': p['total_sales']}
+        for p in team_performance
+    ]
     seller_sales.sort(key=lambda x: x['sales'], reverse=True)
     
     # Últimas transacciones del equipo
@@ -264,11 +245,7 @@ def manager_stats(request):
         'otro': 'Otro'
     }
     
-    recent_transactions = current_team_sales.values(
-        'id', 'receipt_number', 'seller__first_name', 'seller__last_name',
-        'customer_name', 'total', 'payment_method', 'created_at'
-    ).order_by('-created_at')[:10]
-    
+    recent_transactions = results['recent_transactions']
     for trans in recent_transactions:
         trans['seller_name'] = f"{trans['seller__first_name']} {trans['seller__last_name']}"
         trans['payment_method_display'] = payment_display.get(trans['payment_method'], trans['payment_method'])
@@ -288,5 +265,15 @@ def manager_stats(request):
             'labels': [d['date'] for d in weekly_sales],
             'values': [d['amount'] for d in weekly_sales]
         },
-        'recent_transactions': list(recent_transactions)
+        'recent_transactions': recent_transactions
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsSuperAdmin])
+def query_budget_stats(request):
+    """
+    Histogramas de consultas, tiempo de base de datos y de serialización
+    por nombre de URL acumulados en este proceso (ver QueryBudgetMiddleware)
+    """
+    return Response(query_stats())
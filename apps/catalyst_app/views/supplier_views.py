@@ -1,14 +1,23 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from apps.catalyst_app.models import Supplier, Purchase
 from apps.catalyst_app.serializers.supplier_serializers import (
-    SupplierSerializer, PurchaseSerializer, PurchaseDetailSerializer
+    SupplierSerializer, PurchaseSerializer, PurchaseDetailSerializer,
+    PurchaseItemSerializer, PurchaseReceiptSerializer, PurchaseReceiveSerializer
 )
+from apps.catalyst_app.services.purchase_services import receive_purchase
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin
 
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para proveedores"""
+    query_profiles = {
+        'list': {'select_related': ['company']},
+        'retrieve': {'select_related': ['company']},
+    }
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [IsAuthenticated]
@@ -31,8 +40,18 @@ class SupplierViewSet(viewsets.ModelViewSet):
         serializer.save(company=self.request.user.company)
 
 
-class PurchaseViewSet(viewsets.ModelViewSet):
+class PurchaseViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para compras a proveedores"""
+    query_profiles = {
+        'list': {
+            'select_related': ['supplier__company', 'branch'],
+            'prefetch_related': ['items__product'],
+        },
+        'retrieve': {
+            'select_related': ['supplier__company'],
+            'prefetch_related': ['items__product'],
+        },
+    }
     queryset = Purchase.objects.all()
     serializer_class = PurchaseSerializer
     permission_classes = [IsAuthenticated]
@@ -54,3 +73,36 @@ class PurchaseViewSet(viewsets.ModelViewSet):
         if user.company:
             return Purchase.objects.filter(supplier__company=user.company)
         return Purchase.objects.none()
+    
+    @action(detail=True, methods=['post'])
+    def receive(self, request, pk=None):
+        """
+        Recibe la compra en el inventario de su sucursal (entradas de stock).
+        Body: {"items": [{"item": id, "quantity": n}, ...], "idempotency_key": "..."}
+        Sin items recibe todo lo pendiente. La clave también puede enviarse en el
+        header Idempotency-Key; un reintento con la misma clave no se vuelve a aplicar.
+        """
+        purchase = self.get_object()
+        if not purchase.branch_id:
+            return Response({'error': 'La compra no tiene sucursal asignada'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = PurchaseReceiveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = serializer.validated_data.get('idempotency_key') or request.headers.get('Idempotency-Key')
+        
+        receipt, replayed, errors = receive_purchase(
+            purchase, request.user, serializer.validated_data.get('items'), idempotency_key=key or None
+        )
+        if errors:
+            return Response({
+                'error': 'No se registró la recepción',
+                'errors': errors
+            }, status=status.HTTP_409_CONFLICT)
+        
+        items = purchase.items.select_related('product').order_by('pk')
+        return Response({
+            'receipt': PurchaseReceiptSerializer(receipt).data if receipt else None,
+            'replayed': replayed,
+            'items': PurchaseItemSerializer(items, many=True).data,
+            'complete': all(item.quantity_pending() == 0 for item in items)
+        }, status=status.HTTP_201_CREATED if receipt and not replayed else status.HTTP_200_OK)
@@ -11,10 +11,16 @@ from apps.catalyst_app.serializers.user_serializers import (
     UserSerializer, UserCreateSerializer, UserDetailSerializer, 
     CompanySerializer, SubscriptionSerializer
 )
+from apps.catalyst_app.views.mixins import QueryBudgetMixin, QueryProfileMixin
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para usuarios con autenticación y registro"""
+    query_budgets = {'list': 6, 'retrieve': 5}
+    query_profiles = {
+        'list': {'select_related': ['company']},
+        'retrieve': {'select_related': ['company']},
+    }
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
@@ -156,7 +162,7 @@ class UserViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """ViewSet para empresas/clientes"""
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
@@ -177,8 +183,12 @@ class CompanyViewSet(viewsets.ModelViewSet):
         return Company.objects.none()
 
 
-class SubscriptionViewSet(viewsets.ModelViewSet):
+class SubscriptionViewSet(QueryBudgetMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """ViewSet para suscripciones/planes"""
+    query_profiles = {
+        'list': {'select_related': ['company']},
+        'retrieve': {'select_related': ['company']},
+    }
     queryset = Subscription.objects.all()
     serializer_class = SubscriptionSerializer
     permission_classes = [IsAuthenticated]
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 from decouple import config
 
@@ -59,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.catalyst_app.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'catalyst.urls'
@@ -100,6 +102,48 @@ DATABASES = {
 }
 
 
+# Cache
+# En producción usar un backend compartido entre procesos (Redis/Memcached)
+# para que la invalidación del dashboard llegue a todos los workers
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='catalyst-cache'),
+    }
+}
+
+# Segundos que se mantienen cacheadas las métricas del dashboard admin
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=900, cast=int)
+
+# Hilos (y conexiones) máximos por cada ejecución concurrente de consultas de
+# dashboards y estadísticas; 1 desactiva la ejecución concurrente
+QUERY_FANOUT_MAX_WORKERS = config('QUERY_FANOUT_MAX_WORKERS', default=4, cast=int)
+
+# Presupuesto de consultas SQL por vista (ver apps/catalyst_app/middleware.py)
+# 'raise' en tests, 'warn' registra una advertencia, 'off' solo mide
+TESTING = 'test' in sys.argv or 'pytest' in sys.modules
+QUERY_BUDGET_MODE = 'raise' if TESTING else config('QUERY_BUDGET_MODE', default='warn')
+
+# Presupuestos de vistas de función por nombre de URL (los ViewSets usan query_budgets)
+QUERY_BUDGETS = {
+    'catalyst_app:vendor-stats': 8,
+    'catalyst_app:manager-stats': 8,
+    'catalyst_app:dashboard-admin-summary': 20,
+    'catalyst_app:analytics-sales': 5,
+}
+
+# Máximo de movimientos por request en /api/inventory-movements/bulk/
+BULK_MOVEMENTS_MAX_ITEMS = config('BULK_MOVEMENTS_MAX_ITEMS', default=5000, cast=int)
+
+# Método de valorización del inventario: 'average' (costo promedio ponderado)
+# o 'fifo'. Al cambiarlo ejecutar rebuild_inventory_valuation
+INVENTORY_VALUATION_METHOD = config('INVENTORY_VALUATION_METHOD', default='average')
+
+# Máximo de periodos (buckets) por respuesta de /api/analytics/sales/
+ANALYTICS_MAX_BUCKETS = config('ANALYTICS_MAX_BUCKETS', default=400, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
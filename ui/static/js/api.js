@@ -213,6 +213,12 @@ class APIService {
     return this.request(`/inventory/?${query}`);
   }
 
+  // Inventarios bajo el punto de reorden; retorna { results, summary, ... }
+  async getLowStock(params = {}) {
+    const query = new URLSearchParams(params).toString();
+    return this.request(`/inventory/low-stock/?${query}`);
+  }
+
   async updateInventory(id, data) {
     return this.request(`/inventory/${id}/`, 'PUT', data);
   }
@@ -221,10 +227,15 @@ class APIService {
     return this.request('/inventory-movements/', 'POST', data);
   }
 
+  // Encola la sincronización; retorna { job_id, status, status_url }
   async syncInventory() {
     return this.request('/inventory/sync_inventory/', 'POST', {});
   }
 
+  async getSyncJob(id) {
+    return this.request(`/inventory/sync-jobs/${id}/`);
+  }
+
   // Ventas
   async getSales(params = {}) {
     const query = new URLSearchParams(params).toString();
@@ -239,6 +250,11 @@ class APIService {
     return this.request('/sales/', 'POST', data);
   }
 
+  // Venta POS completa en un request: { branch, items, payments, discount, ... }
+  async checkout(data) {
+    return this.request('/pos/checkout/', 'POST', data);
+  }
+
   // Órdenes
   async getOrders(params = {}) {
     const query = new URLSearchParams(params).toString();
@@ -280,6 +296,31 @@ class APIService {
   async createPurchase(data) {
     return this.request('/purchases/', 'POST', data);
   }
+
+  // Dashboard
+  // Consulta condicional: con el ETag anterior el servidor responde 304 si no hubo cambios.
+  // Retorna { etag, data } o { etag, data: null } cuando no hay cambios.
+  async getDashboardSummary(etag = null) {
+    const headers = this.getHeaders();
+    if (etag) {
+      headers['If-None-Match'] = etag;
+    }
+
+    const response = await fetch(`${this.baseURL}/dashboard/admin-summary/`, { headers, cache: 'no-store' });
+
+    if (response.status === 304) {
+      return { etag, data: null };
+    }
+    if (response.status === 401) {
+      await this.refreshAccessToken();
+      return this.getDashboardSummary(etag);
+    }
+    if (!response.ok) {
+      throw new Error(`HTTP Error: ${response.status}`);
+    }
+
+    return { etag: response.headers.get('ETag'), data: await response.json() };
+  }
 }
 
 // Instancia global
@@ -3,13 +3,16 @@ class DashboardAdmin {
     constructor() {
         this.currentRange = 7;
         this.chartManager = window.chartManager;
+        this.summaryEtag = null;
+        this.pollInterval = 60000;
         this.init();
     }
 
     init() {
         this.attachEventListeners();
         this.loadDashboardData();
-        this.generateSampleCharts();
+        // Consulta periódica: si no hubo cambios el servidor responde 304 sin cuerpo
+        setInterval(() => this.loadDashboardData(), this.pollInterval);
     }
 
     attachEventListeners() {
@@ -78,85 +81,70 @@ class DashboardAdmin {
         document.getElementById(`${section}-section`)?.classList.add('active');
     }
 
-    loadDashboardData() {
-        console.log(`Cargando datos del dashboard (últimos ${this.currentRange} días)...`);
-        
-        // Aquí iría la llamada a la API
-        // Por ahora usamos datos de demostración
-        this.updateMetrics();
-        this.updateCharts();
-        this.updateActivity();
+    async loadDashboardData() {
+        try {
+            const { etag, data } = await apiService.getDashboardSummary(this.summaryEtag);
+            this.summaryEtag = etag;
+            if (!data) {
+                return;
+            }
+            this.updateMetrics(data);
+            this.updateCharts(data);
+            this.updateActivity();
+        } catch (error) {
+            console.error('Error cargando el resumen del dashboard:', error);
+        }
     }
 
-    updateMetrics() {
-        // Datos de ejemplo
-        const metrics = {
-            sales: Math.random() * 50000 + 10000,
-            orders: Math.floor(Math.random() * 150 + 50),
-            products: Math.floor(Math.random() * 500 + 100),
-            customers: Math.floor(Math.random() * 300 + 50)
-        };
-
-        document.getElementById('metric-sales').textContent = `$${metrics.sales.toFixed(2)}`;
-        document.getElementById('metric-orders').textContent = metrics.orders.toString();
-        document.getElementById('metric-products').textContent = metrics.products.toString();
-        document.getElementById('metric-customers').textContent = metrics.customers.toString();
+    updateMetrics(summary) {
+        document.getElementById('metric-sales').textContent = `$${Number(summary.total_sales || 0).toFixed(2)}`;
+        document.getElementById('metric-orders').textContent = summary.order_count.toString();
+        document.getElementById('metric-products').textContent = summary.product_count.toString();
+        document.getElementById('metric-customers').textContent = summary.user_count.toString();
     }
 
-    updateCharts() {
+    updateCharts(summary) {
         // Destruir gráficos anteriores
         this.chartManager.destroyAll();
 
         // Gráfico de ventas
-        const salesData = this.generateSalesData();
         this.chartManager.createLineChart(
             'salesChart',
             'Ventas Diarias',
-            salesData,
+            summary.sales_data.map(d => d.amount),
             '#6366f1',
             'rgba(99, 102, 241, 0.1)'
         );
 
         // Gráfico de productos más vendidos
-        const topProducts = ['Laptop', 'Mouse', 'Teclado', 'Monitor', 'Webcam'];
         this.chartManager.createBarChart(
             'productsChart',
-            topProducts,
+            summary.products_data.map(p => p.name),
             [{
-                label: 'Unidades Vendidas',
-                data: [85, 72, 65, 58, 52]
+                label: 'Órdenes',
+                data: summary.products_data.map(p => p.sales)
             }]
         );
 
         // Gráfico de órdenes
-        const orderStatus = ['Completadas', 'Pendientes', 'Canceladas'];
         this.chartManager.createDoughnutChart(
             'ordersChart',
-            orderStatus,
-            [320, 145, 25],
-            ['#10b981', '#f59e0b', '#ef4444']
+            summary.orders_data.map(o => o.status),
+            summary.orders_data.map(o => o.count),
+            ['#10b981', '#f59e0b', '#ef4444', '#6366f1', '#8b5cf6', '#06b6d4']
         );
 
         // Gráfico de ingresos por sucursal
-        const branches = ['Sucursal 1', 'Sucursal 2', 'Sucursal 3', 'Sucursal 4'];
         this.chartManager.createBarChart(
             'branchesChart',
-            branches,
+            summary.branches_data.map(b => b.name),
             [{
                 label: 'Ingresos ($)',
-                data: [12500, 15000, 9800, 11200]
+                data: summary.branches_data.map(b => b.revenue)
             }]
         );
     }
 
-    generateSalesData() {
-        const data = [];
-        for (let i = 0; i < this.currentRange; i++) {
-            data.push(Math.random() * 8000 + 2000);
-        }
-        return data;
-    }
-
     updateActivity() {
         const activities = [
             { type: 'Venta', description: 'Venta completada por John Doe', date: 'Hace 2 horas', status: 'Completada' },
@@ -195,11 +183,6 @@ class DashboardAdmin {
         };
         return icons[type] || '📝';
     }
-
-    generateSampleCharts() {
-        // Este método se llama después de que los datos se cargan
-        setTimeout(() => this.updateCharts(), 500);
-    }
 }
 
 // Inicializar dashboard cuando el DOM esté listo
@@ -2,44 +2,54 @@
    DASHBOARD-ADMIN.JS - Lógica para el dashboard admin
    ============================================================ */
 
+// Intervalo de consulta del resumen (las respuestas sin cambios son 304)
+const SUMMARY_POLL_INTERVAL = 60000;
+let summaryEtag = null;
+
 document.addEventListener('DOMContentLoaded', async () => {
     await loadDashboardData();
     
     document.getElementById('btn-refresh').addEventListener('click', loadDashboardData);
+    setInterval(loadSummary, SUMMARY_POLL_INTERVAL);
 });
 
-async function loadDashboardData() {
+async function loadSummary() {
     try {
-        // Cargar productos activos
-        let products = await apiService.getActiveProducts();
-        if (!Array.isArray(products)) {
-            products = products && products.results ? products.results : [];
+        const { etag, data } = await apiService.getDashboardSummary(summaryEtag);
+        summaryEtag = etag;
+        if (!data) {
+            return false;
         }
-        document.getElementById('total-products').textContent = products.length;
 
-        // Cargar ventas del día
+        document.getElementById('total-products').textContent = data.active_product_count;
+        document.getElementById('total-sales').textContent = formatters.currency(data.today_pos_sales);
+        document.getElementById('total-orders').textContent = data.new_orders;
+        document.getElementById('total-users').textContent = data.active_user_count;
+        return true;
+    } catch (error) {
+        console.error('Error loading dashboard summary:', error);
+        return false;
+    }
+}
+
+async function loadDashboardData() {
+    try {
+        // Métricas principales desde el resumen cacheado
+        await loadSummary();
+
+        // Ventas del día
         let sales = await apiService.getSales({ 
             created_at__date: new Date().toISOString().split('T')[0] 
         });
         if (!Array.isArray(sales)) {
             sales = sales && sales.results ? sales.results : [];
         }
-        const totalSales = Array.isArray(sales) ? sales.reduce((sum, sale) => sum + parseFloat(sale.total || 0), 0) : 0;
-        document.getElementById('total-sales').textContent = formatters.currency(totalSales);
 
-        // Cargar órdenes pendientes
+        // Órdenes pendientes
         let orders = await apiService.getOrders({ status: 'pendiente' });
         if (!Array.isArray(orders)) {
             orders = orders && orders.results ? orders.results : [];
         }
-        document.getElementById('total-orders').textContent = orders.length;
-
-        // Cargar usuarios activos
-        let users = await apiService.getUsers({ is_active: true });
-        if (!Array.isArray(users)) {
-            users = users && users.results ? users.results : [];
-        }
-        document.getElementById('total-users').textContent = users.length;
 
         // Ventas recientes
         loadRecentSales(Array.isArray(sales) ? sales.slice(0, 5) : []);
@@ -102,14 +112,8 @@ function loadPendingOrders(orders) {
 
 async function loadLowStock() {
     try {
-        let inventory = await apiService.getInventory();
-        if (!Array.isArray(inventory)) {
-            inventory = inventory && inventory.results ? inventory.results : [];
-        }
-        
-        const lowStock = Array.isArray(inventory) 
-            ? inventory.filter(item => item.stock <= item.reorder_point).slice(0, 5)
-            : [];
+        const data = await apiService.getLowStock();
+        const lowStock = data && data.results ? data.results.slice(0, 5) : [];
         
         const tbody = document.getElementById('low-stock');
         